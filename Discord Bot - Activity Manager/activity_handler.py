@@ -1,15 +1,26 @@
-import re
+import asyncio
 import discord
 from config import *
+from message_parser import parse_message
+from bot_logging import get_logger
+
+log = get_logger("activity")
+
+POINTS_QUEUED_REPLY = (
+    "⏳ **Not approved yet:** an earlier points update for this member is still queued for the sheet.\n"
+    "Remove and re-add the ✅ in a few minutes, once it has gone through."
+)
 
 class ActivityHandler:
-    def __init__(self, sheets_manager, user_points, role_manager=None):
+    def __init__(self, sheets_manager, user_points, role_manager=None, approval_index=None, thread_bindings=None):
         self.sheets_manager = sheets_manager
         self.user_points = user_points
         self.role_manager = role_manager
+        self.approval_index = approval_index
+        self.thread_bindings = thread_bindings
         
     # Main activity log processing logic
-    async def process_activity_log(self, message):
+    async def process_activity_log(self, message, parsed=None):
         
         if not message.attachments:
             await message.reply(
@@ -28,8 +39,8 @@ class ActivityHandler:
             )
             return
 
-        # Validate and extract time data
-        time_data = self.extract_time_data(message.content)
+        # Validate and extract time data, reusing the parse from on_message when given
+        time_data = parsed.total_time if parsed else self.extract_time_data(message.content)
         if not time_data:
             await message.reply(
                 "❌ **Error: Your `Total time:` line is incorrect.**\n"
@@ -49,10 +60,17 @@ class ActivityHandler:
             return
 
         # Let manual reactions handle the approval/rejection
-        print(f"Valid activity log format detected for: {message.channel.name}")
+        log.debug("Valid activity log format detected for: %s", message.channel.name)
 
     # Process approved activity log
     async def process_activity_approval(self, message):
+        # Claim the log first so duplicate reactions never reach Sheets
+        if self.approval_index and not self.approval_index.claim(message.id):
+            log.info(f"Activity log {message.id} already approved - skipping")
+            return
+
+        awarded = False
+        queued_note = ""
         try:
             time_data = self.extract_time_data(message.content)
             if not time_data:
@@ -61,11 +79,12 @@ class ActivityHandler:
             hours, mins = time_data
             user_name = message.channel.name
             
-            # ONE API call to get all user data
-            user_data = self.sheets_manager.batch_get_user_data(user_name)
+            # ONE API call to get all user data, off the event loop so other members keep moving
+            user_data = await self.resolve_thread_user(message.channel)
             if not user_data:
-                print(f"Error: Could not find {user_name} in spreadsheet")
+                log.error(f"Could not find {user_name} in spreadsheet")
                 return
+            user_name = user_data.get('username') or user_name
             
             is_on_loa = user_data['loa_status'] == "LoA"
             
@@ -81,6 +100,12 @@ class ActivityHandler:
                 })
             
             if hours >= MIN_HOURS_FOR_POINTS:
+                # A queued points write for this member isn't on the sheet yet, so user_data['points'] is stale
+                if self.sheets_manager.points_pending(user_data['row_index']):
+                    log.warning(f"Points for {user_name} still queued, not approving {message.id} yet")
+                    await message.reply(POINTS_QUEUED_REPLY, mention_author=False)
+                    return
+
                 points_to_award = hours * POINTS_PER_HOUR
                 new_total = user_data['points'] + points_to_award
                 
@@ -92,9 +117,15 @@ class ActivityHandler:
                 })
                 
                 # ONE API call for all updates
-                if updates:
-                    self.sheets_manager.batch_update_cells(updates)
-                
+                outcome = await asyncio.to_thread(self.sheets_manager.write_cells, updates)
+                if outcome == "failed":
+                    return
+
+                # A journaled write will still land, so the log counts as approved either way
+                awarded = True
+                queued_note = self._queued_note(outcome)
+                self._record_approval(message, user_name, hours, mins, points_to_award, new_total, outcome)
+
                 # Check promotion with data we already have
                 promo_check = self.sheets_manager.check_promotion_eligibility_from_data(
                     new_total, user_data['rank']
@@ -125,7 +156,8 @@ class ActivityHandler:
                             f"• Time logged: {hours} hours {mins} mins\n"
                             f"• Points awarded: {points_to_award} points\n"
                             f"• Total points: {new_total} points\n"
-                            f"• **Note:** You are on LOA - points awarded but activity not counted",
+                            f"• **Note:** You are on LOA - points awarded but activity not counted"
+                            f"{queued_note}",
                             mention_author=False
                         )
                     else:
@@ -134,7 +166,8 @@ class ActivityHandler:
                             f"• Time logged: {hours} hours {mins} mins\n"
                             f"• Points awarded: {points_to_award} points\n"
                             f"• Total points: {new_total} points\n"
-                            f"{promo_message}",
+                            f"{promo_message}"
+                            f"{queued_note}",
                             mention_author=False
                         )
                 else:
@@ -145,37 +178,73 @@ class ActivityHandler:
                 
             else:
                 # Just update activity if needed
+                outcome = "written"
                 if updates:
-                    self.sheets_manager.batch_update_cells(updates)
-                
+                    outcome = await asyncio.to_thread(self.sheets_manager.write_cells, updates)
+                    if outcome == "failed":
+                        return
+
+                awarded = True
+                self._record_approval(message, user_name, hours, mins, 0, user_data['points'], outcome)
+
                 await message.reply(
-                    f"✅ Logged! Please note that this log does not meet the minimum requirement of 1 hour.",
+                    f"✅ Logged! Please note that this log does not meet the minimum requirement of 1 hour."
+                    f"{self._queued_note(outcome)}",
                     mention_author=False
                 )
                 
         except Exception as e:
-            print(f"Error processing activity approval: {e}")
+            log.error(f"Error processing activity approval: {e}")
+        finally:
+            # Nothing was written or journaled, let a later reaction try again
+            if self.approval_index and not awarded:
+                self.approval_index.release(message.id)
+
+    async def resolve_thread_user(self, thread):
+        # Thread -> roster row from the binding map, so approvals need no find() and survive renames
+        owner_id = getattr(thread, 'owner_id', None)
+
+        if self.thread_bindings:
+            binding = self.thread_bindings.get(thread.id)
+            if binding:
+                user_data = await asyncio.to_thread(
+                    self.sheets_manager.get_user_data_by_row, binding['row'], binding['discord_id']
+                )
+                if user_data:
+                    return user_data
+
+            # Missing or stale (rows moved): rebind by the owner's Discord ID
+            if owner_id:
+                row_index = await asyncio.to_thread(self.sheets_manager.get_discord_row_index)
+                row = row_index.get(str(owner_id))
+                if row:
+                    self.thread_bindings.bind(thread.id, owner_id, row)
+                    return await asyncio.to_thread(self.sheets_manager.get_user_data_by_row, row, owner_id)
+
+        # Last resort, the old lookup by thread name
+        return await asyncio.to_thread(self.sheets_manager.batch_get_user_data, thread.name)
+
+    def _record_approval(self, message, user_name, hours, mins, points_awarded, new_total, sheet_write="written"):
+        if not self.approval_index:
+            return
+
+        self.approval_index.record(message.id, {
+            'username': user_name,
+            'channel_id': str(message.channel.id),
+            'hours': hours,
+            'mins': mins,
+            'points_awarded': points_awarded,
+            'new_total': new_total,
+            'sheet_write': sheet_write
+        })
+
+    @staticmethod
+    def _queued_note(outcome):
+        if outcome == "journaled":
+            return "\n• **Note:** The sheet is slow to respond - this update is queued and will appear shortly"
+        return ""
 
     # Extract and validate time data from their message    
     def extract_time_data(self, content):
-        
-
-        match = re.search(r'\*\*Total time:\*\*\s*(?P<hours>\d+)\s*hours?\s*(?P<mins>\d{1,2})\s*mins?', content, re.IGNORECASE)
-        if match:
-            hours = int(match.group('hours'))
-            mins = int(match.group('mins'))
-            return (hours, mins)
-        
-        # "xx hour(s)" 
-        match = re.search(r'\*\*Total time:\*\*\s*(?P<hours>\d+)\s*hours?', content, re.IGNORECASE)
-        if match:
-            hours = int(match.group('hours'))
-            return (hours, 0)
-        
-        # "xx mins"
-        match = re.search(r'\*\*Total time:\*\*\s*(?P<mins>\d{1,2})\s*mins?', content, re.IGNORECASE)
-        if match:
-            mins = int(match.group('mins'))
-            return (0, mins)
-        
-        return None
\ No newline at end of file
+        # (hours, mins) from the **Total time:** line, via the shared single-pass parser
+        return parse_message(content).total_time
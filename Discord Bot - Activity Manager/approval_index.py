@@ -0,0 +1,54 @@
+# approval_index.py - Persistent index of activity logs that have already been approved
+
+from datetime import datetime, timezone as tz
+from config import *
+from local_store import load_jsonl, append_jsonl
+from bot_logging import get_logger
+
+log = get_logger("approvals")
+
+class ApprovalIndex:
+    def __init__(self, filename=PROCESSED_APPROVALS_FILE):
+        self.filename = filename
+
+        # message ID -> award record, loaded once from disk
+        self.records = {}
+        for record in load_jsonl(filename):
+            self.records[str(record.get("message_id"))] = record
+
+        # Hot check set so duplicate reactions never touch Sheets
+        self.processed_ids = set(self.records)
+        self.in_progress = set()
+
+        log.info(f"Loaded {len(self.processed_ids)} processed approvals")
+
+    def is_processed(self, message_id):
+        key = str(message_id)
+        return key in self.processed_ids or key in self.in_progress
+
+    def claim(self, message_id):
+        # Reserve the message before any awaits so a second reaction can't slip in
+        key = str(message_id)
+        if key in self.processed_ids or key in self.in_progress:
+            return False
+        self.in_progress.add(key)
+        return True
+
+    def release(self, message_id):
+        # Give up a claim when processing failed so it can be approved again
+        self.in_progress.discard(str(message_id))
+
+    def record(self, message_id, award):
+        # Persist the award record and mark the message as processed
+        key = str(message_id)
+        record = dict(award)
+        record["message_id"] = key
+        record["approved_at"] = datetime.now(tz.utc).isoformat()
+
+        self.records[key] = record
+        self.processed_ids.add(key)
+        self.in_progress.discard(key)
+        append_jsonl(self.filename, record)
+
+    def get(self, message_id):
+        return self.records.get(str(message_id))
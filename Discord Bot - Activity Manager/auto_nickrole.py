@@ -1,10 +1,37 @@
+import asyncio
 import discord
+from functools import lru_cache
 from config import *
+from metrics import metrics
+from promotions import promotion_table
+from bot_logging import get_logger
+
+log = get_logger("roles")
+
+@lru_cache(maxsize=1024)
+def render_nickname(prefix, codename, username):
+    # [PREFIX] "CODENAME" | username OR [PREFIX] username, fitted into Discord's 32 character limit
+    codename = codename.strip()
+    has_codename = codename.startswith('"') and codename.endswith('"')
+
+    if has_codename:
+        new_nickname = f"{prefix} {codename} | {username}"
+        if len(new_nickname) <= 32:
+            return new_nickname
+
+        # Keep the codename and cut the username, unless the codename alone doesn't fit
+        prefix_and_codename = f"{prefix} {codename} | "
+        if len(prefix_and_codename) < 32:
+            return f"{prefix_and_codename}{username[:32 - len(prefix_and_codename)]}"
+
+    return f"{prefix} {username}"[:32]
 
 class RoleManager:
-    def __init__(self, bot, sheets_manager):
+    def __init__(self, bot, sheets_manager, mutations=None):
         self.bot = bot
         self.sheets_manager = sheets_manager
+        # Coalesces role and nickname changes per member into one edit when set
+        self.mutations = mutations
         
         # Role ID mappings (Discord role ID -> spreadsheet rank)
         self.rank_role_ids = {
@@ -27,35 +54,23 @@ class RoleManager:
             "E9": "[SGM]",
         }
     
-    async def auto_rank(self, member, new_rank):
+    async def auto_rank(self, member, new_rank, update_sheet=True):
         # Automatically promote user: remove old role, add new role, update nickname and sheets
-        # Only auto-promote up to E4, E5+ requires manual promotion
-        if new_rank not in ["E2", "E3", "E4"]:
-            print(f"Auto-promotion not available for {new_rank} - requires manual promotion")
+        # Only ranks marked auto in PROMOTION_RULES, the rest need manual promotion
+        if not promotion_table.is_automatic(new_rank):
+            log.info(f"Auto-promotion not available for {new_rank} - requires manual promotion")
             return False
             
         try:
             guild = member.guild
             
-            # Get username from spreadsheet using Discord ID
-            username = self.sheets_manager.get_username_by_discord_id(str(member.id))
-            if not username:
-                print(f"Error: Could not find username for Discord ID {member.id}")
-                return False
-            
-            # Get user's current rank and codename from spreadsheet
-            user_data = self.sheets_manager.batch_get_user_data(username)
+            # Username, current rank and codename from the in-memory roster
+            user_data = await self._roster_entry(member)
             if not user_data:
-                print(f"Error: Could not find current rank for {username}")
                 return False
             
+            username = user_data['username']
             old_rank = user_data['rank']
-            codename = user_data.get('codename', '').strip()
-            
-            # Check if codename is surrounded by quotes
-            has_codename = codename.startswith('"') and codename.endswith('"')
-            
-            print(f"[DEBUG auto_rank] Username: {username}, Codename: {codename}, Has codename: {has_codename}")
             
             # Find new rank role ID
             new_role_id = None
@@ -65,12 +80,12 @@ class RoleManager:
                     break
             
             if not new_role_id:
-                print(f"Error: Could not find role ID for rank {new_rank}")
+                log.error(f"Could not find role ID for rank {new_rank}")
                 return False
             
             new_role = guild.get_role(new_role_id)
             if not new_role:
-                print(f"Error: Could not find role object for ID {new_role_id}")
+                log.error(f"Could not find role object for ID {new_role_id}")
                 return False
             
             # Find old rank role ID using the rank from spreadsheet
@@ -80,69 +95,34 @@ class RoleManager:
                     old_role = guild.get_role(role_id)
                     break
             
+            # Queue every change first so they can go out as one member edit
+            pending = []
+            
             # Remove old rank role if found
             if old_role and old_role in member.roles:
-                await member.remove_roles(old_role)
-                print(f"Removed {old_rank} role from {username}")
+                pending.append(self._remove_roles(member, old_role))
+                log.info(f"Removing {old_rank} role from {username}")
             
             # Add new rank role
             if new_role not in member.roles:
-                await member.add_roles(new_role)
-                print(f"Added {new_rank} role to {username}")
+                pending.append(self._add_roles(member, new_role))
+                log.info(f"Adding {new_rank} role to {username}")
             
-            # Update nickname with new rank prefix using spreadsheet username
-            new_prefix = self.rank_prefixes.get(new_rank, "")
-            if new_prefix:
-                # Format: [RANK] "CODENAME" | username OR [RANK] username
-                if has_codename:
-                    new_nickname = f"{new_prefix} {codename} | {username}"
-                else:
-                    new_nickname = f"{new_prefix} {username}"
-                
-                # Discord has 32 char limit on nicknames
-                if len(new_nickname) > 32:
-                    if has_codename:
-                        # Try to fit: [RANK] "CODE" | user
-                        max_length = 32
-                        # If still too long, truncate username
-                        prefix_and_codename = f"{new_prefix} {codename} | "
-                        if len(prefix_and_codename) < 32:
-                            remaining = 32 - len(prefix_and_codename)
-                            username_truncated = username[:remaining]
-                            new_nickname = f"{prefix_and_codename}{username_truncated}"
-                        else:
-                            # Codename itself is too long, just use rank + username
-                            new_nickname = f"{new_prefix} {username}"
-                            if len(new_nickname) > 32:
-                                max_name_length = 32 - len(new_prefix) - 1
-                                username_truncated = username[:max_name_length]
-                                new_nickname = f"{new_prefix} {username_truncated}"
-                    else:
-                        max_name_length = 32 - len(new_prefix) - 1
-                        username_truncated = username[:max_name_length]
-                        new_nickname = f"{new_prefix} {username_truncated}"
-                
-                try:
-                    print(f"[DEBUG auto_rank] Attempting to set nickname: {new_nickname}")
-                    print(f"[DEBUG auto_rank] Member: {member.display_name}, ID: {member.id}")
-                    print(f"[DEBUG auto_rank] Bot's top role: {member.guild.me.top_role.name} (pos: {member.guild.me.top_role.position})")
-                    print(f"[DEBUG auto_rank] Member's top role: {member.top_role.name} (pos: {member.top_role.position})")
-                    print(f"[DEBUG auto_rank] Is owner: {member.guild.owner_id == member.id}")
-                    
-                    await member.edit(nick=new_nickname)
-                    print(f"Updated nickname to: {new_nickname}")
-                except discord.Forbidden as e:
-                    print(f"No permission to change nickname for {username}: {e}")
-                except Exception as e:
-                    print(f"Error changing nickname for {username}: {e}")
+            # Update nickname with new rank prefix using spreadsheet username, members on LOA keep [LOA]
+            if self.rank_prefixes.get(new_rank):
+                on_loa = user_data.get('loa_status') == "LoA"
+                pending.append(self.apply_nickname(member, self.nickname_for(user_data, rank=new_rank, on_loa=on_loa)))
             
-            # Update rank in Google Sheets
-            self.sheets_manager.update_user_rank(username, new_rank)
+            await asyncio.gather(*pending)
+            
+            # Update rank in Google Sheets (batched jobs write every rank in one call instead)
+            if update_sheet:
+                await asyncio.to_thread(self.sheets_manager.update_user_rank, username, new_rank)
             
             return True
             
         except Exception as e:
-            print(f"Error in auto_rank: {e}")
+            log.error(f"Error in auto_rank: {e}")
             import traceback
             traceback.print_exc()
             return False
@@ -150,58 +130,14 @@ class RoleManager:
     async def set_loa_nickname(self, member):
         # Set LOA nickname: [LOA] "CODENAME" | username OR [LOA] username
         try:
-            # Get username from spreadsheet using Discord ID
-            username = self.sheets_manager.get_username_by_discord_id(str(member.id))
-            if not username:
-                print(f"Error: Could not find username for Discord ID {member.id}")
-                return False
-            
-            # Get user data from spreadsheet
-            user_data = self.sheets_manager.batch_get_user_data(username)
+            user_data = await self._roster_entry(member)
             if not user_data:
-                print(f"Error: Could not find user data for {username}")
                 return False
             
-            codename = user_data.get('codename', '').strip()
-            has_codename = codename.startswith('"') and codename.endswith('"')
-            
-            # Format: [LOA] "CODENAME" | username OR [LOA] username
-            if has_codename:
-                new_nickname = f"[LOA] {codename} | {username}"
-            else:
-                new_nickname = f"[LOA] {username}"
-            
-            # Handle 32 character limit
-            if len(new_nickname) > 32:
-                if has_codename:
-                    prefix_and_codename = f"[LOA] {codename} | "
-                    if len(prefix_and_codename) < 32:
-                        remaining = 32 - len(prefix_and_codename)
-                        username_truncated = username[:remaining]
-                        new_nickname = f"{prefix_and_codename}{username_truncated}"
-                    else:
-                        # Codename too long, just use [LOA] + username
-                        new_nickname = f"[LOA] {username}"
-                        if len(new_nickname) > 32:
-                            username_truncated = username[:26]  # 32 - 6 for "[LOA] "
-                            new_nickname = f"[LOA] {username_truncated}"
-                else:
-                    username_truncated = username[:26]
-                    new_nickname = f"[LOA] {username_truncated}"
-            
-            try:
-                if member.guild.owner_id != member.id:
-                    await member.edit(nick=new_nickname)
-                    return True
-                else:
-                    return False
-            except discord.Forbidden as e:
-                return False
-            except Exception as e:
-                return False
+            return await self.apply_nickname(member, self.nickname_for(user_data, on_loa=True))
                 
         except Exception as e:
-            print(f"Error in set_loa_nickname: {e}")
+            log.error(f"Error in set_loa_nickname: {e}")
             import traceback
             traceback.print_exc()
             return False
@@ -216,13 +152,13 @@ class RoleManager:
                 return False
             
             if loa_role not in member.roles:
-                await member.add_roles(loa_role)
+                await self._add_roles(member, loa_role)
                 return True
             else:
                 return True
                 
         except Exception as e:
-            print(f"Error in set_loa_role: {e}")
+            log.error(f"Error in set_loa_role: {e}")
             import traceback
             traceback.print_exc()
             return False
@@ -237,13 +173,13 @@ class RoleManager:
                 return False
             
             if loa_role in member.roles:
-                await member.remove_roles(loa_role)
+                await self._remove_roles(member, loa_role)
                 return True
             else:
                 return True
                 
         except Exception as e:
-            print(f"Error in remove_loa_role: {e}")
+            log.error(f"Error in remove_loa_role: {e}")
             import traceback
             traceback.print_exc()
             return False
@@ -251,78 +187,75 @@ class RoleManager:
     async def restore_rank_nickname(self, member):
         # Restore rank nickname after LOA: [RANK] "CODENAME" | username OR [RANK] username
         try:
-            # Get username from spreadsheet using Discord ID
-            username = self.sheets_manager.get_username_by_discord_id(str(member.id))
-            if not username:
-                print(f"Error: Could not find username for Discord ID {member.id}")
-                return False
-            
-            # Get user data from spreadsheet
-            user_data = self.sheets_manager.batch_get_user_data(username)
+            user_data = await self._roster_entry(member)
             if not user_data:
-                print(f"Error: Could not find user data for {username}")
                 return False
             
-            rank = user_data['rank']
-            codename = user_data.get('codename', '').strip()
-            has_codename = codename.startswith('"') and codename.endswith('"')
-            
-            print(f"[DEBUG restore_rank_nickname] Username: {username}, Rank: {rank}, Codename: {codename}")
-            
-            # Get rank prefix
-            rank_prefix = self.rank_prefixes.get(rank, "")
-            if not rank_prefix:
-                print(f"Warning: No prefix found for rank {rank}, using [UNK]")
-                rank_prefix = "[UNK]"
-            
-            # Format: [RANK] "CODENAME" | username OR [RANK] username
-            if has_codename:
-                new_nickname = f"{rank_prefix} {codename} | {username}"
-            else:
-                new_nickname = f"{rank_prefix} {username}"
-            
-            # Handle 32 character limit
-            if len(new_nickname) > 32:
-                if has_codename:
-                    prefix_and_codename = f"{rank_prefix} {codename} | "
-                    if len(prefix_and_codename) < 32:
-                        remaining = 32 - len(prefix_and_codename)
-                        username_truncated = username[:remaining]
-                        new_nickname = f"{prefix_and_codename}{username_truncated}"
-                    else:
-                        # Codename too long, just use rank + username
-                        new_nickname = f"{rank_prefix} {username}"
-                        if len(new_nickname) > 32:
-                            max_name_length = 32 - len(rank_prefix) - 1
-                            username_truncated = username[:max_name_length]
-                            new_nickname = f"{rank_prefix} {username_truncated}"
-                else:
-                    max_name_length = 32 - len(rank_prefix) - 1
-                    username_truncated = username[:max_name_length]
-                    new_nickname = f"{rank_prefix} {username_truncated}"
-            
-            try:
-                print(f"[DEBUG restore_rank_nickname] Attempting to set nickname: {new_nickname}")
-                if member.guild.owner_id != member.id:
-                    await member.edit(nick=new_nickname)
-                    print(f"[DEBUG restore_rank_nickname] Updated nickname to: {new_nickname}")
-                    return True
-                else:
-                    print(f"[DEBUG restore_rank_nickname] Cannot change nickname - user is server owner")
-                    return False
-            except discord.Forbidden as e:
-                print(f"[DEBUG restore_rank_nickname] No permission to change nickname: {e}")
-                return False
-            except Exception as e:
-                print(f"[DEBUG restore_rank_nickname] Error changing nickname: {e}")
-                return False
+            return await self.apply_nickname(member, self.nickname_for(user_data))
                 
         except Exception as e:
-            print(f"Error in restore_rank_nickname: {e}")
+            log.error(f"Error in restore_rank_nickname: {e}")
             import traceback
             traceback.print_exc()
             return False
 
+    async def _add_roles(self, member, *roles):
+        if self.mutations:
+            return await self.mutations.add_roles(member, *roles)
+        return await member.add_roles(*roles)
+
+    async def _remove_roles(self, member, *roles):
+        if self.mutations:
+            return await self.mutations.remove_roles(member, *roles)
+        return await member.remove_roles(*roles)
+
+    async def _set_nick(self, member, nick):
+        if self.mutations:
+            return await self.mutations.set_nick(member, nick)
+        return await member.edit(nick=nick)
+
+    async def _roster_entry(self, member):
+        # Roster row for a member from the in-memory index instead of two Sheets reads
+        user_data = await asyncio.to_thread(self.sheets_manager.get_roster_entry, member.id)
+        if not user_data:
+            log.error(f"Could not find Discord ID {member.id} in the roster")
+        return user_data
+
+    def nickname_for(self, user_data, rank=None, on_loa=False):
+        # Nickname a member should have for their rank (or LOA), codename and username
+        if on_loa:
+            prefix = "[LOA]"
+        else:
+            rank = rank or user_data['rank']
+            prefix = self.rank_prefixes.get(rank, "")
+            if not prefix:
+                log.warning(f"No prefix found for rank {rank}, using [UNK]")
+                prefix = "[UNK]"
+
+        return render_nickname(prefix, user_data.get('codename', ''), user_data['username'])
+
+    async def apply_nickname(self, member, new_nickname):
+        # Only call Discord when the nickname would actually change
+        if member.nick == new_nickname:
+            metrics.increment("nickname.unchanged")
+            return True
+
+        if member.guild.owner_id == member.id:
+            log.warning(f"Cannot change nickname for {member.display_name} - user is server owner")
+            return False
+
+        try:
+            await self._set_nick(member, new_nickname)
+            metrics.increment("nickname.edited")
+            log.debug("Updated nickname to: %s", new_nickname)
+            return True
+        except discord.Forbidden as e:
+            log.warning(f"No permission to change nickname for {member.display_name}: {e}")
+            return False
+        except Exception as e:
+            log.error(f"Error changing nickname for {member.display_name}: {e}")
+            return False
+
 
 
 
@@ -0,0 +1,82 @@
+# bot_logging.py - Structured logging that never blocks the event loop: handlers only enqueue, a thread writes
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+from datetime import datetime, timezone as tz
+from config import *
+from local_store import state_path
+
+class JsonFormatter(logging.Formatter):
+    # One JSON object per line: time, level, subsystem, message and any extra fields
+    def format(self, record):
+        entry = {
+            "at": datetime.fromtimestamp(record.created, tz.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # Resolve the message and traceback in the caller, but keep them apart so the JSON has an "exc" field
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_listener = None
+
+def setup_logging(level=LOG_LEVEL, levels=LOG_LEVELS):
+    # Route every logger (ours and discord.py's) through one queue, written by a background thread
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        state_path(LOG_FILE), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonFormatter())
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S"))
+
+    # Unbounded so a slow disk never makes a caller wait, records are tiny
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(log_queue))
+    root.setLevel(level)
+    for name, subsystem_level in levels.items():
+        logging.getLogger(name).setLevel(subsystem_level)
+
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+def stop_logging():
+    # Flush whatever is still queued
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def get_logger(subsystem):
+    # bot.<subsystem>, so levels can be set per subsystem in LOG_LEVELS
+    return logging.getLogger(f"bot.{subsystem}")
@@ -0,0 +1,60 @@
+# command_sync.py - Syncs slash commands to the server only when their definitions changed
+
+import hashlib
+import json
+import discord
+from config import *
+from local_store import load_json, save_json
+from metrics import metrics
+from bot_logging import get_logger
+
+log = get_logger("commands")
+
+class CommandSync:
+    def __init__(self, bot, guild_id=SERVER_ID, filename=COMMAND_SYNC_FILE):
+        self.bot = bot
+        self.guild = discord.Object(id=guild_id)
+        self.filename = filename
+        self.state = load_json(filename, {})
+        self.copied = False
+
+    def signature(self, commands):
+        # Hash of everything Discord stores for a command: names, descriptions, parameters, permissions
+        payloads = []
+        for command in sorted(commands, key=lambda command: command.name):
+            try:
+                payload = command.to_dict(self.bot.tree)
+            except TypeError:
+                # discord.py before 2.4 takes no tree argument
+                payload = command.to_dict()
+            payloads.append(payload)
+        encoded = json.dumps(payloads, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    async def sync(self):
+        # Guild scoped sync (applies instantly, separate rate limit), skipped when nothing changed
+        tree = self.bot.tree
+        if not self.copied:
+            # Every command is served from the guild copy, the global set is only kept to be emptied
+            tree.copy_global_to(guild=self.guild)
+            tree.clear_commands(guild=None)
+            self.copied = True
+
+        digest = self.signature(tree.get_commands(guild=self.guild))
+        if self.state.get("digest") == digest and self.state.get("guild_id") == self.guild.id:
+            metrics.increment("command_sync.skipped")
+            log.info("Slash commands unchanged, skipping sync")
+            return None
+
+        synced = await tree.sync(guild=self.guild)
+        log.info(f"Synced {len(synced)} command(s) to the server")
+
+        if not self.state.get("global_cleared"):
+            # Remove the globally registered copies from before guild syncing, or they show up twice
+            await tree.sync()
+            self.state["global_cleared"] = True
+
+        self.state.update(digest=digest, guild_id=self.guild.id)
+        save_json(self.filename, self.state)
+        metrics.increment("command_sync.synced")
+        return len(synced)
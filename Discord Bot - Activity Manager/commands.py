@@ -5,7 +5,17 @@ from discord import app_commands
 from datetime import datetime, timezone as tz, timedelta
 from config import *
 import asyncio
-import re
+import time
+from metrics import metrics
+from timezone_index import TimezoneIndex
+from bot_logging import get_logger
+
+log = get_logger("commands")
+
+POINTS_QUEUED_MESSAGE = (
+    "⏳ **Not changed:** an earlier points update for this member is still queued for the sheet. "
+    "Please try again in a few minutes, once it has gone through."
+)
 
 class LeaderboardView(discord.ui.View):
     def __init__(self, leaderboard_data, interaction):
@@ -64,27 +74,57 @@ class LeaderboardView(discord.ui.View):
             await interaction.response.defer()
 
 class Commands:
-    def __init__(self, bot, sheets_manager, user_points, active_log, pending_proof, timezone_offsets=None, role_manager=None):
+    def __init__(self, bot, sheets_manager, user_points, active_log, pending_proof, timezone_offsets=None, role_manager=None, work_queue=None, message_cache=None, scheduler=None, loa_expiry=None, reconciler=None, loa_handler=None, readiness=None, loop_watchdog=None):
         self.bot = bot
         self.sheets_manager = sheets_manager
         self.user_points = user_points
         self.active_log = active_log
         self.pending_proof = pending_proof
         self.status_board_message_id = None
-        self.timezone_offsets = timezone_offsets or {}
+        if not isinstance(timezone_offsets, TimezoneIndex):
+            timezone_offsets = TimezoneIndex(timezone_offsets or {})
+        self.timezone_offsets = timezone_offsets
         self.role_manager = role_manager
+        self.work_queue = work_queue
+        self.message_cache = message_cache
+        self.scheduler = scheduler
+        self.loa_expiry = loa_expiry
+        self.reconciler = reconciler
+        self.loa_handler = loa_handler
+        self.readiness = readiness
+        self.loop_watchdog = loop_watchdog
+        self.commands_registered = False
 
-    async def _check_server(self, interaction: discord.Interaction) -> bool:
+    async def _check_server(self, interaction: discord.Interaction, needs=("sheets",)) -> bool:
+        # needs: the startup components ("caches", "sheets") this command can't answer without
         if interaction.guild_id != SERVER_ID:
             await interaction.response.send_message(
                 "⚠️ Paiboy1 has taken the Bot down for maintenance, Will be back up soon!", 
                 ephemeral=True
             )
             return False
+
+        # Answer straight away while something it needs is still loading, rather than time out
+        if self.readiness and not await self.readiness.wait_all(needs, READINESS_WAIT_SECONDS):
+            await interaction.response.send_message(
+                "⏳ The bot is still warming up, try again in a few seconds.",
+                ephemeral=True
+            )
+            return False
         return True
+
+    async def _run_for_member(self, member_id, job):
+        # Serialize sheet writes for one member through the shared work queue
+        if self.work_queue:
+            return await self.work_queue.run(member_id, job)
+        return await job()
     
     def setup_commands(self):
-        # Register all slash commands with the bot
+        # Register all slash commands with the bot, once per process (on_ready fires again on reconnects)
+        if self.commands_registered:
+            return
+        self.commands_registered = True
+
         self.bot.tree.add_command(app_commands.Command(
             name="leaderboard", 
             description="Display the activity points leaderboard",
@@ -121,11 +161,21 @@ class Commands:
             callback=self.loa_remove
         ))
 
-        self.bot.tree.add_command(app_commands.Command(
+        clockin_command = app_commands.Command(
             name="clockin",
             description="Clock in to start log timer",
             callback=self.clockin
-        ))
+        )
+
+        # Plain function (not a method) so discord.py doesn't expect a bound self
+        async def timezone_autocomplete(interaction: discord.Interaction, current: str):
+            # The timezone table loads during startup, give it a moment rather than offer nothing
+            if self.readiness:
+                await self.readiness.wait("caches", READINESS_WAIT_SECONDS)
+            return self.timezone_choices(current)
+
+        clockin_command.autocomplete("timezone")(timezone_autocomplete)
+        self.bot.tree.add_command(clockin_command)
 
         self.bot.tree.add_command(app_commands.Command(
             name="time", 
@@ -151,26 +201,55 @@ class Commands:
             callback=self.pause_timer
         ))
 
+        self.bot.tree.add_command(app_commands.Command(
+            name="stats",
+            description="Show bot queue and performance metrics",
+            callback=self.stats
+        ))
+
+        self.bot.tree.add_command(app_commands.Command(
+            name="jobs",
+            description="Show scheduled jobs and their next runs",
+            callback=self.jobs
+        ))
+
+        self.bot.tree.add_command(app_commands.Command(
+            name="reconcile",
+            description="Sync rank roles, LOA roles and nicknames with the roster",
+            callback=self.reconcile
+        ))
+
+        self.bot.tree.add_command(app_commands.Command(
+            name="loabulk",
+            description="Approve every unprocessed LOA request from the last few hours",
+            callback=self.loa_bulk
+        ))
+
+        self.bot.tree.add_command(app_commands.Command(
+            name="journal",
+            description="Show or replay sheet writes that never went through",
+            callback=self.journal
+        ))
+
+        self.bot.tree.add_command(app_commands.Command(
+            name="lag",
+            description="Show event loop lag and what has been blocking the bot",
+            callback=self.lag
+        ))
+
     def parse_timezone(self, timezone_str):
-        # Handle every timezone using the loaded Timezones.txt file
-        if not timezone_str:
-            return None
-        
-        # Remove all spaces and convert to uppercase
-        timezone_str = timezone_str.replace(" ", "").upper().strip()
-        
-        # First check the loaded timezone offsets from Timezones.txt
-        if timezone_str in self.timezone_offsets:
-            return self.timezone_offsets[timezone_str]
-        
-        # Handle GMT+X or UTC+X format (for custom offsets)
-        match = re.match(r'(GMT|UTC)([+-])(\d+(?:\.\d+)?)', timezone_str)
-        if match:
-            sign = 1 if match.group(2) == '+' else -1
-            offset = float(match.group(3))
-            return sign * offset
-        
-        return None
+        # Handle every timezone using the loaded Timezones.txt file (plus GMT+X / UTC+X)
+        return self.timezone_offsets.offset_for(timezone_str)
+
+    def timezone_choices(self, current):
+        # Top 25 timezone matches for what the user has typed so far
+        started = time.perf_counter()
+        choices = [
+            app_commands.Choice(name=label, value=name)
+            for name, label in self.timezone_offsets.complete(current, limit=25)
+        ]
+        metrics.observe("timezone_autocomplete", time.perf_counter() - started)
+        return choices
     
     async def update_status_board(self):
         channel = self.bot.get_channel(SESSION_STATUS_CHANNEL_ID)
@@ -253,16 +332,25 @@ class Commands:
             await message.edit(content=content)
             
         except Exception as e:
-            print(f"Error updating status board: {e}")
+            log.error(f"Error updating status board: {e}")
 
     # Display the activity points leaderboard with pages
     async def leaderboard(self, interaction: discord.Interaction):
-        if not await self._check_server(interaction):
+        if not await self._check_server(interaction, needs=("caches",)):
             return
         
         try:
-            # Use cached data - ONE API call
-            all_values = self.sheets_manager.get_all_users_cached()
+            # Use cached data - ONE API call, or the local snapshot alone while the sheet is still connecting
+            if self.readiness and not self.readiness.is_ready("sheets"):
+                all_values = self.sheets_manager.all_users_cache
+                if not all_values:
+                    await interaction.response.send_message(
+                        "⏳ The bot is still warming up, try again in a few seconds.",
+                        ephemeral=True
+                    )
+                    return
+            else:
+                all_values = self.sheets_manager.get_all_users_cached()
             
             leaderboard_data = []
             valid_statuses = ["Active", "Inactive", "LOA"]
@@ -306,7 +394,7 @@ class Commands:
                 
                 leaderboard_data.append((display_name, point_value))
             
-            print(f"DEBUG: Found {len(leaderboard_data)} users for leaderboard")
+            log.debug("Found %d users for leaderboard", len(leaderboard_data))
             
             if not leaderboard_data:
                 embed = discord.Embed(
@@ -325,7 +413,7 @@ class Commands:
             await interaction.response.send_message(embed=embed, view=view)
             
         except Exception as e:
-            print(f"Leaderboard error: {e}")
+            log.error(f"Leaderboard error: {e}")
             await interaction.response.send_message(f"⚠️ Error: {e}", ephemeral=True)
 
     # Check points for a specific user
@@ -383,14 +471,18 @@ class Commands:
         
         # Defer the response since this might take a while
         await interaction.response.defer()
-        
+
+        # Points are read-modify-write, so queue behind any other job for this member
+        await self._run_for_member(member.id, lambda: self._add_points(interaction, amount, member))
+
+    async def _add_points(self, interaction: discord.Interaction, amount: int, member: discord.Member):
         try:
             # Get Discord ID
             discord_id = str(member.id)
-            print(f"[DEBUG /add] Looking up Discord ID: {discord_id}")
+            log.debug("/add looking up Discord ID: %s", discord_id)
             
             # Search spreadsheet by Discord ID to get username
-            username = self.sheets_manager.get_username_by_discord_id(discord_id)
+            username = await asyncio.to_thread(self.sheets_manager.get_username_by_discord_id, discord_id)
             
             if not username:
                 await interaction.followup.send(
@@ -400,10 +492,10 @@ class Commands:
                 )
                 return
             
-            print(f"[DEBUG /add] Found username: {username} for Discord ID: {discord_id}")
+            log.debug("/add found username: %s for Discord ID: %s", username, discord_id)
             
             # Get user data using the username
-            user_data = self.sheets_manager.batch_get_user_data(username)
+            user_data = await asyncio.to_thread(self.sheets_manager.batch_get_user_data, username)
             if not user_data:
                 await interaction.followup.send(
                     f"❌ **Error:** Could not find data for {username}",
@@ -411,6 +503,11 @@ class Commands:
                 )
                 return
             
+            # A queued points write isn't on the sheet yet, adding to the stale total would lose it
+            if self.sheets_manager.points_pending(user_data['row_index']):
+                await interaction.followup.send(POINTS_QUEUED_MESSAGE, ephemeral=True)
+                return
+
             current_points = user_data['points']
             current_rank = user_data['rank']
             
@@ -418,23 +515,26 @@ class Commands:
             new_total = current_points + amount
             
             # Save new total to spreadsheet
-            self.sheets_manager.update_points(username, new_total)
+            outcome = await asyncio.to_thread(self.sheets_manager.update_points, username, new_total)
+            if outcome == "failed":
+                await interaction.followup.send("❌ **Error:** Could not update the spreadsheet. Please try again.", ephemeral=True)
+                return
             
-            print(f"[DEBUG /add] Current rank: {current_rank}, Points: {current_points} -> {new_total}")
+            log.debug("/add current rank: %s, points: %s -> %s", current_rank, current_points, new_total)
             
             # Check promotion eligibility
             promo_check = self.sheets_manager.check_promotion_eligibility_from_data(
                 new_total, current_rank
             )
-            print(f"[DEBUG /add] Promo check: {promo_check}")
-            print(f"[DEBUG /add] Role manager exists: {self.role_manager is not None}")
+            log.debug("/add promo check: %s", promo_check)
+            log.debug("/add role manager exists: %s", self.role_manager is not None)
             
             # Auto-promote if eligible and doesn't need application
             promo_message = ""
             if promo_check["eligible"] and not promo_check.get("needs_application", False) and self.role_manager:
-                print(f"[DEBUG /add] Attempting auto-rank: {member.display_name} from {current_rank} to {promo_check['next_rank']}")
+                log.debug("/add attempting auto-rank: %s from %s to %s", member.display_name, current_rank, promo_check['next_rank'])
                 result = await self.role_manager.auto_rank(member, promo_check['next_rank'])
-                print(f"[DEBUG /add] Auto-rank result: {result}")
+                log.debug("/add auto-rank result: %s", result)
                 
                 if result:
                     promo_message = f"\n• **🏆 PROMOTED:** {member.display_name} has been promoted to **{promo_check['next_rank']}**!"
@@ -443,16 +543,20 @@ class Commands:
             elif promo_check["eligible"] and promo_check.get("needs_application", False):
                 promo_message = f"\n• **🎖️ Promotion Available:** Eligible for **{promo_check['next_rank']}**\n• Please complete the MR Ascension form: {MR_ASCENSION_FORM_URL}"
             
+            queued_note = ""
+            if outcome == "journaled":
+                queued_note = "\n• **Note:** The sheet is slow to respond - this update is queued and will appear shortly"
             await interaction.followup.send(
                 f"✅ **Points Added!**\n"
                 f"• Added **{amount} points** to **{member.display_name}** ({username})\n"
                 f"• Previous total: **{current_points} points**\n"
                 f"• New total: **{new_total} points**"
                 f"{promo_message}"
+                f"{queued_note}"
             )
                 
         except Exception as e:
-            print(f"[ERROR /add] {e}")
+            log.error(f"/add failed: {e}")
             import traceback
             traceback.print_exc()
             await interaction.followup.send(f"❌ **Error:** Could not add points. {e}", ephemeral=True)
@@ -462,18 +566,27 @@ class Commands:
     async def remove_points(self, interaction: discord.Interaction, amount: int, member: discord.Member):
         if not await self._check_server(interaction):
             return
+
+        # Defer so waiting in the member queue can't time out the interaction
+        await interaction.response.defer()
+        await self._run_for_member(member.id, lambda: self._remove_points(interaction, amount, member))
+
+    async def _remove_points(self, interaction: discord.Interaction, amount: int, member: discord.Member):
         try:
             # Extract username from Discord member's display name
-            import re
             username = str(member.id)
             
             # Get current points from spreadsheet
             try:
-                cell = self.sheets_manager.worksheet.find(username)
+                cell = await asyncio.to_thread(self.sheets_manager.worksheet.find, username)
                 row_index = cell.row
+
+                if self.sheets_manager.points_pending(row_index):
+                    await interaction.followup.send(POINTS_QUEUED_MESSAGE)
+                    return
                 
                 # Get current points
-                current_points_cell = self.sheets_manager.worksheet.cell(row_index, POINTS_COLUMN + 1)
+                current_points_cell = await asyncio.to_thread(self.sheets_manager.worksheet.cell, row_index, POINTS_COLUMN + 1)
                 current_points = int(current_points_cell.value) if current_points_cell.value and str(current_points_cell.value).isdigit() else 0
                 
                 # Subtract points from current total
@@ -483,24 +596,35 @@ class Commands:
                 if new_total < 0:
                     new_total = 0
                 
-                # Save new total to spreadsheet
-                self.sheets_manager.worksheet.update_cell(row_index, POINTS_COLUMN + 1, new_total)
-                
-                await interaction.response.send_message(
+                # Save new total to spreadsheet, journaled like every other write
+                outcome = await asyncio.to_thread(
+                    self.sheets_manager.write_cells,
+                    [{'row': row_index, 'col': POINTS_COLUMN + 1, 'value': new_total}]
+                )
+                if outcome == "failed":
+                    await interaction.followup.send("❌ **Error:** Could not update the spreadsheet. Please try again.")
+                    return
+                self.sheets_manager.invalidate_user_cache(username)
+
+                queued_note = ""
+                if outcome == "journaled":
+                    queued_note = "\n• **Note:** The sheet is slow to respond - this update is queued and will appear shortly"
+                await interaction.followup.send(
                     f"✅ **Points Removed!**\n"
                     f"• Removed **{amount} points** from **{member.display_name}** ({username})\n"
                     f"• Previous total: **{current_points} points**\n"
                     f"• New total: **{new_total} points**"
+                    f"{queued_note}"
                 )
                 
             except Exception as find_error:
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     f"❌ **Error:** Could not find username '{username}' in the roster spreadsheet. "
                     f"Make sure {member.display_name}'s Roblox username is in the roster."
                 )
             
         except Exception as e:
-            await interaction.response.send_message(f"❌ **Error:** Could not remove points. {e}")
+            await interaction.followup.send(f"❌ **Error:** Could not remove points. {e}")
     
     # Remove member from LOA status
     @app_commands.describe(user="Member to remove from LOA status")
@@ -531,8 +655,8 @@ class Commands:
                 )
                 return
             
-            # Try to remove LOA status directly
-            success = self.sheets_manager.remove_loa_status(username), await self.role_manager.remove_loa_role(user), await self.role_manager.restore_rank_nickname(user)
+            # Try to remove LOA status directly, queued behind any other job for this member
+            success = await self._run_for_member(user.id, lambda: self._remove_loa(username, user))
 
             if success:
                 await interaction.followup.send(
@@ -546,11 +670,21 @@ class Commands:
             
         except Exception as e:
             await interaction.followup.send(f"❌ **Error:** Could not remove LOA status. {e}")
+
+    async def _remove_loa(self, username, user):
+        if self.loa_expiry:
+            self.loa_expiry.cancel(user.id)
+        sheet_updated = await asyncio.to_thread(self.sheets_manager.remove_loa_status, username)
+        role_removed, nickname_restored = await asyncio.gather(
+            self.role_manager.remove_loa_role(user),
+            self.role_manager.restore_rank_nickname(user)
+        )
+        return (sheet_updated, role_removed, nickname_restored)
     
     # Clock into session status
     @app_commands.describe(timezone="Your timezone (e.g., EST, PST, GMT, BST)")
     async def clockin(self, interaction: discord.Interaction, timezone: str = None):
-        if not await self._check_server(interaction):
+        if not await self._check_server(interaction, needs=("caches", "sheets")):
             return
         
 
@@ -598,7 +732,7 @@ class Commands:
             "paused": False
         }
 
-        print(f"[CLOCKIN] User {user_id} clocked in with timezone: {timezone.upper()}")
+        log.info(f"User {user_id} clocked in with timezone: {timezone.upper()}")
 
         # Updates session board
         await self.update_status_board()
@@ -606,7 +740,7 @@ class Commands:
     # Clockout of session status
     @app_commands.describe(note="Optional note to add to your activity log")
     async def clockout(self, interaction: discord.Interaction, note: str = None):
-        if not await self._check_server(interaction):
+        if not await self._check_server(interaction, needs=()):
             return
         
         user_id = interaction.user.id
@@ -668,11 +802,11 @@ class Commands:
             hours = total_seconds // 3600
             minutes = (total_seconds % 3600) // 60
             
-            print(f"[TIMEOUT] User {user_id} ({user.name}) failed to send proof within 5 minutes. Session cancelled: {hours}h {minutes}m")
+            log.info(f"User {user_id} ({user.name}) failed to send proof within 5 minutes. Session cancelled: {hours}h {minutes}m")
 
     # Check current session time
     async def check_time(self, interaction: discord.Interaction):
-        if not await self._check_server(interaction):
+        if not await self._check_server(interaction, needs=()):
             return
         
         user_id = interaction.user.id
@@ -721,7 +855,7 @@ class Commands:
         )
     
     async def pause_timer(self, interaction: discord.Interaction):
-        if not await self._check_server(interaction):
+        if not await self._check_server(interaction, needs=()):
             return
         
         user_id = interaction.user.id
@@ -757,7 +891,7 @@ class Commands:
                     f"• Timer is now running again",
                     ephemeral=True
                 )
-                print(f"[PAUSE] User {interaction.user.name} resumed timer (paused for {paused_duration})")
+                log.info(f"User {interaction.user.name} resumed timer (paused for {paused_duration})")
             else:
                 await interaction.response.send_message(
                     "Error: Timer is marked as paused but no pause time found.",
@@ -773,12 +907,12 @@ class Commands:
                 f"• Use `/pause` again to resume\n",
                 ephemeral=True
             )
-            print(f"[PAUSE] User {interaction.user.name} paused timer")
+            log.info(f"User {interaction.user.name} paused timer")
 
     # Deployment command to start 
     @app_commands.describe(note="What the deployment is about")
     async def deploy(self, interaction: discord.Interaction, note: str):
-        if not await self._check_server(interaction):
+        if not await self._check_server(interaction, needs=()):
             return
         
         # Defer immediately to prevent timeout
@@ -808,6 +942,10 @@ class Commands:
 
             await message.add_reaction("✅")
 
+            # Joins come in as reactions, so keep the board cached
+            if self.message_cache:
+                self.message_cache.put(message)
+
             await interaction.edit_original_response(content="✅ Deployment created!")
             
         except Exception as e:
@@ -821,7 +959,187 @@ class Commands:
         
         try:
             await interaction.response.defer()
-            await self.sheets_manager.reset_weekly_activity()
+            await asyncio.to_thread(self.sheets_manager.reset_weekly_activity)
             await interaction.followup.send("✅ **Weekly reset completed!** All activity checkboxes have been reset.")
         except Exception as e:
-            await interaction.followup.send(f"❌ **Error during reset:** {e}")
\ No newline at end of file
+            await interaction.followup.send(f"❌ **Error during reset:** {e}")
+
+    # Show queue depth, wait times and other metrics
+    @app_commands.default_permissions(administrator=True)
+    async def stats(self, interaction: discord.Interaction):
+        if not await self._check_server(interaction, needs=()):
+            return
+
+        report = metrics.format_report()
+        if self.readiness and not self.readiness.ready:
+            report = f"Still starting: {', '.join(self.readiness.pending())}\n{report}"
+
+        # Starter-post checks used to cost one history fetch each
+        saved_calls = metrics.counters.get("forum.history_calls_saved", 0)
+        fetch_timing = metrics.timing_summary("rest.fetch_message")
+        if saved_calls and fetch_timing:
+            report += f"\nest. REST time saved on starter checks: {saved_calls * fetch_timing['avg']:.1f}s"
+
+        # Role and nickname changes merged into one member.edit
+        saved_edits = metrics.counters.get("member_edits.calls_saved", 0)
+        if saved_edits:
+            report += f"\nmember edit calls saved by merging: {saved_edits}"
+        await interaction.response.send_message(f"```\n{report[:1900]}\n```", ephemeral=True)
+
+    # Show scheduled jobs, when they run next and how long they took last time
+    @app_commands.default_permissions(administrator=True)
+    async def jobs(self, interaction: discord.Interaction):
+        if not await self._check_server(interaction, needs=()):
+            return
+
+        if not self.scheduler:
+            await interaction.response.send_message("❌ **Error:** The scheduler is not running.", ephemeral=True)
+            return
+
+        rows = self.scheduler.describe()
+        if not rows:
+            await interaction.response.send_message("No scheduled jobs.", ephemeral=True)
+            return
+
+        embed = discord.Embed(title="🗓️ Scheduled Jobs", color=0x00ff00)
+        for row in rows[:25]:
+            next_run = datetime.fromisoformat(row["next_run"])
+            lines = [f"**Schedule:** `{row['schedule']}`", f"**Next run:** <t:{int(next_run.timestamp())}:R>"]
+            if row["last_run"]:
+                last_run = datetime.fromisoformat(row["last_run"])
+                lines.append(f"**Last run:** <t:{int(last_run.timestamp())}:R> ({row['last_duration']:.2f}s, {row['last_status']})")
+            if row["running"]:
+                lines.append("⏳ Running now")
+            embed.add_field(name=row["id"], value="\n".join(lines), inline=False)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # Compare the roster with Discord and fix roles and nicknames that drifted
+    @app_commands.describe(apply="Apply the changes instead of only listing them")
+    @app_commands.default_permissions(administrator=True)
+    async def reconcile(self, interaction: discord.Interaction, apply: bool = False):
+        if not await self._check_server(interaction):
+            return
+
+        if not self.reconciler:
+            await interaction.response.send_message("❌ **Error:** The reconciler is not available.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        status_message = await interaction.followup.send("⏳ Comparing the roster with Discord...", ephemeral=True, wait=True)
+
+        async def on_progress(progress):
+            if progress["done"] % 10 and progress["done"] != progress["total"]:
+                return
+            try:
+                await status_message.edit(
+                    content=f"⏳ Updated {progress['done']}/{progress['total']} members ({progress['failed']} failed)"
+                )
+            except discord.HTTPException:
+                pass
+
+        report = await self.reconciler.run(dry_run=not apply, on_progress=on_progress)
+        if report is None:
+            progress = self.reconciler.progress
+            text = "⚠️ A reconcile is already running."
+            if progress:
+                text += f" {progress['done']}/{progress['total']} members done."
+            await interaction.followup.send(text, ephemeral=True)
+            return
+
+        await interaction.followup.send(f"```\n{report[:1900]}\n```", ephemeral=True)
+
+    # Approve a backlog of LOA requests in one go
+    @app_commands.describe(hours="How far back to look for unapproved LOA requests")
+    @app_commands.default_permissions(administrator=True)
+    async def loa_bulk(self, interaction: discord.Interaction, hours: app_commands.Range[int, 1, 720] = 72):
+        if not await self._check_server(interaction):
+            return
+
+        if not self.loa_handler:
+            await interaction.response.send_message("❌ **Error:** LOA handling is not available.", ephemeral=True)
+            return
+
+        channel = self.bot.get_channel(LOA_CHANNEL_ID)
+        if not channel:
+            await interaction.response.send_message("❌ **Error:** Could not find the LOA channel.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        after = datetime.now(tz.utc) - timedelta(hours=hours)
+        messages = await self.loa_handler.collect_pending(channel, after)
+        if not messages:
+            await interaction.followup.send(f"No unapproved LOA requests in the last {hours} hours.", ephemeral=True)
+            return
+
+        outcomes = await self.loa_handler.bulk_approve(messages)
+
+        approved = sum(1 for row in outcomes if row[3] == "approved")
+        lines = [f"{'Member':<20} {'Roster':<18} {'Ends':<10} Outcome"]
+        for name, username, end_date, outcome in outcomes:
+            lines.append(f"{name[:20]:<20} {username[:18]:<18} {end_date[:10]:<10} {outcome}")
+        table = "\n".join(lines)
+
+        await interaction.followup.send(
+            f"✅ **{approved}/{len(outcomes)} LOA requests approved**\n```\n{table[:1800]}\n```",
+            ephemeral=True
+        )
+
+    # Sheet writes that failed and are waiting to be replayed
+    @app_commands.describe(replay="Re-send unacknowledged writes now")
+    @app_commands.default_permissions(administrator=True)
+    async def journal(self, interaction: discord.Interaction, replay: bool = False):
+        if not await self._check_server(interaction, needs=("sheets",) if replay else ()):
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        journal = self.sheets_manager.journal
+
+        if replay:
+            replayed, failed = await asyncio.to_thread(self.sheets_manager.replay_journal)
+            await asyncio.to_thread(journal.compact)
+            await interaction.followup.send(f"🔁 Replayed **{replayed}** sheet writes, **{failed}** still pending.", ephemeral=True)
+            return
+
+        pending = journal.pending()
+        lines = [f"**Pending writes:** {len(pending)}", f"**Last sequence:** {journal.last_seq}"]
+        for entry in pending[:10]:
+            lines.append(f"• #{entry['seq']} {entry['kind']} at {entry['at']}")
+        await interaction.followup.send("\n".join(lines), ephemeral=True)
+
+    # Event loop lag histogram and the calls that blocked the loop the longest
+    @app_commands.default_permissions(administrator=True)
+    async def lag(self, interaction: discord.Interaction):
+        if not await self._check_server(interaction, needs=()):
+            return
+
+        watchdog = self.loop_watchdog
+        if not watchdog or not watchdog.heartbeat:
+            await interaction.response.send_message("❌ **Error:** The loop watchdog is not running.", ephemeral=True)
+            return
+
+        lines = []
+        summary = metrics.timing_summary("loop.lag")
+        if summary:
+            lines.append(
+                f"Lag over {summary['count']} beats: p50={summary['p50'] * 1000:.1f}ms "
+                f"p95={summary['p95'] * 1000:.1f}ms max={summary['max'] * 1000:.1f}ms"
+            )
+        lines.append(watchdog.format_histogram())
+
+        offenders = watchdog.top_offenders()
+        if offenders:
+            lines.append("")
+            lines.append(f"{'Blocked by':<40} {'Stalls':>6} {'Total':>8} {'Worst':>7}")
+            for culprit, count, total, worst in offenders:
+                lines.append(f"{culprit[:40]:<40} {count:>6} {total:>7.1f}s {worst:>6.2f}s")
+
+        if watchdog.stalls:
+            last = watchdog.stalls[-1]
+            lines.append("")
+            lines.append(f"Last stall {last['lag']:.2f}s at {last['at']} in {last['coroutine'] or 'unknown coroutine'}:")
+            lines.extend(f"  {frame}" for frame in last["stack"])
+
+        report = "\n".join(lines)
+        await interaction.response.send_message(f"```\n{report[:1900]}\n```", ephemeral=True)
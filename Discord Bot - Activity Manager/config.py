@@ -35,10 +35,108 @@ NOTES_COLUMN = 13       # Column N
 POINTS_PER_HOUR = 5
 MIN_HOURS_FOR_POINTS = 1
 
+# Startup: seconds a command waits for the sheet before answering "warming up", and connect retry backoff
+READINESS_WAIT_SECONDS = 2
+SHEETS_CONNECT_RETRY_SECONDS = 5
+SHEETS_CONNECT_MAX_RETRY_SECONDS = 300
+
+# Logging: JSON lines in DATA_DIR, rotated by size; per-logger levels (ours are bot.<subsystem>)
+LOG_LEVEL = 'INFO'
+LOG_LEVELS = {'discord': 'INFO', 'discord.http': 'WARNING', 'bot.sheets': 'INFO'}
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# Event loop lag watchdog: heartbeat interval, lag that counts as a stall, histogram buckets (seconds)
+LOOP_WATCHDOG_INTERVAL = 0.25
+LOOP_LAG_THRESHOLD = 0.5
+LOOP_LAG_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LOOP_STALLS_KEPT = 50
+LOOP_STACK_DEPTH = 8
+
+# Member work queue (approvals, /add, /remove, LOA)
+WORK_QUEUE_WORKERS = 4
+
+# Recently seen messages kept for reaction handlers
+MESSAGE_CACHE_SIZE = 500
+
+# Forum threads whose starter message ID is remembered (older ones are simply looked up again)
+THREAD_STARTER_CACHE_SIZE = 2000
+
+# Forum threads joined at once on startup
+THREAD_JOIN_CONCURRENCY = 5
+
+# Proof images: "download" re-uploads them, "link" keeps the original post and embeds its URLs
+PROOF_MODE = 'download'
+PROOF_MAX_FILE_BYTES = 10 * 1024 * 1024
+PROOF_MAX_TOTAL_BYTES = 25 * 1024 * 1024
+PROOF_DOWNLOAD_CONCURRENCY = 4
+PROOF_SPOOL_BYTES = 1024 * 1024  # Larger files go to a temp file instead of memory
+
+# Proof reuse detection (needs Pillow)
+PROOF_HASHES_FILE = 'proof_hashes.jsonl'
+PROOF_HASH_MAX_DISTANCE = 5  # Bits out of 64 that may differ for a near-duplicate
+PROOF_HASH_THUMBNAIL_SIZE = 64  # Images are shrunk to this (greyscale) while read, only that copy is kept
+
+# Promotion ladder: points needed for the next rank, whether the MR Ascension form is needed,
+# whether the bot promotes automatically, and the roster Notes text once it is reached
+PROMOTION_RULES = [
+    {"from": "E1", "to": "E2", "points": 10, "needs_app": False, "auto": True, "note": "Eligible for E2"},
+    {"from": "E2", "to": "E3", "points": 30, "needs_app": False, "auto": True, "note": "Eligible for E3"},
+    {"from": "E3", "to": "E4", "points": 50, "needs_app": False, "auto": True, "note": "Eligible for E4"},
+    {"from": "E4", "to": "E5", "points": 70, "needs_app": True, "auto": False, "note": "Eligible for E5"},
+    {"from": "E5", "to": "E6", "points": 90, "needs_app": False, "auto": False, "note": "Can move up to E6, awaiting promo board"},
+    {"from": "E6", "to": "E7", "points": 120, "needs_app": False, "auto": False, "note": "Can move up to E7, awaiting promo board"},
+    {"from": "E7", "to": "E8", "points": 150, "needs_app": False, "auto": False, "note": "Can move up to E8, awaiting promo board"},
+    {"from": "E8", "to": "E9", "points": 200, "needs_app": False, "auto": False, "note": "Can move up to E9, awaiting promo board"},
+]
+PROMOTION_CRON = '15 * * * *'  # Catch up on automatic promotions the per-log check missed
+
+# In-memory roster index used for nicknames and roles
+ROSTER_INDEX_TTL_MINUTES = 10
+MEMBER_EDIT_WINDOW_SECONDS = 0.75  # Role and nickname changes within this window go out as one edit
+
+# Sheet write journal
+SHEET_JOURNAL_REPLAY_BATCH = 50  # Unacknowledged writes merged into one request on replay
+SHEET_JOURNAL_COMPACT_AFTER = 2000  # Records on disk before acknowledged ones are dropped
+SHEET_JOURNAL_CRON = '*/10 * * * *'
+
+# Roster -> Discord reconciliation
+RECONCILE_CRON = '0 */6 * * *'  # Apply fixes every 6 hours, set to None to only run /reconcile by hand
+RECONCILE_EDIT_INTERVAL = 1.0  # Seconds between members, keeps a full pass under Discord's limits
+RECONCILE_REPORT_LINES = 25
+
+# Scheduled jobs (cron times are UTC: minute hour day month weekday)
+SCHEDULER_WORKERS = 2
+WEEKLY_RESET_CRON = '0 0 * * 1'  # Monday 00:00 UTC, set to None to keep resets manual
+
+# Automatic LOA expiry
+LOA_DATE_DAY_FIRST = True  # "Ends: 03/04/2025" is 3 April unless the numbers only fit mm/dd
+LOA_EXPIRY_GROUP_SECONDS = 300  # LOAs ending within this window are cleared in one sheet write
+LOA_EXPIRY_RETRY_SECONDS = 600
+LOA_REFRESH_CRON = '*/30 * * * *'  # Reload every LOA value and note from the sheet
+
 # MR Ascension Form
 MR_ASCENSION_FORM_URL = 'https://tinyurl.com/MR-Ascension-App'
 MR_ASCENSION_SHEETS_URL = 'https://tinyurl.com/MR-Ascension-Sheets'
 MR_ASCENSION_URL = "https://docs.google.com/spreadsheets/d/1idllSgKy1cqccX_2cB3ZksagIFRj8Sq4u_yWiMHTxa8/edit?usp=sharing"
+MR_ASCENSION_WORKSHEET = 'Odpovede z formulára 1'
+MR_NOTIFIER_READ_ROWS = 50  # Rows fetched per range read past the watermark
+MR_NOTIFIER_MIN_MINUTES = 1
+MR_NOTIFIER_MAX_MINUTES = 15  # Poll interval backs off up to this while the form is quiet
+
+# Local state files (kept in DATA_DIR)
+DATA_DIR = 'data'
+PROCESSED_APPROVALS_FILE = 'processed_approvals.jsonl'
+LOA_APPROVALS_FILE = 'processed_loa_approvals.jsonl'
+SHEET_JOURNAL_FILE = 'sheet_journal.jsonl'
+ROSTER_SNAPSHOT_DB = 'roster_snapshot.sqlite3'
+COMMAND_SYNC_FILE = 'command_sync.json'
+LOG_FILE = 'bot.log.jsonl'
+JOINED_THREADS_FILE = 'joined_threads.json'
+THREAD_BINDINGS_FILE = 'thread_bindings.json'
+MR_NOTIFIER_STATE_FILE = 'mr_notifier.json'
+SCHEDULER_STATE_FILE = 'scheduler.json'
+LOA_EXPIRY_DB = 'loa_expiry.sqlite3'
 
 
 
@@ -0,0 +1,112 @@
+# forum_threads.py - Keeps the bot joined to every activity forum thread
+
+import asyncio
+import time
+import discord
+from config import *
+from local_store import load_json, save_json
+from metrics import metrics
+from bot_logging import get_logger
+
+log = get_logger("forum")
+
+class ForumThreadManager:
+    def __init__(self, bot, forum_channel_id=FORUM_CHANNEL_ID, filename=JOINED_THREADS_FILE, concurrency=THREAD_JOIN_CONCURRENCY):
+        self.bot = bot
+        self.forum_channel_id = forum_channel_id
+        self.filename = filename
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+        # Threads already joined, kept across restarts so readies skip them
+        self.joined = set(load_json(filename, []))
+
+        # Archived threads can't be joined until someone posts and reopens them
+        self.pending_archived = set()
+        self.startup_done = False
+
+        # Thread ID -> owner ID for every post seen on startup, used for roster backfill
+        self.known_threads = {}
+
+    async def iter_forum_threads(self, forum_channel):
+        # Active threads come from the gateway cache, archived ones are paged over REST
+        for thread in forum_channel.threads:
+            yield thread
+
+        async for thread in forum_channel.archived_threads(limit=None):
+            yield thread
+
+    async def sync(self):
+        # Join every forum thread we aren't in yet, once per process
+        if self.startup_done:
+            return
+
+        forum_channel = self.bot.get_channel(self.forum_channel_id)
+        if not forum_channel:
+            log.warning(f"Could not find a channel with ID {self.forum_channel_id}")
+            return
+
+        started = time.perf_counter()
+        seen = 0
+        to_join = []
+
+        async for thread in self.iter_forum_threads(forum_channel):
+            seen += 1
+            self.known_threads[thread.id] = thread.owner_id
+            if thread.id in self.joined:
+                continue
+            if thread.me is not None:
+                self.joined.add(thread.id)
+                continue
+            if thread.archived:
+                self.pending_archived.add(thread.id)
+                continue
+            to_join.append(thread)
+
+        results = await asyncio.gather(*(self.join(thread, save=False) for thread in to_join))
+        self.save()
+        self.startup_done = True
+
+        elapsed = time.perf_counter() - started
+        metrics.observe("startup.forum_threads", elapsed)
+        log.info(
+            f"Forum threads: {seen} seen, {sum(results)} joined, "
+            f"{len(self.pending_archived)} archived waiting, took {elapsed:.2f}s"
+        )
+
+    async def join(self, thread, save=True):
+        # Join one thread, backing off if Discord rate limits us
+        async with self.semaphore:
+            for attempt in range(3):
+                try:
+                    await thread.join()
+                    self.joined.add(thread.id)
+                    self.pending_archived.discard(thread.id)
+                    if save:
+                        self.save()
+                    log.debug("Joined thread: %s", thread.name)
+                    return True
+                except discord.RateLimited as e:
+                    await asyncio.sleep(e.retry_after)
+                except discord.HTTPException as e:
+                    if e.status != 429:
+                        log.warning(f"Could not join thread {thread.name}: {e}")
+                        return False
+                    await asyncio.sleep(2 ** attempt)
+            return False
+
+    async def on_thread_update(self, before, after):
+        # An archived thread was reopened by a new post, join it now
+        if after.parent_id != self.forum_channel_id or after.archived:
+            return
+        if after.id in self.joined or after.me is not None:
+            return
+        await self.join(after)
+
+    def mark_joined(self, thread):
+        # Sending a message in a thread joins it, no API call needed
+        if thread.id not in self.joined:
+            self.joined.add(thread.id)
+            self.save()
+
+    def save(self):
+        save_json(self.filename, sorted(self.joined))
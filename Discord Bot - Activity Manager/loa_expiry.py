@@ -0,0 +1,261 @@
+# loa_expiry.py - Ends LOAs automatically once their "Ends:" date has passed
+
+import asyncio
+import heapq
+import sqlite3
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone as tz
+from config import *
+from local_store import state_path
+from metrics import metrics
+from bot_logging import get_logger
+
+log = get_logger("loa")
+
+def parse_end_date(text, day_first=LOA_DATE_DAY_FIRST):
+    # "dd/mm/yyyy" (or mm/dd when the first number can't be a month) -> date, None if it isn't a real date
+    try:
+        first, second, year = (int(part) for part in text.split("/"))
+    except (AttributeError, ValueError):
+        return None
+
+    if year < 100:
+        year += 2000
+
+    if first > 12:
+        day, month = first, second
+    elif second > 12:
+        month, day = first, second
+    elif day_first:
+        day, month = first, second
+    else:
+        month, day = first, second
+
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+def expiry_timestamp(end_date):
+    # The end date is the last day of leave, so it expires at the start of the next day (UTC)
+    return datetime.combine(end_date + timedelta(days=1), dtime(), tzinfo=tz.utc).timestamp()
+
+class LOAExpiryStore:
+    # SQLite table of LOA end dates, indexed on when they expire
+    def __init__(self, filename=LOA_EXPIRY_DB):
+        self.connection = sqlite3.connect(state_path(filename))
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS loa_expiries ("
+            "discord_id TEXT PRIMARY KEY, "
+            "username TEXT NOT NULL, "
+            "end_date TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, "
+            "note TEXT)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS loa_expiries_expires_at ON loa_expiries (expires_at)")
+        self.connection.commit()
+
+    def upsert(self, discord_id, username, end_date, expires_at, note):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO loa_expiries (discord_id, username, end_date, expires_at, note) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (str(discord_id), username, end_date.isoformat(), expires_at, note)
+            )
+
+    def delete_many(self, discord_ids):
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM loa_expiries WHERE discord_id = ?",
+                [(str(discord_id),) for discord_id in discord_ids]
+            )
+
+    def get(self, discord_id):
+        return self.connection.execute(
+            "SELECT discord_id, username, end_date, expires_at, note FROM loa_expiries WHERE discord_id = ?",
+            (str(discord_id),)
+        ).fetchone()
+
+    def all(self):
+        return self.connection.execute(
+            "SELECT discord_id, username, end_date, expires_at, note FROM loa_expiries ORDER BY expires_at"
+        ).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+class LOAExpiryManager:
+    def __init__(self, bot, sheets_manager, role_manager, work_queue=None, store=None):
+        self.bot = bot
+        self.sheets_manager = sheets_manager
+        self.role_manager = role_manager
+        self.work_queue = work_queue
+        self.store = store or LOAExpiryStore()
+
+        # Min-heap of (expires_at, discord ID); deadlines holds the live entry per member
+        # so a rescheduled or cancelled LOA just leaves a stale heap entry that gets skipped
+        self.heap = []
+        self.deadlines = {}
+        self.wake = asyncio.Event()
+        self.task = None
+
+        for discord_id, username, end_date, expires_at, note in self.store.all():
+            self._push(discord_id, expires_at)
+        log.info(f"Loaded {len(self.deadlines)} scheduled LOA expiries")
+
+    def schedule(self, discord_id, username, end_date_text):
+        # Remember when an approved LOA ends, returns the parsed date or None
+        end_date = parse_end_date(end_date_text)
+        if end_date is None:
+            log.warning(f"Could not read end date '{end_date_text}' for {username}")
+            return None
+
+        expires_at = expiry_timestamp(end_date)
+        self.store.upsert(discord_id, username, end_date, expires_at, f"Ends: {end_date_text}")
+        self._push(str(discord_id), expires_at)
+        self.wake.set()
+        return end_date
+
+    def cancel(self, discord_id):
+        # LOA ended some other way (e.g. /loa), forget its deadline
+        if self.deadlines.pop(str(discord_id), None) is not None:
+            self.store.delete_many([discord_id])
+
+    def sync_from_sheet(self, loa_state):
+        # Pick up LOAs approved before expiry tracking existed, follow end dates staff changed on the sheet,
+        # drop ones ended by hand
+        on_loa = {}
+        for entry in loa_state.values():
+            if entry['on_loa'] and entry['discord_id']:
+                on_loa[entry['discord_id']] = entry
+
+        added = 0
+        rescheduled = 0
+        for discord_id, entry in on_loa.items():
+            if not entry['end_date']:
+                continue
+            if discord_id not in self.deadlines:
+                if self.schedule(discord_id, entry['username'], entry['end_date']):
+                    added += 1
+            elif self._end_date_changed(discord_id, entry['end_date']):
+                if self.schedule(discord_id, entry['username'], entry['end_date']):
+                    rescheduled += 1
+
+        removed = [discord_id for discord_id in self.deadlines if discord_id not in on_loa]
+        for discord_id in removed:
+            self.cancel(discord_id)
+
+        if added or rescheduled or removed:
+            log.info(f"Synced with sheet: {added} added, {rescheduled} rescheduled, {len(removed)} dropped")
+
+    def _end_date_changed(self, discord_id, end_date_text):
+        # Compared by date, not deadline, so a pending retry isn't mistaken for a new end date
+        end_date = parse_end_date(end_date_text)
+        stored = self.store.get(discord_id)
+        return end_date is not None and (stored is None or stored[2] != end_date.isoformat())
+
+    def start(self):
+        # Safe to call on every on_ready
+        if self.task is not None:
+            return
+        self.task = asyncio.create_task(self._run())
+
+    def _push(self, discord_id, expires_at):
+        self.deadlines[discord_id] = expires_at
+        heapq.heappush(self.heap, (expires_at, discord_id))
+
+    async def _run(self):
+        while True:
+            self.wake.clear()
+            due = self._pop_due()
+            if due:
+                try:
+                    await self.expire(due)
+                except Exception as e:
+                    # Never let one bad batch stop expiries for the rest of the process
+                    log.error(f"Error expiring {len(due)} LOAs, retrying later: {e}")
+                    self._retry_later(due)
+                continue
+
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=self._seconds_until_next())
+            except asyncio.TimeoutError:
+                pass
+
+    def _pop_due(self):
+        # Everything past its deadline, plus anything due within the grouping window,
+        # so a batch of LOAs ending together costs one sheet write
+        now = time.time()
+        if not self.heap or self.heap[0][0] > now:
+            return []
+
+        horizon = now + LOA_EXPIRY_GROUP_SECONDS
+        due = []
+        while self.heap and self.heap[0][0] <= horizon:
+            expires_at, discord_id = heapq.heappop(self.heap)
+            if self.deadlines.get(discord_id) != expires_at:
+                continue
+            del self.deadlines[discord_id]
+            due.append(discord_id)
+        return due
+
+    def _retry_later(self, discord_ids):
+        # Put members back on the heap unless they were rescheduled meanwhile
+        retry_at = time.time() + LOA_EXPIRY_RETRY_SECONDS
+        for discord_id in discord_ids:
+            if discord_id not in self.deadlines:
+                self._push(discord_id, retry_at)
+        metrics.increment("loa_expiry.failed", len(discord_ids))
+
+    def _seconds_until_next(self):
+        if not self.heap:
+            return 3600
+        return min(max(self.heap[0][0] - time.time(), 1), 3600)
+
+    async def expire(self, discord_ids):
+        # Clear LOA on the sheet for every member in one request, then fix their roles and nicknames
+        started = time.perf_counter()
+        discord_row_index = await asyncio.to_thread(self.sheets_manager.get_discord_row_index)
+
+        # Members the lookup couldn't place (failed read, or not on the roster) stay scheduled;
+        # the periodic sheet sync drops the ones that really left the roster
+        resolved = [discord_id for discord_id in discord_ids if discord_id in discord_row_index]
+        unresolved = [discord_id for discord_id in discord_ids if discord_id not in discord_row_index]
+        if unresolved:
+            log.warning(f"{len(unresolved)} members not found on the roster, retrying later")
+            self._retry_later(unresolved)
+        if not resolved:
+            return
+
+        rows = [discord_row_index[discord_id] for discord_id in resolved]
+        # A journaled write still lands on replay, so only a failed one is retried here
+        sheet_write = await asyncio.to_thread(self.sheets_manager.remove_loa_statuses, rows)
+        if sheet_write == "failed":
+            # Put them back and try again later
+            self._retry_later(resolved)
+            return
+
+        self.store.delete_many(resolved)
+
+        guild = self.bot.get_guild(SERVER_ID)
+        for discord_id in resolved:
+            member = guild.get_member(int(discord_id)) if guild else None
+            if member is None:
+                log.warning(f"Member {discord_id} is no longer in the server, sheet updated only")
+                continue
+
+            if self.work_queue:
+                self.work_queue.submit(member.id, lambda member=member: self._restore_member(member), description="loa expiry")
+            else:
+                await self._restore_member(member)
+
+        metrics.increment("loa_expiry.expired", len(resolved))
+        metrics.increment("loa_expiry.sheet_writes")
+        metrics.observe("loa_expiry.batch", time.perf_counter() - started)
+        log.info(f"Ended LOA for {len(resolved)} members ({len(rows)} roster rows)")
+
+    async def _restore_member(self, member):
+        await asyncio.gather(
+            self.role_manager.remove_loa_role(member),
+            self.role_manager.restore_rank_nickname(member)
+        )
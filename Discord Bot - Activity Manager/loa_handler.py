@@ -2,33 +2,35 @@
 
 import discord
 from config import *
-import re
+import asyncio
+from message_parser import parse_message
 
 import discord
 from config import *
+from bot_logging import get_logger
+
+log = get_logger("loa")
 
 class LOAHandler:
-    def __init__(self, sheets_manager, role_manager=None):
+    def __init__(self, sheets_manager, role_manager=None, loa_expiry=None, loa_approvals=None, work_queue=None):
         self.sheets_manager = sheets_manager
         self.role_manager = role_manager
+        self.loa_expiry = loa_expiry
+        # LOA posts already approved, by reaction or in bulk
+        self.loa_approvals = loa_approvals
+        self.work_queue = work_queue
 
     def extract_end_date(self, content):
         # Extract end date from message content
-        # Supports: "Ends: 12/31/2024" or "Ends: 31/12/2024"
-        try:
-            # Look for "Ends:" followed by a date
-            match = re.search(r'Ends?:\s*(\d{1,2})/(\d{1,2})/(\d{2,4})', content, re.IGNORECASE)
-            if match:
-                part1, part2, year = match.groups()
-                # Return the raw date string as found
-                return f"{part1}/{part2}/{year}"
-            return None
-        except Exception as e:
-            print(f"Error extracting end date: {e}")
-            return None
+        # Supports: "Ends: 12/31/2024" or "Ends: 31/12/2024", returned as the raw string found
+        return parse_message(content).loa_end_date
     
     async def process_loa_approval(self, message):
         # Process LOA approval - just use Discord ID, update spreadsheet, add role, change nickname
+        if self.loa_approvals and not self.loa_approvals.claim(message.id):
+            return
+
+        approved = False
         try:
             member = message.author
             guild = message.guild
@@ -41,9 +43,9 @@ class LOAHandler:
                     return
             
             # Get username from Discord ID using cached data
-            username = self.sheets_manager.get_username_by_discord_id(discord_id)
+            username = await asyncio.to_thread(self.sheets_manager.get_username_by_discord_id, discord_id)
             if not username:
-                print(f"Error: Could not find Discord ID {discord_id} in spreadsheet")
+                log.error(f"Could not find Discord ID {discord_id} in spreadsheet")
                 await message.reply(
                     f"❌ **Error:** Could not find your Discord ID in the roster.",
                     mention_author=False
@@ -53,12 +55,12 @@ class LOAHandler:
             # Extract end date from message
             end_date = self.extract_end_date(message.content)
             if end_date:
-                print(f"[DEBUG LOA] Extracted end date: {end_date}")
+                log.debug("Extracted end date: %s", end_date)
             
-            # Update LOA status in spreadsheet
-            success = self.sheets_manager.update_loa_status(username, "LOA", make_black=True)
-            if not success:
-                print(f"Error: Failed to update LOA status for {username}")
+            # Update LOA status in spreadsheet; a journaled write still lands, so only "failed" stops here
+            sheet_write = await asyncio.to_thread(self.sheets_manager.update_loa_status, username, "LOA", make_black=True)
+            if sheet_write == "failed":
+                log.error(f"Failed to update LOA status for {username}")
                 await message.reply(
                     f"❌ **Error:** Failed to update LOA status in spreadsheet.",
                     mention_author=False
@@ -67,28 +69,151 @@ class LOAHandler:
             
             # Add note with end date if found
             if end_date:
-                note_success = self.sheets_manager.add_loa_note(username, f"Ends: {end_date}")
+                note_success = await asyncio.to_thread(self.sheets_manager.add_loa_note, username, f"Ends: {end_date}")
                 if note_success:
-                    print(f"[DEBUG LOA] Added note to LOA cell: Ends: {end_date}")
+                    log.debug("Added note to LOA cell: Ends: %s", end_date)
+
+                # Remember the end date so the LOA is lifted automatically
+                if self.loa_expiry:
+                    self.loa_expiry.schedule(discord_id, username, end_date)
             
-            # Add LOA role using role_manager
+            # Add LOA role and change nickname to [LOA] format together, so they merge into one edit
             if self.role_manager:
-                await self.role_manager.set_loa_role(member)
+                await asyncio.gather(
+                    self.role_manager.set_loa_role(member),
+                    self.role_manager.set_loa_nickname(member)
+                )
             
-            # Change nickname to [LOA] format using role_manager
-            if self.role_manager:
-                await self.role_manager.set_loa_nickname(member)
+            approved = True
+            if self.loa_approvals:
+                self.loa_approvals.record(message.id, {
+                    'discord_id': discord_id, 'username': username, 'end_date': end_date, 'sheet_write': sheet_write
+                })
             
-            print(f"[DEBUG LOA] LOA approved for {username}")
+            log.debug("LOA approved for %s", username)
         
         except Exception as e:
-            print(f"Error processing LOA approval: {e}")
+            log.error(f"Error processing LOA approval: {e}")
             import traceback
             traceback.print_exc()
             await message.reply(
                 f"❌ **Error:** Failed to process LOA approval. Check console logs.",
                 mention_author=False
             )
+        finally:
+            if not approved and self.loa_approvals:
+                self.loa_approvals.release(message.id)
+
+    async def collect_pending(self, channel, after):
+        # LOA posts since `after` that were never approved, latest post per member
+        pending = {}
+        async for message in channel.history(after=after, limit=None, oldest_first=True):
+            if message.author.bot:
+                continue
+            if self.loa_approvals and self.loa_approvals.is_processed(message.id):
+                continue
+            # Approved by reaction before approvals were recorded
+            if any(str(reaction.emoji) == "✅" for reaction in message.reactions):
+                continue
+            pending[message.author.id] = message
+        return list(pending.values())
+
+    async def bulk_approve(self, messages):
+        # Approve many LOA posts: one sheet request for everyone, then queued role and nickname changes
+        # Returns one (member name, roster username, end date, outcome) row per post
+        outcomes = []
+        approvals = []
+        ignored_role_ids = set(LOA_IGNORED_ROLE_IDS)
+
+        # The write below is by row position, so read the roster now rather than trust an index
+        # that may be minutes old (staff inserting or sorting rows would shift the LOA onto someone else)
+        loaded_at = self.sheets_manager.roster_loaded_at
+        roster = await asyncio.to_thread(self.sheets_manager.refresh_roster_index)
+        if self.sheets_manager.roster_loaded_at == loaded_at:
+            log.error("Could not read the roster for /loabulk")
+            return [
+                (message.author.display_name, "", self.extract_end_date(message.content) or "", "roster read failed")
+                for message in messages
+            ]
+
+        for message in messages:
+            member = message.author
+            end_date = self.extract_end_date(message.content)
+
+            if not isinstance(member, discord.Member):
+                outcomes.append((member.name, "", end_date or "", "not in server"))
+                continue
+            if any(role.id in ignored_role_ids for role in member.roles):
+                outcomes.append((member.display_name, "", end_date or "", "ignored role"))
+                continue
+            if self.loa_approvals and not self.loa_approvals.claim(message.id):
+                outcomes.append((member.display_name, "", end_date or "", "already processing"))
+                continue
+
+            user_data = roster.get(str(member.id))
+            if not user_data:
+                if self.loa_approvals:
+                    self.loa_approvals.release(message.id)
+                outcomes.append((member.display_name, "", end_date or "", "not in roster"))
+                continue
+
+            approvals.append({
+                'row': user_data['row_index'],
+                'note': f"Ends: {end_date}" if end_date else None,
+                'message': message,
+                'member': member,
+                'username': user_data['username'],
+                'end_date': end_date
+            })
+
+        if not approvals:
+            return outcomes
+
+        sheet_write = await asyncio.to_thread(self.sheets_manager.apply_loa_approvals, approvals)
+        if sheet_write == "failed":
+            for approval in approvals:
+                if self.loa_approvals:
+                    self.loa_approvals.release(approval['message'].id)
+                outcomes.append((approval['member'].display_name, approval['username'], approval['end_date'] or "", "sheet write failed"))
+            return outcomes
+
+        pending_roles = []
+        for approval in approvals:
+            member = approval['member']
+            if self.loa_approvals:
+                self.loa_approvals.record(approval['message'].id, {
+                    'discord_id': str(member.id), 'username': approval['username'], 'end_date': approval['end_date'],
+                    'sheet_write': sheet_write
+                })
+            if self.loa_expiry and approval['end_date']:
+                self.loa_expiry.schedule(member.id, approval['username'], approval['end_date'])
+            pending_roles.append(self._queue_loa_member(member))
+
+        # Wait for the queued Discord changes so the report shows how each one went
+        results = await asyncio.gather(*pending_roles, return_exceptions=True)
+        for approval, result in zip(approvals, results):
+            if isinstance(result, Exception):
+                outcome = f"sheet ok, Discord failed: {result}"
+            elif not all(result):
+                outcome = "sheet ok, role/nick not changed"
+            else:
+                outcome = "approved"
+            if sheet_write == "journaled":
+                outcome += " (sheet write queued)"
+            outcomes.append((approval['member'].display_name, approval['username'], approval['end_date'] or "", outcome))
+
+        return outcomes
+
+    async def _set_loa_member(self, member):
+        if not self.role_manager:
+            return (True, True)
+        return await asyncio.gather(self.role_manager.set_loa_role(member), self.role_manager.set_loa_nickname(member))
+
+    def _queue_loa_member(self, member):
+        job = lambda: self._set_loa_member(member)
+        if self.work_queue:
+            return self.work_queue.submit(member.id, job, "bulk loa approval")
+        return job()
 
 
 
@@ -0,0 +1,71 @@
+# local_store.py - Helpers for the bot's local state files
+
+import json
+import logging
+import os
+from config import *
+
+# Plain logging here: bot_logging imports this module, so it cannot import bot_logging
+log = logging.getLogger("bot.local_store")
+
+def state_path(filename):
+    # All local state lives under DATA_DIR next to the bot
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
+
+def load_json(filename, default):
+    # Load a JSON state file, falling back to default if it is missing or broken
+    try:
+        with open(state_path(filename), mode='r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        log.error(f"Error loading {filename}: {e}")
+        return default
+
+def save_json(filename, data):
+    # Write to a temp file first so a crash never leaves a half written file
+    path = state_path(filename)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, mode='w', encoding='utf-8') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        log.error(f"Error saving {filename}: {e}")
+        return False
+
+def load_jsonl(filename):
+    # Load every record from an append-only JSON lines file
+    records = []
+    try:
+        with open(state_path(filename), mode='r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A torn last line from a crash mid-write, skip it
+                    log.warning(f"Skipping corrupt line in {filename}")
+        return records
+    except FileNotFoundError:
+        return []
+    except OSError as e:
+        log.error(f"Error loading {filename}: {e}")
+        return []
+
+def append_jsonl(filename, record):
+    # Append one record without rewriting the whole file
+    try:
+        with open(state_path(filename), mode='a', encoding='utf-8') as file:
+            file.write(json.dumps(record) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        return True
+    except OSError as e:
+        log.error(f"Error appending to {filename}: {e}")
+        return False
@@ -0,0 +1,176 @@
+# loop_watchdog.py - Measures event loop lag and names whatever was blocking the loop when it stalls
+
+import asyncio
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone as tz
+from config import *
+from metrics import metrics
+from bot_logging import get_logger
+
+log = get_logger("watchdog")
+
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class LoopWatchdog:
+    def __init__(self, watched=(), interval=LOOP_WATCHDOG_INTERVAL, threshold=LOOP_LAG_THRESHOLD, buckets=LOOP_LAG_BUCKETS):
+        self.interval = interval
+        self.threshold = threshold
+
+        # Code object -> "Class.method" for every method of the watched classes (SheetsManager...)
+        self.watched_code = {
+            func.__code__: f"{cls.__name__}.{name}"
+            for cls in watched
+            for name, func in vars(cls).items()
+            if inspect.isfunction(func)
+        }
+
+        # Upper bound (seconds) -> count, the last bucket catches everything above
+        self.buckets = list(buckets)
+        self.histogram = [0] * (len(self.buckets) + 1)
+
+        # culprit -> [stalls, total seconds, worst seconds]
+        self.offenders = {}
+        self.stalls = deque(maxlen=LOOP_STALLS_KEPT)
+
+        self.loop_thread_id = None
+        self.last_beat = time.monotonic()
+        self.samples = []      # stacks captured by the helper thread during the current stall
+        self.lock = threading.Lock()
+        self.heartbeat = None
+        self.sampler = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        # Call from the event loop; safe to call more than once
+        if self.heartbeat:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.heartbeat = asyncio.create_task(self._heartbeat())
+        self.sampler = threading.Thread(target=self._sample_loop, name="loop-watchdog", daemon=True)
+        self.sampler.start()
+        log.info("Loop watchdog started (every %.2fs, stalls over %.2fs)", self.interval, self.threshold)
+
+    def stop(self):
+        self.stopped.set()
+        if self.heartbeat:
+            self.heartbeat.cancel()
+            self.heartbeat = None
+
+    async def _heartbeat(self):
+        # Sleep a fixed interval, anything past it is time the loop could not get back to us
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.last_beat = now
+            self._record(lag)
+
+    def _sample_loop(self):
+        # Helper thread: if the heartbeat is overdue the loop is stuck, so grab its stack while it still is
+        while not self.stopped.wait(self.interval / 2):
+            overdue = time.monotonic() - self.last_beat - self.interval
+            if overdue < self.threshold:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            sample = self._describe(frame)
+            del frame
+            with self.lock:
+                if len(self.samples) < 20:
+                    self.samples.append(sample)
+
+    def _describe(self, frame):
+        # Walk the loop thread's stack: the watched method, our own code, the coroutine and the innermost call
+        stack = []
+        while frame is not None:
+            stack.append(frame)
+            frame = frame.f_back
+        stack.reverse()  # outermost first
+
+        watched = None
+        own_code = None
+        coroutine = None
+        for frame in stack:
+            code = frame.f_code
+            if code in self.watched_code:
+                watched = self.watched_code[code]
+            filename = os.path.abspath(code.co_filename)
+            if filename.startswith(BOT_DIR) and filename != os.path.abspath(__file__):
+                own_code = f"{os.path.basename(filename)}:{code.co_name}"
+                if code.co_flags & inspect.CO_COROUTINE and coroutine is None:
+                    # The outermost of our coroutines is the task that is holding the loop
+                    coroutine = getattr(code, "co_qualname", code.co_name)
+
+        innermost = stack[-1].f_code if stack else None
+        lines = [
+            f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+            for frame in stack[-LOOP_STACK_DEPTH:]
+        ]
+        return {
+            "culprit": watched or own_code or (innermost.co_name if innermost else "unknown"),
+            "coroutine": coroutine,
+            "blocking_call": f"{os.path.basename(innermost.co_filename)}:{innermost.co_name}" if innermost else None,
+            "stack": lines
+        }
+
+    def _record(self, lag):
+        metrics.observe("loop.lag", lag)
+        for index, bound in enumerate(self.buckets):
+            if lag <= bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+        with self.lock:
+            samples, self.samples = self.samples, []
+        if lag < self.threshold:
+            return
+
+        # The most common culprit across the stall's samples, the first one if nothing repeats
+        if samples:
+            culprit = Counter(sample["culprit"] for sample in samples).most_common(1)[0][0]
+            sample = next(sample for sample in samples if sample["culprit"] == culprit)
+        else:
+            # Over the threshold but shorter than a sampling tick
+            sample = {"culprit": "unsampled", "coroutine": None, "blocking_call": None, "stack": []}
+            culprit = sample["culprit"]
+
+        stats = self.offenders.setdefault(culprit, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += lag
+        stats[2] = max(stats[2], lag)
+
+        self.stalls.append(dict(sample, lag=lag, at=datetime.now(tz.utc).isoformat(timespec="seconds")))
+        metrics.increment("loop.stalls")
+        log.warning(
+            "Event loop blocked for %.2fs by %s (coroutine %s, in %s)",
+            lag, culprit, sample["coroutine"], sample["blocking_call"],
+            extra={"fields": {"lag": round(lag, 3), "culprit": culprit, "stack": sample["stack"]}}
+        )
+
+    def top_offenders(self, limit=10):
+        # [(culprit, stalls, total seconds, worst seconds)], most total blocking first
+        rows = [(culprit, *stats) for culprit, stats in self.offenders.items()]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:limit]
+
+    def format_histogram(self):
+        total = sum(self.histogram) or 1
+        lines = []
+        lower = 0
+        for bound, count in zip(self.buckets + [None], self.histogram):
+            label = f"{lower * 1000:g}-{bound * 1000:g}ms" if bound is not None else f">{lower * 1000:g}ms"
+            bar = "#" * round(20 * count / total)
+            lines.append(f"{label:>14} {count:>7} {bar}")
+            if bound is not None:
+                lower = bound
+        return "\n".join(lines)
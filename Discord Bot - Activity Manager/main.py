@@ -1,7 +1,12 @@
 # main.py - Main Discord bot file
 
-import re
+import time
+startup_started = time.perf_counter()
+
+import asyncio
+import logging
 import discord
+from collections import OrderedDict
 from discord.ext import tasks, commands
 from config import *
 from sheets_manager import SheetsManager
@@ -9,17 +14,71 @@ from commands import Commands
 from activity_handler import ActivityHandler
 from loa_handler import LOAHandler
 from auto_nickrole import RoleManager
-
-# Initialize components
-sheets_manager = SheetsManager()
+from approval_index import ApprovalIndex
+from work_queue import MemberWorkQueue
+from message_cache import MessageCache
+from metrics import metrics
+from proof_pipeline import ProofPipeline
+from proof_hashes import ProofHashIndex
+from forum_threads import ForumThreadManager
+from thread_bindings import ThreadBindings
+from message_parser import parse_message, find_board_lines
+from mr_notifier import AscensionNotifier
+from scheduler import JobScheduler
+from loa_expiry import LOAExpiryManager
+from reconciler import RosterReconciler
+from member_mutations import MemberMutationQueue
+from promotions import PromotionJob
+from command_sync import CommandSync
+from readiness import ReadinessGate
+from bot_logging import setup_logging, get_logger
+from loop_watchdog import LoopWatchdog
+
+import_seconds = time.perf_counter() - startup_started
+
+# Everything logs through a queue, a background thread does the writing
+setup_logging()
+log = get_logger("main")
+proof_log = get_logger("proof")
+
+# Initialize components, nothing here touches the network (see bootstrap below)
+first_command_seen = False
+sheets_manager = SheetsManager(connect=False)
 user_points = {}
+
+# Local caches, the Sheets client and the background jobs each report in here as they come up
+readiness = ReadinessGate(("caches", "sheets", "jobs"), started=startup_started)
+startup_tasks = []
+background_jobs = None
+
+# New forum posts seen before the sheet was reachable, handled once it is
+deferred_threads = []
+
+# Flags anything that holds the event loop (usually a gspread call) and names it
+loop_watchdog = LoopWatchdog(watched=(SheetsManager,))
 active_log = {}
 pending_proof = {}
+approval_index = ApprovalIndex()
+loa_approvals = ApprovalIndex(LOA_APPROVALS_FILE)
+thread_bindings = ThreadBindings()
+
+# Approvals, /add, /remove and LOA changes run through here, in order per member
+work_queue = MemberWorkQueue(workers=WORK_QUEUE_WORKERS)
+
+# Recent log posts, LOA requests and deployment boards, so reactions rarely need a fetch
+message_cache = MessageCache(max_size=MESSAGE_CACHE_SIZE)
 
-last_row_count = 0 # This is for MR form notifier
+# Forum thread ID -> starter message ID, so first-post checks never hit REST (bounded like the message cache)
+thread_starter_ids = OrderedDict()
 
-# Load timezones from file
-timezone_offsets = sheets_manager.load_timezones_from_txt()
+# Proof images are fetched concurrently and spooled to disk when large
+proof_pipeline = ProofPipeline()
+
+# Perceptual hashes of every proof image, to flag reused screenshots
+proof_hash_index = ProofHashIndex()
+
+# Weekly reset and other timed jobs, persisted so missed runs catch up after downtime
+scheduler = JobScheduler()
 
 # Bot setup
 intents = discord.Intents.default()
@@ -28,12 +87,25 @@ intents.guilds = True
 intents.members = True
 intents.messages = True
 bot = commands.Bot(command_prefix='!', intents=intents)
-role_manager = RoleManager(bot, sheets_manager)
+member_mutations = MemberMutationQueue(window=MEMBER_EDIT_WINDOW_SECONDS)
+role_manager = RoleManager(bot, sheets_manager, member_mutations)
+forum_threads = ForumThreadManager(bot)
+ascension_notifier = AscensionNotifier(bot, sheets_manager)
+
+# LOA end dates, lifted automatically when they pass
+loa_expiry = LOAExpiryManager(bot, sheets_manager, role_manager, work_queue)
+
+# Fixes rank roles, LOA roles and nicknames that drifted from the sheet
+reconciler = RosterReconciler(bot, sheets_manager, role_manager, work_queue)
+
+# Whole-roster pass that applies any automatic promotions in one sheet write
+promotion_job = PromotionJob(bot, sheets_manager, role_manager, work_queue)
 
 # Initialize handlers
-activity_handler = ActivityHandler(sheets_manager, user_points, role_manager)
-commands_handler = Commands(bot, sheets_manager, user_points, active_log, pending_proof, timezone_offsets, role_manager)
-loa_handler = LOAHandler(sheets_manager, role_manager=role_manager)
+activity_handler = ActivityHandler(sheets_manager, user_points, role_manager, approval_index, thread_bindings)
+loa_handler = LOAHandler(sheets_manager, role_manager=role_manager, loa_expiry=loa_expiry, loa_approvals=loa_approvals, work_queue=work_queue)
+commands_handler = Commands(bot, sheets_manager, user_points, active_log, pending_proof, None, role_manager, work_queue, message_cache, scheduler, loa_expiry, reconciler, loa_handler, readiness, loop_watchdog)
+command_sync = CommandSync(bot)
 
 def get_squadron_from_roles(member):
     # Extract squadron from user's Discord roles
@@ -43,58 +115,171 @@ def get_squadron_from_roles(member):
         "[-] Assault Squadron [-]": "Assault"
     }
     
-    for role in member.roles:
-        print(f"  - '{role.name}'")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Roles for %s: %s", member.display_name, [role.name for role in member.roles])
     
     for role in member.roles:
         if role.name in role_to_squadron:
             return role_to_squadron[role.name]
     
     # Default fallback
-    print(f"DEBUG: No squadron role found for {member.display_name}, using fallback: Protection")
+    log.debug("No squadron role found for %s, using fallback: Protection", member.display_name)
     return "Protection"
 
-@tasks.loop(minutes=1.0) # This needs to be up here because it needs to be before def on_ready
+def remember_thread_starter(thread_id, starter_id):
+    thread_starter_ids[thread_id] = starter_id
+    thread_starter_ids.move_to_end(thread_id)
+    while len(thread_starter_ids) > THREAD_STARTER_CACHE_SIZE:
+        thread_starter_ids.popitem(last=False)
+
+def is_thread_starter(message):
+    # A forum post's starter message has the same ID as its thread
+    thread = message.channel
+    started = time.perf_counter()
+
+    starter_id = thread_starter_ids.get(thread.id)
+    if starter_id is None:
+        starter_message = getattr(thread, 'starter_message', None)
+        starter_id = starter_message.id if starter_message else thread.id
+    remember_thread_starter(thread.id, starter_id)
+
+    metrics.observe("forum.starter_check", time.perf_counter() - started)
+    metrics.increment("forum.history_calls_saved")
+    return message.id == starter_id
+
+@tasks.loop(minutes=MR_NOTIFIER_MIN_MINUTES) # This needs to be up here because it needs to be before def on_ready
 async def check_for_new_entries():
-    global last_row_count
-    try:
-        spreadsheet = sheets_manager.client.open_by_url(MR_ASCENSION_URL)
-        worksheet = spreadsheet.worksheet("Odpovede z formulára 1")
-        
-        all_values = worksheet.col_values(1)
-        current_rows = len(all_values)
+    # Poll less often while nobody is submitting the form
+    minutes = await ascension_notifier.poll()
+    if minutes != check_for_new_entries.minutes:
+        check_for_new_entries.change_interval(minutes=minutes)
+
+async def run_weekly_reset(payload):
+    await asyncio.to_thread(sheets_manager.reset_weekly_activity)
+
+async def refresh_loa_state(payload=None):
+    # One request for every LOA value and note, then line the expiry heap up with it
+    loa_state = await asyncio.to_thread(sheets_manager.load_loa_state)
+    if loa_state is not None:
+        loa_expiry.sync_from_sheet(loa_state)
+
+async def run_reconcile(payload=None):
+    report = await reconciler.run(dry_run=False)
+    if report:
+        log.info(report.splitlines()[0])
+
+async def run_journal_maintenance(payload=None):
+    # Re-send sheet writes that never got through, then drop acknowledged journal entries
+    await asyncio.to_thread(sheets_manager.replay_journal)
+    if sheets_manager.journal.needs_compaction():
+        await asyncio.to_thread(sheets_manager.journal.compact)
+
+def setup_scheduled_jobs():
+    scheduler.register("weekly_reset", run_weekly_reset)
+    if WEEKLY_RESET_CRON:
+        scheduler.add_cron("weekly_reset", WEEKLY_RESET_CRON, "weekly_reset")
+    else:
+        scheduler.cancel("weekly_reset")
+
+    scheduler.register("loa_refresh", refresh_loa_state)
+    scheduler.add_cron("loa_refresh", LOA_REFRESH_CRON, "loa_refresh")
+
+    scheduler.register("sheet_journal", run_journal_maintenance)
+    scheduler.add_cron("sheet_journal", SHEET_JOURNAL_CRON, "sheet_journal")
+
+    scheduler.register("promotions", promotion_job.run)
+    scheduler.add_cron("promotions", PROMOTION_CRON, "promotions")
+
+    scheduler.register("reconcile", run_reconcile)
+    if RECONCILE_CRON:
+        scheduler.add_cron("reconcile", RECONCILE_CRON, "reconcile")
+    else:
+        scheduler.cancel("reconcile")
+
+async def load_local_caches():
+    # Warm start from the roster snapshot and the timezone table, plain file reads kept off the loop
+    snapshot_values, timezone_offsets = await asyncio.gather(
+        asyncio.to_thread(sheets_manager.load_snapshot),
+        asyncio.to_thread(sheets_manager.load_timezones_from_txt)
+    )
+    if snapshot_values:
+        sheets_manager.load_points_from_spreadsheet(user_points, snapshot_values)
+    commands_handler.timezone_offsets = timezone_offsets
+    readiness.mark_ready("caches")
+
+async def connect_sheets():
+    # Keep retrying through a Sheets outage instead of crashing at boot
+    delay = SHEETS_CONNECT_RETRY_SECONDS
+    while not await asyncio.to_thread(sheets_manager.connect):
+        metrics.increment("startup.sheets_connect_retries")
+        log.info(f"Retrying Google Sheets connection in {delay}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, SHEETS_CONNECT_MAX_RETRY_SECONDS)
+    readiness.mark_ready("sheets")
+
+async def start_background_jobs():
+    # Everything that reads or writes the sheet starts once it is reachable and the snapshot is in
+    await readiness.wait("caches")
+    await readiness.wait("sheets")
+
+    # Reconcile points and the roster with the live sheet without holding up the jobs
+    asyncio.create_task(refresh_roster_from_sheet())
+
+    while deferred_threads:
+        await on_thread_create(deferred_threads.pop(0))
+
+    await run_journal_maintenance()
+    await refresh_loa_state()
+    setup_scheduled_jobs()
+    scheduler.start()
+    loa_expiry.start()
 
-        if last_row_count == 0:
-            last_row_count = current_rows
-            return
+    if not check_for_new_entries.is_running():
+        check_for_new_entries.start()
 
-        if current_rows > int(last_row_count):
-            channel = bot.get_channel(MR_SHEETS_NOTIFIER_ID)
-            if channel:
-                await channel.send(
-                    f"🔔 **New Ascension Form Entry!**\n"
-                    f"🔗 (<{MR_ASCENSION_SHEETS_URL}>)",
-                )
-            last_row_count = current_rows
+    # Join forum threads
+    await join_forum_threads()
+    readiness.mark_ready("jobs")
+
+async def refresh_roster_from_sheet():
+    started = time.perf_counter()
+    try:
+        changed = await asyncio.to_thread(sheets_manager.refresh_from_sheet, user_points)
+        elapsed = time.perf_counter() - started
+        metrics.observe("startup.roster_refresh", elapsed)
+        log.info(f"Roster refreshed from the sheet in {elapsed:.2f}s, {changed} rows differed from the snapshot")
     except Exception as e:
-        print(f"Error checking for new entries: {e}")
+        log.error(f"Error refreshing roster from the sheet: {e}")
+
+@bot.listen("on_interaction")
+async def record_first_command(interaction):
+    # How long after start the bot could answer its first command
+    global first_command_seen
+    if first_command_seen:
+        return
+    first_command_seen = True
+    elapsed = time.perf_counter() - startup_started
+    metrics.set_gauge("startup.time_to_first_command", round(elapsed, 2))
+    log.info(f"First command {elapsed:.2f}s after startup")
 
 @bot.event
 async def on_ready():
-    print(f'Logged in as {bot.user}')
-    print('Bot is ready to update the Google Sheet.')
-    
-    # Load points from spreadsheet
-    sheets_manager.load_points_from_spreadsheet(user_points)
+    log.info(f'Logged in as {bot.user}')
+    log.info('Bot is ready to update the Google Sheet.')
     
-    # Setup commands
+    # Setup commands, synced to the server only when their definitions changed
     commands_handler.setup_commands()
+    try:
+        await command_sync.sync()
+    except Exception as e:
+        log.error(f"Error syncing slash commands: {e}")
 
-    if not check_for_new_entries.is_running():
-        check_for_new_entries.start()
-    
-    # Join forum threads
-    await join_forum_threads()
+    work_queue.start()
+
+    # on_ready fires again on reconnects, the jobs only start once
+    global background_jobs
+    if background_jobs is None:
+        background_jobs = asyncio.create_task(start_background_jobs())
 
 @bot.event
 async def on_thread_create(thread):
@@ -103,22 +288,33 @@ async def on_thread_create(thread):
         return
     
     if thread.parent_id == FORUM_CHANNEL_ID:
+        remember_thread_starter(thread.id, thread.id)
         username = thread.name
+        if not await readiness.wait("sheets", READINESS_WAIT_SECONDS):
+            # Handled by start_background_jobs once the sheet is up, instead of piling up here
+            deferred_threads.append(thread)
+            metrics.increment("startup.deferred_threads")
+            return
         
-        # Check if user exists in spreadsheet
-        if not sheets_manager.user_exists(username):
-            print(f"New user detected: {username}. Creating spreadsheet entry.")
+        # Check if user exists in spreadsheet, and find their row, in one read off the event loop
+        exists, row = await asyncio.to_thread(sheets_manager.find_thread_owner, username, thread.owner_id)
+        if not exists:
+            log.info(f"New user detected: {username}. Creating spreadsheet entry.")
             
             # Get squadron from thread owner's roles
             squadron = get_squadron_from_roles(thread.owner)
             
             # Create new user entry in spreadsheet
-            success = sheets_manager.create_new_user_entry(username, str(thread.owner.id), squadron)
+            success = await asyncio.to_thread(sheets_manager.create_new_user_entry, username, str(thread.owner.id), squadron)
             
             if success:
-                print(f"Successfully created entry for {username}")
+                log.info(f"Successfully created entry for {username}")
+                thread_bindings.bind(thread.id, thread.owner_id, success)
             else:
-                print(f"Failed to create entry for {username}")
+                log.error(f"Failed to create entry for {username}")
+        elif row:
+            # Existing member opening a new post, bind it to their current row
+            thread_bindings.bind(thread.id, thread.owner_id, row)
         
         # Send welcome message
         message_content = (
@@ -139,6 +335,17 @@ async def on_thread_create(thread):
             "• Don't try log in any other way, it will NOT be accepted otherwise"
         )
         await thread.send(message_content)
+        forum_threads.mark_joined(thread)
+
+@bot.event
+async def on_thread_update(before, after):
+    # Join archived forum posts once they're reopened
+    await forum_threads.on_thread_update(before, after)
+
+@bot.event
+async def on_raw_thread_delete(payload):
+    # A deleted post never gets another message
+    thread_starter_ids.pop(payload.thread_id, None)
 
 @bot.event
 async def on_message(message):
@@ -148,32 +355,42 @@ async def on_message(message):
     
     if message.guild and message.guild.id != SERVER_ID:
         return
-        
+
+    # LOA requests are approved by reaction later, keep them handy
+    if message.channel.id == LOA_CHANNEL_ID:
+        message_cache.put(message)
+
     # Handles image proofs for activity logs
     if  (hasattr(message.channel, 'parent_id') and 
         message.channel.parent_id == FORUM_CHANNEL_ID and
         message.attachments):
         
         # Debug logging
-        print(f"[DEBUG] Image received from {message.author.name}")
-        print(f"[DEBUG] Pending proof users: {list(pending_proof.keys())}")
+        proof_log.debug("Image received from %s", message.author.name)
+        proof_log.debug("Pending proof users: %s", pending_proof.keys())
         
         if message.author.id not in pending_proof:
-            print(f"[DEBUG] User {message.author.id} not in pending_proof - ignoring image")
+            proof_log.debug("User %s not in pending_proof - ignoring image", message.author.id)
+            return
+
+        # The log is written in the member's timezone, from the table loaded at startup
+        if not await readiness.wait("caches", READINESS_WAIT_SECONDS):
+            metrics.increment("startup.dropped_messages")
+            proof_log.warning(f"Timezone table not loaded, ignoring proof {message.id} (the session is kept, it can be posted again)")
             return
         
         try:
             session_data = pending_proof.pop(message.author.id)
-            print(f"[DEBUG] Processing proof for {message.author.name}")
+            proof_log.debug("Processing proof for %s", message.author.name)
         except KeyError:
-            print(f"[DEBUG ERROR] User {message.author.id} was in pending_proof but pop()")
+            proof_log.error("User %s was in pending_proof but pop()", message.author.id)
             await message.reply(
                 "⚠️ **Error:** Could not find your clock-out session.\n",
                 mention_author=False
             )
             return
         except Exception as e:
-            print(f"[PROOF ERROR] Unexpected error getting session data: {e}")
+            proof_log.error(f"Unexpected error getting session data: {e}")
             await message.reply(
                 "❌ **Error:** Something went wrong retrieving your session data.\n",
                 mention_author=False
@@ -202,7 +419,7 @@ async def on_message(message):
                 start_time_str = start_local.strftime("%H:%M")
                 end_time_str = end_local.strftime("%H:%M")
             else:
-                print(f"[PROOF ERROR] Could not parse timezone: {user_tz_str}")
+                proof_log.error(f"Could not parse timezone: {user_tz_str}")
                 await message.reply(
                     "❌ **Error:** Invalid timezone in your session.\n"
                     "Please tell foxhole",
@@ -228,17 +445,24 @@ async def on_message(message):
             log_message += f"**Proof of Activity:**"
 
 
-            files_to_send = []
-            for attachment in message.attachments:
-                try:
-                    file = await attachment.to_file()
-                    files_to_send.append(file)
-                except Exception as e:
-                    # Log error but continue
-                    print(f"[PROOF ERROR] Error downloading attachment: {e}") 
+            if proof_pipeline.mode == "link":
+                # No download: keep the original post (its attachments back the embeds) and link to it
+                posted_message = await message.channel.send(
+                    content=log_message,
+                    embeds=proof_pipeline.build_embeds(message)
+                )
+                message_cache.put(posted_message)
+                proof_log.info(f"Posted linked log for {message.author.name}")
+                asyncio.create_task(check_linked_proof(message.attachments, posted_message, message.author.id))
+                return
+
+            # Fetch every attachment at once, capped per file and in total
+            files_to_send, proof_errors = await proof_pipeline.download(message.attachments)
+            for error in proof_errors:
+                proof_log.error(f"Error downloading attachment: {error}")
                 
             if not files_to_send:
-                print(f"[PROOF ERROR] No files could be downloaded from attachments")
+                proof_log.error("No files could be downloaded from attachments")
                 await message.reply(
                     "❌ **Error:** Could not process your image attachments.\n"
                     "Please try sending them again.",
@@ -246,27 +470,33 @@ async def on_message(message):
                 )
                 return
                 
-            image_urls = [attachment.url for attachment in message.attachments]
-
-            # Delete the original message
             try:
-                await message.delete()
-            except Exception as e:
-                print(f"[PROOF WARNING] Could not delete original message: {e}")
-                # Continue anyway - not critical
-                
-            # Post the formatted log with the image
-            posted_message = await message.channel.send(
-                content=log_message,
-                files=files_to_send
-            )
-            
-            print(f"[PROOF SUCCESS] Posted formatted log for {message.author.name}")
+                proof_hashes = await asyncio.to_thread(proof_hash_index.hash_files, files_to_send)
+
+                # Delete the original message
+                try:
+                    await message.delete()
+                except Exception as e:
+                    proof_log.warning(f"Could not delete original message: {e}")
+                    # Continue anyway - not critical
+                    
+                # Post the formatted log with the image
+                posted_message = await message.channel.send(
+                    content=log_message,
+                    files=files_to_send
+                )
+            finally:
+                # Close the spooled temp files ourselves, even if the upload failed
+                proof_pipeline.release(files_to_send)
+            message_cache.put(posted_message)
             
-            files_to_send.clear()
+            proof_log.info(f"Posted formatted log for {message.author.name}")
+
+            # The log is flagged afterwards if it's a reused image
+            asyncio.create_task(flag_reused_proof(posted_message, proof_hashes, message.author.id))
 
         except Exception as e:
-            print(f"[PROOF ERROR] Failed to process proof image: {e}")
+            proof_log.error(f"Failed to process proof image: {e}")
             import traceback
             traceback.print_exc()
             await message.reply(
@@ -280,21 +510,52 @@ async def on_message(message):
 
         return  
     
-    # Handle activity logs in forum channel
-    if (hasattr(message.channel, 'parent_id') and 
-        message.channel.parent_id == FORUM_CHANNEL_ID and 
-        "Total time:" in message.content):
-        
-        # Skip the first message to avoid this sending if someone puts format in description
-        messages = [msg async for msg in message.channel.history(limit=2, oldest_first=True)]
-        if len(messages) > 0 and messages[0].id == message.id:
-            # This is the first message, ignore it
-            return
+    # Handle activity logs in forum channel, parsed once for every field
+    if hasattr(message.channel, 'parent_id') and message.channel.parent_id == FORUM_CHANNEL_ID:
+        parsed = parse_message(message.content)
+        if parsed.mentions_total_time:
         
-        await activity_handler.process_activity_log(message)
+            # Skip the first message to avoid this sending if someone puts format in description
+            if is_thread_starter(message):
+                # This is the first message, ignore it
+                return
+            
+            message_cache.put(message)
+            await activity_handler.process_activity_log(message, parsed)
     
     await bot.process_commands(message)
 
+async def flag_reused_proof(posted_message, proof_hashes, user_id):
+    # Warn on the posted log when its proof matches an earlier one
+    try:
+        matches = proof_hash_index.check_and_record(proof_hashes, posted_message, user_id)
+        if not matches:
+            return
+
+        links = "\n".join(
+            f"• {match['jump_url']} (by <@{match['user_id']}>)" for match in matches[:5]
+        )
+        edited = await posted_message.edit(
+            content=f"{posted_message.content}\n\n⚠️ **Possible reused proof** - matches earlier log(s):\n{links}",
+            allowed_mentions=discord.AllowedMentions.none()
+        )
+        message_cache.put(edited or posted_message)
+        proof_log.warning(f"Possible reused proof in {posted_message.jump_url}")
+    except Exception as e:
+        proof_log.warning(f"Could not check proof for reuse: {e}")
+
+async def check_linked_proof(attachments, posted_message, user_id):
+    # Link mode never downloads for the post itself, so fetch the images here just for hashing
+    if not proof_hash_index.enabled:
+        return
+
+    files, errors = await proof_pipeline.download(attachments)
+    try:
+        proof_hashes = await asyncio.to_thread(proof_hash_index.hash_files, files)
+    finally:
+        proof_pipeline.release(files)
+    await flag_reused_proof(posted_message, proof_hashes, user_id)
+
 @bot.event  
 async def on_raw_reaction_add(payload):
     # Handle reactions to messages (works for both cached and uncached messages)
@@ -303,72 +564,95 @@ async def on_raw_reaction_add(payload):
     
     if payload.guild_id != SERVER_ID:
         return
-    
-    # Handle deployment reactions
-    if payload.channel_id == DEPLOYMENT_ID and str(payload.emoji) == "✅":
-        try:
-            channel = bot.get_channel(payload.channel_id)
-            message = await channel.fetch_message(payload.message_id)
-            
-            # Check if this is a deployment message (contains "Commander" and "Operatives")
-            if "**Commander**" in message.content and "**Operatives**" in message.content:
-                await update_deployment_board(message, payload.user_id)
-        except Exception as e:
-            print(f"Error processing deployment reaction: {e}")
 
-    # Get the channel and check if it's LOA channel
-    if payload.channel_id == LOA_CHANNEL_ID and str(payload.emoji) == "✅":
-        try:
-            # Get the channel and message
-            channel = bot.get_channel(payload.channel_id)
-            message = await channel.fetch_message(payload.message_id)
-            
-            # Process LOA approval (no format checking, just use Discord ID)
-            await loa_handler.process_loa_approval(message)
-        
-        except Exception as e:
-            print(f"Error processing LOA reaction: {e}")
-    
-    # Check if reaction is in forum channel for activity logs
+    # Every handler only acts on approvals
+    if str(payload.emoji) != "✅":
+        return
+
+    # Route by channel, or by parent for forum threads, to exactly one handler
+    channel = bot.get_channel(payload.channel_id)
+    route_id = payload.channel_id if payload.channel_id in reaction_routes else getattr(channel, 'parent_id', None)
+    handler = reaction_routes.get(route_id)
+    if not handler or not channel:
+        return
+
     try:
-        # Get the channel to check if it's a forum thread
-        channel = bot.get_channel(payload.channel_id)
-        
-        if (hasattr(channel, 'parent_id') and 
-            channel.parent_id == FORUM_CHANNEL_ID and 
-            str(payload.emoji) == "✅"):
-            
-            # Fetch the message to check its content
-            message = await channel.fetch_message(payload.message_id)
-            
-            if "Total time:" in message.content:
-                # Process the approval
-                await activity_handler.process_activity_approval(message)
-                
+        await handler(payload, channel)
     except Exception as e:
-        print(f"Error processing activity reaction: {e}")
+        log.error(f"Error processing reaction in channel {payload.channel_id}: {e}")
+
+async def sheet_ready_for(payload):
+    # Approvals made during startup wait briefly for the sheet; the reaction can be re-added later
+    if await readiness.wait("sheets", READINESS_WAIT_SECONDS):
+        return True
+    metrics.increment("startup.dropped_reactions")
+    log.warning(f"Sheet not ready, ignoring reaction on message {payload.message_id}")
+    return False
+
+async def handle_deployment_reaction(payload, channel):
+    message = await message_cache.get_or_fetch(channel, payload.message_id)
+    
+    # Check if this is a deployment message (contains "Commander" and "Operatives")
+    if parse_message(message.content).is_deployment_board:
+        await update_deployment_board(message, payload.user_id)
+
+async def handle_loa_reaction(payload, channel):
+    # Already approved (by reaction or /loabulk) costs nothing
+    if loa_approvals.is_processed(payload.message_id):
+        return
+    if not await sheet_ready_for(payload):
+        return
+
+    message = await message_cache.get_or_fetch(channel, payload.message_id)
+    
+    # Process LOA approval (no format checking, just use Discord ID)
+    work_queue.submit(message.author.id, lambda: loa_handler.process_loa_approval(message), "loa approval")
+
+async def handle_activity_reaction(payload, channel):
+    # Already approved logs cost no fetch and no Sheets calls
+    if approval_index.is_processed(payload.message_id):
+        return
+    if not await sheet_ready_for(payload):
+        return
+    
+    # Get the message to check its content
+    message = await message_cache.get_or_fetch(channel, payload.message_id)
+    
+    if parse_message(message.content).mentions_total_time:
+        # Process the approval in the thread owner's queue
+        member_key = channel.owner_id or channel.id
+        work_queue.submit(member_key, lambda: activity_handler.process_activity_approval(message), "activity approval")
+
+# Channel (or forum parent) ID -> reaction handler
+reaction_routes = {
+    DEPLOYMENT_ID: handle_deployment_reaction,
+    LOA_CHANNEL_ID: handle_loa_reaction,
+    FORUM_CHANNEL_ID: handle_activity_reaction,
+}
+
+@bot.event
+async def on_raw_message_delete(payload):
+    # Deleted messages must not be served from the cache
+    message_cache.discard(payload.message_id)
 
 
 async def join_forum_threads():
     # Join all existing threads in the forum channel
     try:
-        # Sync slash commands
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} command(s)")
-
-        # Find the channel
-        forum_channel = bot.get_channel(FORUM_CHANNEL_ID)
-        if not forum_channel:
-            print(f"Could not find a channel with ID {FORUM_CHANNEL_ID}")
-            return
-
-        # Loop through all posts in the channel
-        for thread in forum_channel.threads:
-            if bot.user not in thread.members:
-                await thread.join()
-                print(f"Joined thread: {thread.name}")
+        # Active and archived posts, joined concurrently and only once per process
+        await forum_threads.sync()
+
+        # Bind any forum post we haven't seen before to its owner's roster row
+        unbound = [
+            (thread_id, owner_id) for thread_id, owner_id in forum_threads.known_threads.items()
+            if not thread_bindings.get(thread_id)
+        ]
+        if unbound:
+            row_index = await asyncio.to_thread(sheets_manager.get_discord_row_index)
+            bound = thread_bindings.backfill(unbound, row_index)
+            log.info(f"Backfilled {bound} thread bindings")
     except Exception as e:
-        print(f"An error occurred while joining threads: {e}")
+        log.error(f"An error occurred while joining threads: {e}")
 
 async def find_username_in_title(title, usernames):
     # Helper function to find username in thread title
@@ -389,15 +673,7 @@ async def update_deployment_board(message, user_id):
         
         lines = message.content.split('\n')
         
-        operatives_idx = None
-        react_line_idx = None
-        
-        for i, line in enumerate(lines):
-            if line.strip() == "**Operatives**":
-                operatives_idx = i
-            if "React to join" in line or "React with" in line:
-                react_line_idx = i
-                break
+        operatives_idx, react_line_idx = find_board_lines(lines)
         
         if operatives_idx is None or react_line_idx is None:
             return
@@ -414,14 +690,25 @@ async def update_deployment_board(message, user_id):
         
         new_content = '\n'.join(lines)
         
-        # Update the message
-        await message.edit(
+        # Update the message and keep the cached copy current
+        edited = await message.edit(
             content=new_content, 
             allowed_mentions=discord.AllowedMentions(roles=True, users=False)
         )
+        message_cache.put(edited or message)
         
     except Exception as e:
-        print(f"Error updating deployment board: {e}")
+        log.error(f"Error updating deployment board: {e}")
+
+async def main():
+    # The Discord login, the Sheets client and the local caches come up side by side
+    async with bot:
+        loop_watchdog.start()
+        startup_tasks.append(asyncio.create_task(load_local_caches()))
+        startup_tasks.append(asyncio.create_task(connect_sheets()))
+        await bot.start(DISCORD_TOKEN)
 
 if __name__ == "__main__":
-    bot.run(DISCORD_TOKEN)
\ No newline at end of file
+    metrics.set_gauge("startup.import_time", round(import_seconds, 2))
+    log.info(f"Modules imported in {import_seconds:.2f}s")
+    asyncio.run(main())
\ No newline at end of file
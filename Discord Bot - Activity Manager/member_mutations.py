@@ -0,0 +1,135 @@
+# member_mutations.py - Merges role and nickname changes for a member into one member.edit call
+
+import asyncio
+import discord
+from metrics import metrics
+from bot_logging import get_logger
+
+log = get_logger("roles")
+
+UNCHANGED = object()
+
+class PendingEdit:
+    __slots__ = ("member", "roles", "nick", "futures", "requested")
+
+    def __init__(self, member):
+        self.member = member
+        self.roles = {}        # role ID -> (role, should have it), last change wins
+        self.nick = UNCHANGED
+        self.futures = []      # (future, has role changes, has a nickname change)
+        self.requested = 0     # REST calls the separate add_roles/remove_roles/edit would have made
+
+class MemberMutationQueue:
+    def __init__(self, window=0.75):
+        self.window = window
+        self.pending = {}
+        self.flushes = set()
+
+    def add_roles(self, member, *roles):
+        return self.stage(member, add=roles)
+
+    def remove_roles(self, member, *roles):
+        return self.stage(member, remove=roles)
+
+    def set_nick(self, member, nick):
+        return self.stage(member, nick=nick)
+
+    def stage(self, member, add=(), remove=(), nick=UNCHANGED):
+        # Queue changes for a member and return a future that resolves once they are on Discord
+        edit = self.pending.get(member.id)
+        if edit is None:
+            edit = self.pending[member.id] = PendingEdit(member)
+            asyncio.get_running_loop().call_later(self.window, self._start_flush, member.id)
+
+        for role in add:
+            edit.roles[role.id] = (role, True)
+        for role in remove:
+            edit.roles[role.id] = (role, False)
+        if nick is not UNCHANGED:
+            edit.nick = nick
+        edit.requested += bool(add) + bool(remove) + (nick is not UNCHANGED)
+
+        future = asyncio.get_running_loop().create_future()
+        edit.futures.append((future, bool(add or remove), nick is not UNCHANGED))
+        return future
+
+    def _start_flush(self, member_id):
+        task = asyncio.create_task(self._flush(member_id))
+        self.flushes.add(task)
+        task.add_done_callback(self.flushes.discard)
+
+    async def _flush(self, member_id):
+        edit = self.pending.pop(member_id, None)
+        if edit is None:
+            return
+
+        # Work from the freshest cached copy so changes made elsewhere aren't undone
+        member = edit.member.guild.get_member(member_id) or edit.member
+        current = {role.id: role for role in member.roles if not role.is_default()}
+        wanted = dict(current)
+        for role_id, (role, keep) in edit.roles.items():
+            if keep:
+                wanted[role_id] = role
+            else:
+                wanted.pop(role_id, None)
+
+        changes = {}
+        if wanted.keys() != current.keys():
+            changes["roles"] = list(wanted.values())
+        if edit.nick is not UNCHANGED and edit.nick != member.nick:
+            changes["nick"] = edit.nick
+
+        metrics.increment("member_edits.requested", edit.requested)
+        metrics.increment("member_edits.calls_saved", edit.requested - bool(changes))
+
+        role_error = nick_error = None
+        try:
+            if changes:
+                await self._edit_with_retry(member, changes)
+                metrics.increment("member_edits.calls")
+        except Exception as e:
+            if len(changes) == 1:
+                role_error = nick_error = e
+            else:
+                # One half can fail on its own (a nick on a higher ranked member is Forbidden),
+                # so don't let it take the other down: send them separately
+                log.warning(f"Combined edit for {member.display_name} failed, retrying roles and nickname separately: {e}")
+                role_error = await self._edit_or_error(member, {"roles": changes["roles"]})
+                nick_error = await self._edit_or_error(member, {"nick": changes["nick"]})
+
+        if role_error or nick_error:
+            log.error(f"Error updating {member.display_name}: {role_error or nick_error}")
+            metrics.increment("member_edits.failed")
+
+        for future, has_roles, has_nick in edit.futures:
+            if future.done():
+                continue
+            error = (has_roles and role_error) or (has_nick and nick_error)
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(True)
+
+    async def _edit_or_error(self, member, changes):
+        try:
+            await self._edit_with_retry(member, changes)
+            metrics.increment("member_edits.calls")
+            return None
+        except Exception as e:
+            return e
+
+    @staticmethod
+    async def _edit_with_retry(member, changes):
+        # discord.py already waits on the per-route bucket headers, this handles 429s it gives back
+        for attempt in range(3):
+            try:
+                return await member.edit(**changes)
+            except discord.RateLimited as e:
+                metrics.increment("member_edits.rate_limited")
+                await asyncio.sleep(e.retry_after)
+            except discord.HTTPException as e:
+                if e.status != 429 or attempt == 2:
+                    raise
+                metrics.increment("member_edits.rate_limited")
+                await asyncio.sleep(2 ** attempt)
+        raise RuntimeError("still rate limited after 3 attempts")
@@ -0,0 +1,43 @@
+# message_cache.py - Bounded LRU of recently seen messages the reaction handlers care about
+
+import time
+from collections import OrderedDict
+from metrics import metrics
+
+class MessageCache:
+    def __init__(self, max_size=500):
+        self.max_size = max_size
+        self.messages = OrderedDict()
+
+    def put(self, message):
+        # Remember a log post, LOA request or deployment board
+        if message is None:
+            return
+        self.messages[message.id] = message
+        self.messages.move_to_end(message.id)
+        while len(self.messages) > self.max_size:
+            self.messages.popitem(last=False)
+
+    def get(self, message_id):
+        message = self.messages.get(message_id)
+        if message is not None:
+            self.messages.move_to_end(message_id)
+        return message
+
+    def discard(self, message_id):
+        self.messages.pop(message_id, None)
+
+    async def get_or_fetch(self, channel, message_id):
+        # Serve from the cache and only go over REST on a miss
+        message = self.get(message_id)
+        if message is not None:
+            metrics.increment("message_cache.hit")
+            return message
+
+        metrics.increment("message_cache.miss")
+        started = time.perf_counter()
+        message = await channel.fetch_message(message_id)
+        metrics.observe("rest.fetch_message", time.perf_counter() - started)
+
+        self.put(message)
+        return message
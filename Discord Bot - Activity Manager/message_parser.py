@@ -0,0 +1,107 @@
+# message_parser.py - Shared precompiled parser for activity logs, LOA requests and deployment boards
+
+import re
+
+# One scan over the message picks up every field we care about.
+# Field values are read in a lookahead so dates inside a note are still seen.
+# Every branch starts with a plain literal and there is no global IGNORECASE, which lets
+# the regex engine jump straight between "*", "T", "E" and "e" instead of trying every character.
+TOKEN_PATTERN = re.compile(
+    r"\*\*(?P<label>(?i:Start time|End time|Total time|Note)):\*\*(?=[ \t]*(?P<value>[^\r\n]*))"
+    r"|\*\*(?P<section>Commander|Operatives)\*\*"
+    r"|Total time:(?P<plain_total>)"
+    r"|E[Nn][Dd][Ss]?:\s*(?P<date>\d{1,2}/\d{1,2}/\d{2,4})"
+    r"|e[Nn][Dd][Ss]?:\s*(?P<date_lower>\d{1,2}/\d{1,2}/\d{2,4})"
+)
+
+# "x hours xx mins", "x hour(s)" or "xx mins", right after **Total time:**
+TOTAL_TIME_PATTERN = re.compile(
+    r"\s*(?:(?P<hours>\d+)\s*hours?(?:\s*(?P<mins>\d{1,2})\s*mins?)?|(?P<only_mins>\d{1,2})\s*mins?)",
+    re.IGNORECASE
+)
+
+LABEL_END = len(":**")
+
+class ParsedMessage:
+    __slots__ = ("total_time", "mentions_total_time", "start_time", "end_time", "note",
+                 "loa_end_date", "has_commander", "has_operatives")
+
+    def __init__(self):
+        self.total_time = None           # (hours, mins)
+        self.mentions_total_time = False # Plain "Total time:" anywhere, same as the old substring check
+        self.start_time = None
+        self.end_time = None
+        self.note = None
+        self.loa_end_date = None         # Raw "dd/mm/yyyy" as written
+        self.has_commander = False
+        self.has_operatives = False
+
+    @property
+    def is_deployment_board(self):
+        return self.has_commander and self.has_operatives
+
+def parse_message(content):
+    # Extract every known field from a message in a single pass
+    parsed = ParsedMessage()
+    if not content:
+        return parsed
+
+    for match in TOKEN_PATTERN.finditer(content):
+        # The last group to close tells us which alternative matched
+        kind = match.lastgroup
+
+        if kind == "value":
+            label = match.group("label")
+            key = label.lower()
+            if key == "total time":
+                if label == "Total time":
+                    parsed.mentions_total_time = True
+                if parsed.total_time is None:
+                    parsed.total_time = parse_total_time(content, match.end("label") + LABEL_END)
+            elif key == "start time":
+                if parsed.start_time is None:
+                    parsed.start_time = match.group("value").strip()
+            elif key == "end time":
+                if parsed.end_time is None:
+                    parsed.end_time = match.group("value").strip()
+            elif parsed.note is None:
+                parsed.note = match.group("value").strip()
+
+        elif kind == "plain_total":
+            parsed.mentions_total_time = True
+
+        elif kind == "date" or kind == "date_lower":
+            if parsed.loa_end_date is None:
+                parsed.loa_end_date = match.group(kind)
+
+        elif match.group("section") == "Commander":
+            parsed.has_commander = True
+        else:
+            parsed.has_operatives = True
+
+    return parsed
+
+def parse_total_time(content, pos):
+    # (hours, mins) for the text right after **Total time:**, None if it doesn't fit
+    match = TOTAL_TIME_PATTERN.match(content, pos)
+    if not match:
+        return None
+
+    if match.group("hours") is not None:
+        mins = match.group("mins")
+        return (int(match.group("hours")), int(mins) if mins is not None else 0)
+    return (0, int(match.group("only_mins")))
+
+def find_board_lines(lines):
+    # Index of the "**Operatives**" line and of the "React to join" line on a deployment board
+    operatives_idx = None
+    react_line_idx = None
+
+    for i, line in enumerate(lines):
+        if line.strip() == "**Operatives**":
+            operatives_idx = i
+        if "React to join" in line or "React with" in line:
+            react_line_idx = i
+            break
+
+    return operatives_idx, react_line_idx
@@ -0,0 +1,65 @@
+# metrics.py - In-process counters, gauges and timings shown by /stats
+
+from collections import defaultdict, deque
+
+class Metrics:
+    def __init__(self, window=500):
+        self.counters = defaultdict(int)
+        self.gauges = {}
+        # Only the most recent samples are kept so memory stays flat
+        self.timings = defaultdict(lambda: deque(maxlen=window))
+
+    def increment(self, name, amount=1):
+        self.counters[name] += amount
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def observe(self, name, seconds):
+        self.timings[name].append(seconds)
+
+    def timing_summary(self, name):
+        # Count, average, p50, p95 and max of the recent samples, in seconds
+        samples = sorted(self.timings.get(name, ()))
+        if not samples:
+            return None
+
+        count = len(samples)
+        return {
+            "count": count,
+            "avg": sum(samples) / count,
+            "p50": samples[count // 2],
+            "p95": samples[min(count - 1, int(count * 0.95))],
+            "max": samples[-1]
+        }
+
+    def snapshot(self):
+        return {
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "timings": {name: self.timing_summary(name) for name in list(self.timings)}
+        }
+
+    def format_report(self):
+        # Plain text block for Discord
+        snap = self.snapshot()
+        lines = []
+
+        for name, value in sorted(snap["gauges"].items()):
+            lines.append(f"{name}: {value}")
+
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"{name}: {value}")
+
+        for name, summary in sorted(snap["timings"].items()):
+            if not summary:
+                continue
+            lines.append(
+                f"{name}: n={summary['count']} avg={summary['avg'] * 1000:.1f}ms "
+                f"p95={summary['p95'] * 1000:.1f}ms max={summary['max'] * 1000:.1f}ms"
+            )
+
+        return "\n".join(lines) if lines else "No metrics recorded yet"
+
+# Shared instance used by every module
+metrics = Metrics()
@@ -0,0 +1,99 @@
+# mr_notifier.py - Announces new MR Ascension form submissions
+
+import asyncio
+from config import *
+from local_store import load_json, save_json
+from bot_logging import get_logger
+
+log = get_logger("mr_notifier")
+
+class AscensionNotifier:
+    def __init__(self, bot, sheets_manager, filename=MR_NOTIFIER_STATE_FILE):
+        self.bot = bot
+        self.sheets_manager = sheets_manager
+        self.filename = filename
+
+        # Worksheet handle is opened once and reused between polls
+        self.worksheet = None
+
+        # Rows already announced, kept on disk so a restart doesn't re-baseline
+        self.watermark = load_json(filename, {}).get("row_count")
+        self.idle_polls = 0
+
+    def _get_worksheet(self):
+        if self.worksheet is None:
+            spreadsheet = self.sheets_manager.client.open_by_url(MR_ASCENSION_URL)
+            self.worksheet = spreadsheet.worksheet(MR_ASCENSION_WORKSHEET)
+        return self.worksheet
+
+    def _read_new_rows(self):
+        # Only rows past the watermark, read in bounded chunks
+        worksheet = self._get_worksheet()
+
+        if self.watermark is None:
+            # First run ever, baseline on the current size
+            return len(worksheet.col_values(1)), []
+
+        rows = []
+        start = self.watermark + 1
+        while True:
+            end = start + MR_NOTIFIER_READ_ROWS - 1
+            values = worksheet.get(f"A{start}:A{end}")
+            rows.extend(values)
+            if len(values) < MR_NOTIFIER_READ_ROWS:
+                break
+            start = end + 1
+
+        return self.watermark + len(rows), rows
+
+    async def poll(self):
+        # Check once and return how many minutes to wait before the next check
+        try:
+            row_count, new_rows = await asyncio.to_thread(self._read_new_rows)
+        except Exception as e:
+            log.error(f"Error checking for new entries: {e}")
+            # Reopen the worksheet next time in case the handle went stale
+            self.worksheet = None
+            return self._next_interval(idle=True)
+
+        if self.watermark is None:
+            self._save(row_count)
+            return self._next_interval(idle=False)
+
+        if not new_rows:
+            return self._next_interval(idle=True)
+
+        channel = self.bot.get_channel(MR_SHEETS_NOTIFIER_ID)
+        if channel:
+            await channel.send(self._summary(new_rows))
+
+        # Only move the watermark once the entries were announced
+        self._save(row_count)
+        return self._next_interval(idle=False)
+
+    def _summary(self, new_rows):
+        # One message for everything that came in since the last poll
+        count = len(new_rows)
+        if count == 1:
+            header = "🔔 **New Ascension Form Entry!**"
+        else:
+            header = f"🔔 **{count} New Ascension Form Entries!**"
+
+        submitted = [row[0] for row in new_rows if row and row[0]][:10]
+        lines = [header]
+        lines.extend(f"• Submitted {timestamp}" for timestamp in submitted)
+        lines.append(f"🔗 (<{MR_ASCENSION_SHEETS_URL}>)")
+        return "\n".join(lines)
+
+    def _next_interval(self, idle):
+        # Double the wait while nothing changes, snap back to the minimum on activity
+        if not idle:
+            self.idle_polls = 0
+            return MR_NOTIFIER_MIN_MINUTES
+
+        self.idle_polls += 1
+        return min(MR_NOTIFIER_MAX_MINUTES, MR_NOTIFIER_MIN_MINUTES * 2 ** self.idle_polls)
+
+    def _save(self, row_count):
+        self.watermark = row_count
+        save_json(self.filename, {"row_count": row_count})
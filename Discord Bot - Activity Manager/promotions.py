@@ -0,0 +1,113 @@
+# promotions.py - One promotion rule table for eligibility checks, the roster Notes formula and auto-ranking
+
+import asyncio
+import time
+from config import *
+from metrics import metrics
+from bot_logging import get_logger
+
+log = get_logger("promotions")
+
+class PromotionTable:
+    def __init__(self, rules):
+        # current rank -> rule for the next step up
+        self.by_rank = {rule["from"]: rule for rule in rules}
+        self.automatic_ranks = {rule["to"] for rule in rules if rule["auto"]}
+        # Highest threshold first, the order IFS needs
+        self.by_points = sorted(rules, key=lambda rule: rule["points"], reverse=True)
+
+    def is_automatic(self, rank):
+        return rank in self.automatic_ranks
+
+    def next_step(self, points, current_rank):
+        # The single next promotion this rank and points allow, or None
+        rule = self.by_rank.get(current_rank)
+        if rule and points >= rule["points"]:
+            return rule
+        return None
+
+    def highest_automatic(self, points, current_rank):
+        # Follow automatic steps as far as the points go, so a backlog catches up in one promotion
+        target = None
+        rule = self.next_step(points, current_rank)
+        while rule and rule["auto"]:
+            target = rule["to"]
+            rule = self.next_step(points, target)
+        return target
+
+    def notes_formula(self, row):
+        # The roster's Notes column formula, generated from the same thresholds
+        points_cell = f"{chr(65 + POINTS_COLUMN)}{row}"
+        branches = "; ".join(f'{points_cell}>={rule["points"]};"{rule["note"]}"' for rule in self.by_points)
+        return f'=IFS({branches}; TRUE;"None")'
+
+    def evaluate_roster(self, roster):
+        # One pass over every roster entry -> [(user_data, target rank)] for automatic promotions
+        worklist = []
+        for user_data in roster:
+            target = self.highest_automatic(user_data['points'], user_data['rank'])
+            if target:
+                worklist.append((user_data, target))
+        return worklist
+
+promotion_table = PromotionTable(PROMOTION_RULES)
+
+class PromotionJob:
+    def __init__(self, bot, sheets_manager, role_manager, work_queue=None, table=promotion_table):
+        self.bot = bot
+        self.sheets_manager = sheets_manager
+        self.role_manager = role_manager
+        self.work_queue = work_queue
+        self.table = table
+        self.lock = asyncio.Lock()
+
+    async def run(self, payload=None):
+        # Promote everyone who has the points for an automatic rank, one sheet write for all of them
+        if self.lock.locked():
+            return 0
+
+        async with self.lock:
+            started = time.perf_counter()
+            guild = self.bot.get_guild(SERVER_ID)
+            if not guild:
+                return 0
+
+            roster = await asyncio.to_thread(self.sheets_manager.refresh_roster_index)
+            worklist = self.table.evaluate_roster(roster.values())
+            if not worklist:
+                return 0
+
+            promoted = []
+            for user_data, target in worklist:
+                member = guild.get_member(int(user_data['discord_id'])) if user_data['discord_id'].isdigit() else None
+                if member is None:
+                    continue
+                promoted.append((member, user_data, target))
+
+            # Roles and nicknames run in each member's queue slot (after any approval or /add already
+            # queued for them) and merge into one member edit; ranks are written together below
+            results = await asyncio.gather(
+                *(self._promote(member, target) for member, _, target in promoted),
+                return_exceptions=True
+            )
+            results = [result is True for result in results]
+
+            updates = [
+                {'row': user_data['row_index'], 'col': RANK_COLUMN, 'value': target}
+                for (member, user_data, target), ok in zip(promoted, results) if ok
+            ]
+            if updates and await asyncio.to_thread(self.sheets_manager.batch_update_cells, updates):
+                for (member, user_data, target), ok in zip(promoted, results):
+                    if ok:
+                        user_data['rank'] = target
+
+            metrics.increment("promotions.applied", len(updates))
+            metrics.observe("promotions.run", time.perf_counter() - started)
+            log.info(f"{len(worklist)} eligible, {len(updates)} promoted")
+            return len(updates)
+
+    def _promote(self, member, target):
+        job = lambda: self.role_manager.auto_rank(member, target, update_sheet=False)
+        if self.work_queue:
+            return self.work_queue.submit(member.id, job, description="promotion")
+        return job()
@@ -0,0 +1,148 @@
+# proof_hashes.py - Perceptual hashes of proof images to spot reused screenshots
+
+from datetime import datetime, timezone as tz
+from config import *
+from local_store import load_jsonl, append_jsonl
+from metrics import metrics
+from bot_logging import get_logger
+
+log = get_logger("proof")
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp')
+
+def make_thumbnail(fp, size=PROOF_HASH_THUMBNAIL_SIZE):
+    # Decode straight from the (possibly disk spooled) file in small reads, keeping only a tiny greyscale copy
+    with Image.open(fp) as image:
+        image.draft("L", (size, size))  # JPEGs decode at a reduced scale
+        small = image.convert("L")
+        small.thumbnail((size, size))
+        return small
+
+def compute_dhash(fp):
+    # 64-bit difference hash of an image file, from its thumbnail
+    small = make_thumbnail(fp).resize((9, 8), Image.LANCZOS)
+    pixels = list(small.getdata())
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+class BKTree:
+    # Metric tree over Hamming distance, so lookups skip most of the stored hashes
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, record):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [record], {}]
+            return
+
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(record)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [record], {}]
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        # Every stored record within max_distance of value, as (distance, record)
+        if self.root is None:
+            return []
+
+        matches = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                matches.extend((distance, record) for record in node[1])
+
+            # Triangle inequality: only children in this band can be close enough
+            low = distance - max_distance
+            high = distance + max_distance
+            for child_distance, child in node[2].items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+        return matches
+
+class ProofHashIndex:
+    def __init__(self, filename=PROOF_HASHES_FILE, max_distance=PROOF_HASH_MAX_DISTANCE):
+        self.filename = filename
+        self.max_distance = max_distance
+        self.enabled = Image is not None
+        self.tree = BKTree()
+
+        if not self.enabled:
+            log.warning("Pillow is not installed - proof reuse detection is disabled")
+            return
+
+        for record in load_jsonl(filename):
+            self.tree.add(int(record["hash"], 16), record)
+        log.info(f"Loaded {self.tree.size} proof hashes")
+
+    def hash_files(self, files):
+        # dHash of each image in discord.File objects, which are rewound for the upload
+        # Blocking (decodes images), so call it through asyncio.to_thread
+        hashes = []
+        if not self.enabled:
+            return hashes
+
+        for file in files:
+            if not (file.filename or "").lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            try:
+                hashes.append(compute_dhash(file.fp))
+            except Exception as e:
+                log.warning(f"Could not hash proof image {file.filename}: {e}")
+                metrics.increment("proof_hash.failed")
+            finally:
+                file.reset()
+        return hashes
+
+    def check_and_record(self, hashes, posted_message, user_id):
+        # Earlier proofs each hash matches, then index the new ones
+        if not self.enabled or not hashes:
+            return []
+
+        matches = []
+        seen_messages = set()
+        for value in hashes:
+            for distance, record in sorted(self.tree.search(value, self.max_distance), key=lambda match: match[0]):
+                if record["message_id"] == str(posted_message.id) or record["message_id"] in seen_messages:
+                    continue
+                seen_messages.add(record["message_id"])
+                matches.append(dict(record, distance=distance))
+
+            record = {
+                "hash": f"{value:016x}",
+                "message_id": str(posted_message.id),
+                "jump_url": posted_message.jump_url,
+                "user_id": str(user_id),
+                "recorded_at": datetime.now(tz.utc).isoformat()
+            }
+            self.tree.add(value, record)
+            append_jsonl(self.filename, record)
+            metrics.increment("proof_hash.indexed")
+
+        if matches:
+            metrics.increment("proof_hash.reuse_flagged")
+        return matches
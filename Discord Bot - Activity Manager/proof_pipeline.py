@@ -0,0 +1,106 @@
+# proof_pipeline.py - Concurrent, size-capped handling of proof attachments
+
+import asyncio
+import tempfile
+import time
+import aiohttp
+import discord
+from config import *
+from metrics import metrics
+
+class ProofPipeline:
+    def __init__(self, mode=PROOF_MODE, max_file_bytes=PROOF_MAX_FILE_BYTES, max_total_bytes=PROOF_MAX_TOTAL_BYTES,
+                 concurrency=PROOF_DOWNLOAD_CONCURRENCY, spool_bytes=PROOF_SPOOL_BYTES):
+        # "download" re-uploads the images, "link" embeds the original attachment URLs
+        self.mode = mode
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.spool_bytes = spool_bytes
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.session = None
+
+    def select_attachments(self, attachments):
+        # Drop anything over the per-file cap, then stop once the total budget is spent
+        accepted = []
+        rejected = []
+        total = 0
+
+        for attachment in attachments:
+            if attachment.size > self.max_file_bytes:
+                rejected.append(f"{attachment.filename} is larger than {self.max_file_bytes // (1024 * 1024)} MB")
+                continue
+            if total + attachment.size > self.max_total_bytes:
+                rejected.append(f"{attachment.filename} would go over the {self.max_total_bytes // (1024 * 1024)} MB total limit")
+                continue
+            total += attachment.size
+            accepted.append(attachment)
+
+        return accepted, rejected
+
+    async def download(self, attachments):
+        # Fetch attachments in parallel, returns (files, errors)
+        accepted, errors = self.select_attachments(attachments)
+        if not accepted:
+            return [], errors
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(self._fetch(attachment) for attachment in accepted), return_exceptions=True)
+        metrics.observe("proof.download", time.perf_counter() - started)
+
+        files = []
+        for attachment, result in zip(accepted, results):
+            if isinstance(result, Exception):
+                errors.append(f"{attachment.filename}: {result}")
+                metrics.increment("proof.download_failed")
+            else:
+                files.append(result)
+                metrics.increment("proof.bytes_downloaded", attachment.size)
+
+        return files, errors
+
+    def build_embeds(self, message):
+        # No download at all: point embeds at the original attachments (max 10 per message)
+        embeds = []
+        for attachment in message.attachments[:10]:
+            embed = discord.Embed(url=message.jump_url)
+            embed.set_image(url=attachment.url)
+            embeds.append(embed)
+        return embeds
+
+    def release(self, files):
+        # discord.File only closes files it opened itself, so the spools from download are closed here
+        for file in files:
+            file.close()
+            file.fp.close()
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    async def _get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+        return self.session
+
+    async def _fetch(self, attachment):
+        async with self.semaphore:
+            session = await self._get_session()
+
+            # Small images stay in memory, large ones roll over to a temp file on disk
+            spool = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+            try:
+                async with session.get(attachment.url) as response:
+                    response.raise_for_status()
+
+                    size = 0
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        size += len(chunk)
+                        if size > self.max_file_bytes:
+                            raise ValueError("file is larger than reported")
+                        spool.write(chunk)
+
+                spool.seek(0)
+                return discord.File(spool, filename=attachment.filename, spoiler=attachment.is_spoiler())
+            except Exception:
+                spool.close()
+                raise
@@ -0,0 +1,67 @@
+# readiness.py - Tracks which parts of startup are done so handlers can wait instead of failing
+
+import asyncio
+import time
+from metrics import metrics
+from bot_logging import get_logger
+
+log = get_logger("startup")
+
+class ReadinessGate:
+    def __init__(self, components, started=None):
+        self.components = list(components)
+        # component name -> event set once it is up, made on first use so they belong to the running loop
+        self.events = {}
+        self.ready_at = {}
+        self.started = started if started is not None else time.perf_counter()
+
+    def _event(self, name):
+        if name not in self.components:
+            raise KeyError(name)
+        if name not in self.events:
+            self.events[name] = asyncio.Event()
+        return self.events[name]
+
+    def mark_ready(self, name):
+        if self.is_ready(name):
+            return
+        elapsed = time.perf_counter() - self.started
+        self.ready_at[name] = elapsed
+        self._event(name).set()
+        metrics.set_gauge(f"startup.{name}_ready", round(elapsed, 2))
+        log.info(f"{name} ready after {elapsed:.2f}s")
+
+        if self.ready:
+            metrics.set_gauge("startup.time_to_ready", round(elapsed, 2))
+            log.info(f"Fully ready after {elapsed:.2f}s")
+
+    def is_ready(self, name):
+        return name in self.ready_at
+
+    @property
+    def ready(self):
+        return all(self.is_ready(name) for name in self.components)
+
+    async def wait(self, name, timeout=None):
+        # True once the component is up, False if it wasn't within timeout
+        if self.is_ready(name):
+            return True
+        try:
+            await asyncio.wait_for(self._event(name).wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def wait_all(self, names, timeout=None):
+        # True once every named component is up, False if they weren't all within timeout
+        waiting = [self._event(name).wait() for name in names if not self.is_ready(name)]
+        if not waiting:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.gather(*waiting), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def pending(self):
+        return [name for name in self.components if not self.is_ready(name)]
@@ -0,0 +1,186 @@
+# reconciler.py - Brings Discord rank roles, LOA roles and nicknames back in line with the roster
+
+import asyncio
+import time
+import discord
+from config import *
+from metrics import metrics
+from member_mutations import UNCHANGED
+from bot_logging import get_logger
+
+log = get_logger("reconcile")
+
+class MemberChange:
+    __slots__ = ("member", "username", "add_roles", "remove_roles", "nick")
+
+    def __init__(self, member, username):
+        self.member = member
+        self.username = username
+        self.add_roles = []
+        self.remove_roles = []
+        self.nick = None  # New nickname, None if it is already right
+
+    def __bool__(self):
+        return bool(self.add_roles or self.remove_roles or self.nick is not None)
+
+    def describe(self):
+        parts = []
+        if self.add_roles:
+            parts.append("+" + ", +".join(role.name for role in self.add_roles))
+        if self.remove_roles:
+            parts.append("-" + ", -".join(role.name for role in self.remove_roles))
+        if self.nick is not None:
+            parts.append(f"nick → {self.nick}")
+        return f"{self.username}: {'; '.join(parts)}"
+
+class RosterReconciler:
+    def __init__(self, bot, sheets_manager, role_manager, work_queue=None, edit_interval=RECONCILE_EDIT_INTERVAL):
+        self.bot = bot
+        self.sheets_manager = sheets_manager
+        self.role_manager = role_manager
+        self.work_queue = work_queue
+        self.edit_interval = edit_interval
+
+        # Only one pass at a time, whether from /reconcile or the scheduled job
+        self.lock = asyncio.Lock()
+        self.progress = None
+
+    async def plan(self, guild):
+        # Minimal role and nickname changes for every roster member in the server
+        roster = await asyncio.to_thread(self.sheets_manager.refresh_roster_index)
+        rank_roles = {rank: guild.get_role(role_id) for role_id, rank in self.role_manager.rank_role_ids.items()}
+        rank_role_ids = {role.id for role in rank_roles.values() if role}
+        loa_role = guild.get_role(LOA_ROLE_ID)
+        bot_top_role = guild.me.top_role
+
+        changes = []
+        skipped = {"not_in_server": 0, "above_bot": 0}
+        for discord_id, user_data in roster.items():
+            member = guild.get_member(int(discord_id)) if discord_id.isdigit() else None
+            if member is None:
+                skipped["not_in_server"] += 1
+                continue
+            if member.id == guild.owner_id or member.top_role >= bot_top_role:
+                skipped["above_bot"] += 1
+                continue
+
+            change = MemberChange(member, user_data['username'])
+            current_ids = {role.id for role in member.roles}
+            on_loa = user_data['loa_status'] == "LoA"
+
+            # Exactly the rank role the sheet says, when it's one we manage
+            wanted_rank_role = rank_roles.get(user_data['rank'])
+            if wanted_rank_role:
+                if wanted_rank_role.id not in current_ids:
+                    change.add_roles.append(wanted_rank_role)
+                change.remove_roles.extend(
+                    role for role in member.roles
+                    if role.id in rank_role_ids and role.id != wanted_rank_role.id
+                )
+
+            if loa_role:
+                if on_loa and loa_role.id not in current_ids:
+                    change.add_roles.append(loa_role)
+                elif not on_loa and loa_role.id in current_ids:
+                    change.remove_roles.append(loa_role)
+
+            # Leave nicknames alone for ranks we have no prefix for
+            if on_loa or self.role_manager.rank_prefixes.get(user_data['rank']):
+                nickname = self.role_manager.nickname_for(user_data, on_loa=on_loa)
+                if member.nick != nickname:
+                    change.nick = nickname
+
+            if change:
+                changes.append(change)
+
+        return changes, skipped
+
+    def format_report(self, changes, skipped, dry_run):
+        role_calls = sum(bool(change.add_roles) + bool(change.remove_roles) for change in changes)
+        nick_calls = sum(change.nick is not None for change in changes)
+        lines = [
+            f"{'Dry run' if dry_run else 'Applied'}: {len(changes)} members need changes "
+            f"({role_calls} role calls, {nick_calls} nickname edits)",
+            f"Skipped: {skipped['not_in_server']} not in server, {skipped['above_bot']} above the bot's role"
+        ]
+        lines.extend(change.describe() for change in changes[:RECONCILE_REPORT_LINES])
+        if len(changes) > RECONCILE_REPORT_LINES:
+            lines.append(f"... and {len(changes) - RECONCILE_REPORT_LINES} more")
+        return "\n".join(lines)
+
+    async def run(self, dry_run=True, on_progress=None):
+        # Plan and (unless dry_run) apply, returns the report text
+        if self.lock.locked():
+            return None
+
+        async with self.lock:
+            guild = self.bot.get_guild(SERVER_ID)
+            if not guild:
+                return "Could not find the server"
+
+            started = time.perf_counter()
+            changes, skipped = await self.plan(guild)
+            if not dry_run:
+                await self.apply(changes, on_progress)
+
+            metrics.observe("reconcile.run", time.perf_counter() - started)
+            return self.format_report(changes, skipped, dry_run)
+
+    async def apply(self, changes, on_progress=None):
+        # Paced, one member at a time, queued behind anything else already running for that member
+        self.progress = {"total": len(changes), "done": 0, "failed": 0, "started_at": time.time()}
+
+        for change in changes:
+            job = lambda change=change: self._apply_change(change)
+            try:
+                if self.work_queue:
+                    await self.work_queue.run(change.member.id, job, description="reconcile")
+                else:
+                    await job()
+            except Exception as e:
+                log.warning(f"Could not update {change.username}: {e}")
+                self.progress["failed"] += 1
+                metrics.increment("reconcile.failed")
+
+            self.progress["done"] += 1
+            if on_progress:
+                await on_progress(self.progress)
+            await asyncio.sleep(self.edit_interval)
+
+        metrics.increment("reconcile.members_changed", len(changes))
+
+    async def _apply_change(self, change):
+        member = change.member
+        mutations = self.role_manager.mutations
+        if mutations:
+            # Everything for this member in a single edit
+            await mutations.stage(
+                member,
+                add=change.add_roles,
+                remove=change.remove_roles,
+                nick=change.nick if change.nick is not None else UNCHANGED
+            )
+            return
+
+        if change.remove_roles:
+            await self._with_retry(member.remove_roles, *change.remove_roles, reason="Roster reconcile")
+        if change.add_roles:
+            await self._with_retry(member.add_roles, *change.add_roles, reason="Roster reconcile")
+        if change.nick is not None:
+            await self._with_retry(member.edit, nick=change.nick, reason="Roster reconcile")
+
+    @staticmethod
+    async def _with_retry(call, *args, **kwargs):
+        # discord.py waits out most 429s itself, this covers the ones it hands back to us
+        for attempt in range(3):
+            try:
+                return await call(*args, **kwargs)
+            except discord.RateLimited as e:
+                metrics.increment("reconcile.rate_limited")
+                await asyncio.sleep(e.retry_after)
+            except discord.HTTPException as e:
+                if e.status != 429 or attempt == 2:
+                    raise
+                metrics.increment("reconcile.rate_limited")
+                await asyncio.sleep(2 ** attempt)
+        raise RuntimeError("still rate limited after 3 attempts")
@@ -0,0 +1,61 @@
+# roster_snapshot.py - Local SQLite copy of the roster so restarts can answer before the sheet loads
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from config import *
+from local_store import state_path
+from bot_logging import get_logger
+
+log = get_logger("sheets")
+
+class RosterSnapshot:
+    def __init__(self, filename=ROSTER_SNAPSHOT_DB):
+        # Saved from worker threads, so one connection shared behind a lock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(state_path(filename), check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS roster_rows (row_index INTEGER PRIMARY KEY, cells TEXT NOT NULL)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS snapshot_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.connection.commit()
+        self.last_digest = self._meta("digest")
+
+    def load(self):
+        # (all_values, saved_at) exactly as get_all_values returned them, or (None, None)
+        started = time.perf_counter()
+        with self.lock:
+            rows = self.connection.execute("SELECT cells FROM roster_rows ORDER BY row_index").fetchall()
+        if not rows:
+            return None, None
+
+        all_values = [json.loads(cells) for (cells,) in rows]
+        saved_at = self._meta("saved_at")
+        log.info(f"Loaded roster snapshot: {len(all_values)} rows in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return all_values, float(saved_at) if saved_at else None
+
+    def save(self, all_values):
+        # Replace the snapshot, skipped when nothing changed since the last save
+        encoded = [json.dumps(row, separators=(",", ":")) for row in all_values]
+        digest = hashlib.sha1("\n".join(encoded).encode("utf-8")).hexdigest()
+        if digest == self.last_digest:
+            return False
+
+        with self.lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM roster_rows")
+                self.connection.executemany(
+                    "INSERT INTO roster_rows (row_index, cells) VALUES (?, ?)",
+                    enumerate(encoded, start=1)
+                )
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO snapshot_meta (key, value) VALUES (?, ?)",
+                    [("digest", digest), ("saved_at", str(time.time()))]
+                )
+        self.last_digest = digest
+        return True
+
+    def _meta(self, key):
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM snapshot_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,233 @@
+# scheduler.py - Persistent cron-style and one-shot jobs for recurring bot work
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone as tz
+from config import *
+from local_store import load_json, save_json
+from metrics import metrics
+from work_queue import MemberWorkQueue
+from bot_logging import get_logger
+
+log = get_logger("scheduler")
+
+# (low, high) for minute, hour, day of month, month, day of week (0 and 7 = Sunday)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+def parse_cron_field(field, low, high):
+    # "*", "*/15", "1-5", "0,30" or any mix of them -> set of allowed values
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = end = int(part)
+
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Bad cron field: {field}")
+        values.update(range(start, end + 1, step))
+
+    if high == 7:
+        values = {value % 7 for value in values}
+    return values
+
+class CronSchedule:
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression}")
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS)
+        )
+        # Standard cron: when both day fields are restricted either one may match
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment):
+        # First matching minute strictly after moment (UTC)
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+
+        while moment < limit:
+            if moment.month not in self.months:
+                year = moment.year + (moment.month == 12)
+                month = moment.month % 12 + 1
+                moment = moment.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+                continue
+            if moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+                continue
+            return moment
+
+        raise ValueError(f"Cron expression never fires: {self.expression}")
+
+class JobScheduler:
+    def __init__(self, filename=SCHEDULER_STATE_FILE, workers=SCHEDULER_WORKERS):
+        self.filename = filename
+
+        # Jobs run on their own pool so a slow job never holds up member commands
+        self.queue = MemberWorkQueue(workers=workers, name="scheduler")
+
+        # name -> coroutine function, so persisted one-shot jobs can be rebuilt after a restart
+        self.handlers = {}
+
+        # job ID -> {'handler', 'cron' or 'run_at', 'payload', 'next_run', 'last_run', ...}
+        state = load_json(filename, {})
+        self.jobs = state.get("jobs", {})
+        self.schedules = {}
+        self.running = set()
+        self.wake = asyncio.Event()
+        self.task = None
+
+    def register(self, name, handler):
+        # handler(payload) -> awaitable
+        self.handlers[name] = handler
+
+    def add_cron(self, job_id, expression, handler, payload=None):
+        # Recurring job; a run missed while the bot was down fires once on startup
+        schedule = CronSchedule(expression)
+        self.schedules[job_id] = schedule
+
+        job = self.jobs.get(job_id)
+        if job is None or job.get("cron") != expression:
+            job = dict(job or {}, cron=expression, next_run=schedule.next_after(self._now()).isoformat())
+        job.update(handler=handler, payload=payload)
+        job.pop("run_at", None)
+        self.jobs[job_id] = job
+        self._save()
+        self.wake.set()
+
+    def add_once(self, job_id, run_at, handler, payload=None):
+        # One-shot job, dropped after it has run
+        self.jobs[job_id] = {
+            "handler": handler,
+            "payload": payload,
+            "run_at": run_at.astimezone(tz.utc).isoformat(),
+            "next_run": run_at.astimezone(tz.utc).isoformat()
+        }
+        self._save()
+        self.wake.set()
+
+    def cancel(self, job_id):
+        if self.jobs.pop(job_id, None) is not None:
+            self.schedules.pop(job_id, None)
+            self._save()
+
+    def start(self):
+        # Safe to call on every on_ready
+        if self.task is not None:
+            return
+        self.queue.start()
+        self.task = asyncio.create_task(self._run())
+        log.info(f"Scheduler started with {len(self.jobs)} jobs")
+
+    def describe(self):
+        # Rows for /jobs, soonest first
+        rows = []
+        for job_id, job in sorted(self.jobs.items(), key=lambda item: item[1].get("next_run", "")):
+            rows.append({
+                "id": job_id,
+                "schedule": job.get("cron") or "once",
+                "next_run": job.get("next_run"),
+                "last_run": job.get("last_run"),
+                "last_duration": job.get("last_duration"),
+                "last_status": job.get("last_status"),
+                "running": job_id in self.running
+            })
+        return rows
+
+    async def _run(self):
+        while True:
+            now = self._now()
+            for job_id, job in list(self.jobs.items()):
+                if job_id in self.running or datetime.fromisoformat(job["next_run"]) > now:
+                    continue
+                self._dispatch(job_id, job)
+
+            self.wake.clear()
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=self._seconds_until_next())
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self, job_id, job):
+        handler = self.handlers.get(job["handler"])
+        if handler is None:
+            # Loaded from disk before its handler was registered, try again later
+            return
+
+        # Single execution: the job stays in running until it has finished
+        self.running.add(job_id)
+        payload = job.get("payload")
+        self.queue.submit(job_id, lambda: self._execute(job_id, handler, payload), description=job_id)
+
+    async def _execute(self, job_id, handler, payload):
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            await handler(payload)
+        except Exception as e:
+            status = f"error: {e}"
+            log.error(f"Scheduled job {job_id} failed: {e}")
+            metrics.increment("scheduler.failed")
+        finally:
+            duration = time.perf_counter() - started
+            metrics.observe(f"job.{job_id}", duration)
+            self.running.discard(job_id)
+            self._finish(job_id, status, duration)
+            self.wake.set()
+
+    def _finish(self, job_id, status, duration):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+
+        now = self._now()
+        if "run_at" in job:
+            del self.jobs[job_id]
+        else:
+            schedule = self.schedules.get(job_id) or CronSchedule(job["cron"])
+            # Several missed runs collapse into this one, the next run is the next future slot
+            job["next_run"] = schedule.next_after(now).isoformat()
+            job.update(last_run=now.isoformat(), last_duration=round(duration, 3), last_status=status)
+        self._save()
+
+    def _seconds_until_next(self):
+        waiting = [
+            datetime.fromisoformat(job["next_run"])
+            for job_id, job in self.jobs.items()
+            if job_id not in self.running and job["handler"] in self.handlers
+        ]
+        if not waiting:
+            return 60
+        seconds = (min(waiting) - self._now()).total_seconds()
+        return min(max(seconds, 1), 60)
+
+    def _save(self):
+        save_json(self.filename, {"jobs": self.jobs})
+
+    @staticmethod
+    def _now():
+        return datetime.now(tz.utc)
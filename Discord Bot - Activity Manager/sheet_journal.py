@@ -0,0 +1,151 @@
+# sheet_journal.py - Append-only journal of every sheet write, so failed writes can be replayed
+
+import json
+import os
+import threading
+from datetime import datetime, timezone as tz
+from config import *
+from local_store import state_path, load_jsonl, append_jsonl
+from bot_logging import get_logger
+
+log = get_logger("journal")
+
+class JournaledWriteError(Exception):
+    # A sheet write failed after it was journaled, so replay_journal will still apply it
+    def __init__(self, seq, error):
+        super().__init__(f"sheet write {seq} failed and is waiting for replay: {error}")
+        self.seq = seq
+        self.error = error
+
+class SheetJournal:
+    def __init__(self, filename=SHEET_JOURNAL_FILE):
+        self.filename = filename
+        # Writes come from worker threads (asyncio.to_thread), so guard the counters and file
+        self.lock = threading.Lock()
+
+        # Appended writes still being sent by _mutate, replay must not send them a second time
+        self.in_flight = set()
+
+        # seq -> entry for everything since the last compaction, acked or not
+        self.entries = {}
+        self.acked = set()
+        self.last_seq = 0
+        self.records_on_disk = 0
+
+        for record in load_jsonl(filename):
+            self.records_on_disk += 1
+            seq = record.get("seq", 0)
+            self.last_seq = max(self.last_seq, seq)
+            if record.get("checkpoint"):
+                continue
+            if record.get("ack"):
+                self.acked.add(seq)
+            elif "kind" in record:
+                self.entries[seq] = record
+
+        pending = len(self.pending())
+        if pending:
+            log.warning(f"{pending} sheet writes were never acknowledged - they will be replayed")
+
+    def append(self, kind, args):
+        # Record an intended write before it is sent, returns its sequence number
+        with self.lock:
+            self.last_seq += 1
+            entry = {
+                "seq": self.last_seq,
+                "kind": kind,
+                "args": args,
+                "at": datetime.now(tz.utc).isoformat()
+            }
+            self.entries[self.last_seq] = entry
+            self.in_flight.add(self.last_seq)
+            self._write(entry)
+            return self.last_seq
+
+    def ack(self, seq):
+        # The write reached the sheet
+        with self.lock:
+            self.acked.add(seq)
+            self.in_flight.discard(seq)
+            self._write({"seq": seq, "ack": True})
+
+    def settle(self, seq):
+        # Sending failed: the entry stays pending and is now replay's job
+        with self.lock:
+            self.in_flight.discard(seq)
+
+    def pending(self):
+        # Unacknowledged entries that nobody is sending right now, oldest first
+        with self.lock:
+            return [
+                self.entries[seq] for seq in sorted(self.entries)
+                if seq not in self.acked and seq not in self.in_flight
+            ]
+
+    def unacked_ranges(self):
+        # A1 ranges with a value write that hasn't reached the sheet yet, pending or still being sent
+        with self.lock:
+            return {
+                item["range"]
+                for seq, entry in self.entries.items()
+                if seq not in self.acked and entry["kind"] == "values"
+                for item in entry["args"]["data"]
+            }
+
+    def later_ranges(self):
+        # A1 range -> newest seq that wrote values there, so replay never overwrites something newer
+        with self.lock:
+            return self._newest_ranges()
+
+    def _newest_ranges(self):
+        # Caller holds self.lock
+        newest = {}
+        for seq, entry in self.entries.items():
+            if entry["kind"] == "values":
+                for item in entry["args"]["data"]:
+                    newest[item["range"]] = max(newest.get(item["range"], 0), seq)
+        return newest
+
+    def compact(self):
+        # Rewrite the file with only unacknowledged entries, keeping the sequence going
+        with self.lock:
+            # Pending cell writes a newer entry already covers are dropped now, since the newer one won't survive
+            newest = self._newest_ranges()
+            pending = []
+            for seq in sorted(self.entries):
+                entry = self.entries[seq]
+                if seq in self.acked:
+                    continue
+                if entry["kind"] == "values":
+                    data = [item for item in entry["args"]["data"] if newest[item["range"]] <= seq]
+                    if not data:
+                        continue
+                    entry = dict(entry, args=dict(entry["args"], data=data))
+                pending.append(entry)
+
+            path = state_path(self.filename)
+            tmp_path = f"{path}.tmp"
+            try:
+                with open(tmp_path, mode='w', encoding='utf-8') as file:
+                    # Marker so the sequence survives even when nothing is pending
+                    file.write(json.dumps({"seq": self.last_seq, "checkpoint": True}) + '\n')
+                    for entry in pending:
+                        file.write(json.dumps(entry) + '\n')
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(tmp_path, path)
+            except OSError as e:
+                log.error(f"Could not compact {self.filename}: {e}")
+                return False
+
+            self.entries = {entry["seq"]: entry for entry in pending}
+            self.acked = set()
+            self.records_on_disk = len(pending) + 1
+            return True
+
+    def needs_compaction(self):
+        return self.records_on_disk >= SHEET_JOURNAL_COMPACT_AFTER
+
+    def _write(self, record):
+        append_jsonl(self.filename, record)
+        self.records_on_disk += 1
@@ -1,31 +1,62 @@
 import gspread
+import threading
 from oauth2client.service_account import ServiceAccountCredentials
 from config import *
 from datetime import datetime, timedelta
+from timezone_index import TimezoneIndex
+from message_parser import parse_message
+from promotions import promotion_table
+from sheet_journal import SheetJournal, JournaledWriteError
+from roster_snapshot import RosterSnapshot
+from bot_logging import get_logger
+
+log = get_logger("sheets")
 
 class SheetsManager:
-    def __init__(self):
+    def __init__(self, connect=True):
         self.client = None
         self.spreadsheet = None
         self.worksheet = None
-        self.connect()
         self.user_cache = {}
         self.cache_duration = timedelta(minutes=1)
         self.last_full_load = None
         self.all_users_cache = []
+
+        # username.lower() -> LOA value, note and end date for the whole roster, None until first load
+        self.loa_state = None
+        self.loa_state_loaded_at = None
+
+        # Discord ID -> parsed roster row, so role and nickname updates skip per-user reads
+        self.roster_index = {}
+        self.roster_loaded_at = None
+        self.roster_index_ttl = timedelta(minutes=ROSTER_INDEX_TTL_MINUTES)
+
+        # Every write is journaled first so a failed one can be replayed later
+        self.journal = SheetJournal()
+        # The scheduled job and /journal replay may both run replay_journal
+        self.replay_lock = threading.Lock()
+        # New rows are placed at the first empty row, so two at once must not pick the same one
+        self.new_row_lock = threading.Lock()
+
+        # Last full roster read, on disk so a restart can serve reads before the sheet answers
+        self.snapshot = RosterSnapshot()
+
+        if connect:
+            self.connect()
     
     def connect(self):
-        # Connect to Google Sheets using service account credentials
+        # Connect to Google Sheets using service account credentials, False (not a crash) when it is down
         try:
             scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
             creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_FILE, scope)
             self.client = gspread.authorize(creds)
             self.spreadsheet = self.client.open_by_key(SPREADSHEET_ID)
             self.worksheet = self.spreadsheet.worksheet(SHEET_NAME)
-            print("Successfully connected to Google Sheets")
+            log.info("Successfully connected to Google Sheets")
+            return True
         except Exception as e:
-            print(f"Error connecting to Google Sheets: {e}")
-            raise e
+            log.error(f"Error connecting to Google Sheets: {e}")
+            return False
     
     def get_cached_user_data(self, username):
         # Get user data from cache or fetch
@@ -56,10 +87,88 @@ class SheetsManager:
             return self.all_users_cache
         
         # Refresh cache
+        return self._fetch_all_values()
+
+    def _fetch_all_values(self):
+        # Every full roster read lands here: refresh the caches and index, and save the snapshot
         all_values = self.worksheet.get_all_values()
         self.all_users_cache = all_values
-        self.last_full_load = now
+        self.last_full_load = datetime.now()
+        self.refresh_roster_index(all_values)
+        try:
+            self.snapshot.save(all_values)
+        except Exception as e:
+            log.error(f"Error saving roster snapshot: {e}")
+        return all_values
+
+    def load_snapshot(self):
+        # Serve reads from the local snapshot until the live sheet has been read
+        try:
+            all_values, saved_at = self.snapshot.load()
+        except Exception as e:
+            log.error(f"Error loading roster snapshot: {e}")
+            return None
+        if not all_values:
+            return None
+
+        self.all_users_cache = all_values
+        self.last_full_load = datetime.now()
+        self.refresh_roster_index(all_values)
+        if saved_at:
+            log.info(f"Roster snapshot is {(datetime.now().timestamp() - saved_at) / 60:.0f} minutes old")
         return all_values
+
+    def refresh_from_sheet(self, user_points):
+        # Background reconcile with the live sheet, returns how many rows differed from what we had
+        previous = self.all_users_cache
+        all_values = self._fetch_all_values()
+        changed = sum(1 for i, row in enumerate(all_values) if i >= len(previous) or previous[i] != row)
+        changed += max(0, len(previous) - len(all_values))
+        self.load_points_from_spreadsheet(user_points, all_values)
+        return changed
+
+    def refresh_roster_index(self, all_values=None):
+        # Rebuild the Discord ID index from one full read (or one we already have)
+        try:
+            if all_values is None:
+                # A full read rebuilds the index on its way through
+                self._fetch_all_values()
+                return self.roster_index
+
+            index = {}
+            for i, row in enumerate(all_values[3:], start=4):
+                user_data = self.parse_user_row(i, row)
+                if user_data['discord_id'] and user_data['username']:
+                    index[user_data['discord_id']] = user_data
+
+            self.roster_index = index
+            self.roster_loaded_at = datetime.now()
+            return index
+        except Exception as e:
+            log.error(f"Error building roster index: {e}")
+            return self.roster_index
+
+    def get_roster_entry(self, discord_id):
+        # Parsed roster row for a Discord ID, reloading only when the index is old or misses
+        now = datetime.now()
+        entry = self.roster_index.get(str(discord_id))
+
+        if self.roster_loaded_at is None or now - self.roster_loaded_at > self.roster_index_ttl:
+            self.refresh_roster_index()
+            entry = self.roster_index.get(str(discord_id))
+        elif entry is None and now - self.roster_loaded_at > self.cache_duration:
+            # Maybe someone new was added since the last load
+            self.refresh_roster_index()
+            entry = self.roster_index.get(str(discord_id))
+
+        return entry
+
+    def _update_roster_entry(self, username, **changes):
+        # Keep the index in step with the bot's own writes
+        for entry in self.roster_index.values():
+            if entry['username'].lower() == username.lower():
+                entry.update(changes)
+                return
     
     def batch_get_user_data(self, username):
         # Get all user data in one API call
@@ -70,21 +179,63 @@ class SheetsManager:
             # Get entire row in ONE API call instead of multiple
             row_data = self.worksheet.row_values(row_index)
             
-            return {
-                'row_index': row_index,
-                'points': int(row_data[POINTS_COLUMN]) if len(row_data) > POINTS_COLUMN and row_data[POINTS_COLUMN].isdigit() else 0,
-                'rank': row_data[RANK_COLUMN-1] if len(row_data) > RANK_COLUMN-1 else "",
-                'status': row_data[STATUS_COLUMN] if len(row_data) > STATUS_COLUMN else "",
-                'loa_status': row_data[LOA_NOTICE_COLUMN] if len(row_data) > LOA_NOTICE_COLUMN else "",
-                'activity_checked': row_data[ACTIVITY_COLUMN] if len(row_data) > ACTIVITY_COLUMN else False,
-                'codename': row_data[CODENAME_COLUMN] if len(row_data) > CODENAME_COLUMN else ""
-            }
+            return self.parse_user_row(row_index, row_data)
         except Exception as e:
-            print(f"Error getting user data: {e}")
+            log.error(f"Error getting user data: {e}")
             return None
+
+    def parse_user_row(self, row_index, row_data):
+        # Turn a raw roster row into the user data dict used everywhere
+        return {
+            'row_index': row_index,
+            'points': int(row_data[POINTS_COLUMN]) if len(row_data) > POINTS_COLUMN and row_data[POINTS_COLUMN].isdigit() else 0,
+            'rank': row_data[RANK_COLUMN-1] if len(row_data) > RANK_COLUMN-1 else "",
+            'status': row_data[STATUS_COLUMN] if len(row_data) > STATUS_COLUMN else "",
+            'loa_status': row_data[LOA_NOTICE_COLUMN] if len(row_data) > LOA_NOTICE_COLUMN else "",
+            'activity_checked': row_data[ACTIVITY_COLUMN] if len(row_data) > ACTIVITY_COLUMN else False,
+            'codename': row_data[CODENAME_COLUMN] if len(row_data) > CODENAME_COLUMN else "",
+            'username': row_data[1].strip() if len(row_data) > 1 and row_data[1] else "",
+            'discord_id': row_data[DISCORD_ID_COLUMN].strip() if len(row_data) > DISCORD_ID_COLUMN and row_data[DISCORD_ID_COLUMN] else ""
+        }
+
+    def get_user_data_by_row(self, row_index, discord_id=None):
+        # Read one known row, no find() - returns None if the row now belongs to someone else
+        try:
+            row_data = self.worksheet.row_values(row_index)
+            user_data = self.parse_user_row(row_index, row_data)
+
+            if discord_id and user_data['discord_id'] != str(discord_id):
+                return None
+            return user_data
+        except Exception as e:
+            log.error(f"Error getting user data for row {row_index}: {e}")
+            return None
+
+    def get_discord_row_index(self):
+        # Discord ID -> roster row for the whole sheet in one call
+        try:
+            all_values = self._fetch_all_values()
+            index = {}
+            for i, row in enumerate(all_values[3:], start=4):
+                if len(row) > DISCORD_ID_COLUMN and row[DISCORD_ID_COLUMN].strip():
+                    index[row[DISCORD_ID_COLUMN].strip()] = i
+            return index
+        except Exception as e:
+            log.error(f"Error building Discord ID index: {e}")
+            return {}
     
+    def points_pending(self, row_index):
+        # The journal holds absolute totals, so while one for this row's points cell is unacknowledged
+        # the sheet shows a stale total: a read-modify-write now would lose that award, or be undone by replay
+        return gspread.utils.rowcol_to_a1(row_index, POINTS_COLUMN + 1) in self.journal.unacked_ranges()
+
     def batch_update_cells(self, updates):
         # Update multiple cells in one API call updates: list of dicts with 'row', 'col', 'value'
+        return self.write_cells(updates) == "written"
+
+    def write_cells(self, updates):
+        # batch_update_cells that also says what happened to a failed write:
+        # "written", "journaled" (replay_journal will still apply it) or "failed" (nothing was recorded)
         try:
             # Build batch update request
             batch_data = []
@@ -96,13 +247,106 @@ class SheetsManager:
                 })
             
             # Single API call for all updates
-            self.worksheet.batch_update(batch_data, value_input_option='USER_ENTERED')
-            return True
+            self._write_values(batch_data)
+            return "written"
+        except JournaledWriteError as e:
+            log.error(f"Error in batch update: {e}")
+            return "journaled"
         except Exception as e:
-            print(f"Error in batch update: {e}")
-            return False
+            log.error(f"Error in batch update: {e}")
+            return "failed"
+        
+    def _cell(self, row, col, value):
+        # One cell for _write_values (1-based row and column)
+        return {'range': gspread.utils.rowcol_to_a1(row, col), 'values': [[value]]}
+
+    def _write_values(self, data, value_input='USER_ENTERED', journal=True):
+        if not journal:
+            # Sent once or not at all, never replayed
+            self._apply_mutation("values", {'data': data, 'value_input': value_input})
+            return
+        self._mutate("values", data=data, value_input=value_input)
+
+    def _write_requests(self, requests):
+        self._mutate("requests", requests=requests)
+
+    def _mutate(self, kind, **args):
+        # Every sheet write goes through here: journal it, send it, then acknowledge it
+        # If sending raises, the entry stays unacknowledged for replay_journal
+        seq = self.journal.append(kind, args)
+        try:
+            self._apply_mutation(kind, args)
+        except Exception as e:
+            self.journal.settle(seq)
+            raise JournaledWriteError(seq, e) from e
+        self.journal.ack(seq)
+
+    def _apply_mutation(self, kind, args):
+        if kind == "values":
+            self.worksheet.batch_update(args['data'], value_input_option=args['value_input'])
+        elif kind == "requests":
+            self.spreadsheet.batch_update({'requests': args['requests']})
+        elif kind == "format":
+            self.worksheet.format(args['range'], args['format'])
+        elif kind == "note":
+            self.worksheet.update_note(args['cell'], args['note'])
+        else:
+            raise ValueError(f"Unknown sheet mutation: {kind}")
+
+    def replay_journal(self, batch_size=SHEET_JOURNAL_REPLAY_BATCH):
+        # Re-send unacknowledged writes in order, merging neighbours of the same kind into one call
+        # Returns (replayed, failed)
+        with self.replay_lock:
+            return self._replay_journal(batch_size)
+
+    def _replay_journal(self, batch_size):
+        pending = self.journal.pending()
+        if not pending:
+            return 0, 0
+
+        newest = self.journal.later_ranges()
+        replayed = 0
+        failed = 0
+        i = 0
+        while i < len(pending):
+            entry = pending[i]
+            group = [entry]
+            mergeable = entry['kind'] in ("values", "requests")
+            while (mergeable and len(group) < batch_size and i + len(group) < len(pending)
+                   and pending[i + len(group)]['kind'] == entry['kind']
+                   and pending[i + len(group)]['args'].get('value_input') == entry['args'].get('value_input')):
+                group.append(pending[i + len(group)])
+            i += len(group)
+
+            try:
+                if entry['kind'] == "values":
+                    # Skip cells a newer write has already set
+                    data = [
+                        item for member in group for item in member['args']['data']
+                        if newest.get(item['range'], 0) <= member['seq']
+                    ]
+                    if data:
+                        self._apply_mutation("values", {'data': data, 'value_input': entry['args']['value_input']})
+                elif entry['kind'] == "requests":
+                    requests = [request for member in group for request in member['args']['requests']]
+                    self._apply_mutation("requests", {'requests': requests})
+                else:
+                    self._apply_mutation(entry['kind'], entry['args'])
+
+                for member in group:
+                    self.journal.ack(member['seq'])
+                replayed += len(group)
+            except Exception as e:
+                # Stop here so later writes never land before earlier ones
+                log.error(f"Replay of writes {group[0]['seq']}-{group[-1]['seq']} failed: {e}")
+                failed = len(pending) - replayed
+                break
+
+        log.info(f"Replayed {replayed} sheet writes, {failed} still pending")
+        return replayed, failed
         
     def load_timezones_from_txt(self):
+        # Parsed once into an immutable index shared by parse_timezone and autocomplete
         timezones = {}
         try:
             with open('Timezones.txt', mode='r', encoding='utf-8') as file:
@@ -120,15 +364,15 @@ class SheetsManager:
                             abbrev = parts[0].strip().upper() 
                             offset = float(parts[1].strip())
                             timezones[abbrev] = offset
-            return timezones
+            return TimezoneIndex(timezones)
         except FileNotFoundError:
-            print(f"Timezone broke")
-            return {}
+            log.error("Timezone broke")
+            return TimezoneIndex({})
         
     def user_exists(self, username):
         # Check if a username already exists in the spreadsheet
         try:
-            all_values = self.worksheet.get_all_values()
+            all_values = self._fetch_all_values()
             
             for row in all_values[3:]: 
                 if len(row) > 1:
@@ -137,11 +381,32 @@ class SheetsManager:
                         return True
             return False
         except Exception as e:
-            print(f"Error checking if user exists: {e}")
+            log.error(f"Error checking if user exists: {e}")
             return False
+
+    def find_thread_owner(self, username, discord_id):
+        # One full read for a new forum post: (username is on the roster, row holding discord_id or None)
+        try:
+            all_values = self._fetch_all_values()
+
+            exists = False
+            row_index = None
+            for i, row in enumerate(all_values[3:], start=4):
+                if len(row) > 1 and row[1] and row[1].strip().lower() == username.lower():
+                    exists = True
+                if row_index is None and len(row) > DISCORD_ID_COLUMN and row[DISCORD_ID_COLUMN].strip() == str(discord_id):
+                    row_index = i
+            return exists, row_index
+        except Exception as e:
+            log.error(f"Error looking up thread owner {username}: {e}")
+            return False, None
     
     def is_user_on_loa(self, username):
         # Check if a user is currently on LOA
+        if self.loa_state is not None:
+            entry = self.loa_state.get(username.lower())
+            return bool(entry and entry['on_loa'])
+
         try:
             cell = self.worksheet.find(username)
             row_index = cell.row
@@ -154,21 +419,25 @@ class SheetsManager:
             return loa_status == "LoA"
             
         except Exception as e:
-            print(f"Error checking LOA status for {username}: {e}")
+            log.error(f"Error checking LOA status for {username}: {e}")
             return False
 
     def create_new_user_entry(self, username, discord_id, squadron):
         # Create a new user entry by copying the last user row and modifying values
+        with self.new_row_lock:
+            return self._create_new_user_entry(username, discord_id, squadron)
+
+    def _create_new_user_entry(self, username, discord_id, squadron):
         try:
             next_row = self.find_next_empty_row()
-            print(f"Adding new user {username} at row {next_row}")
+            log.info(f"Adding new user {username} at row {next_row}")
             
             # Find the last valid user row to copy from (before the empty rows)
             template_row = next_row - 1
             if template_row < 4:  
                 template_row = 4  
             
-            print(f"Using row {template_row} as template for new user")
+            log.debug("Using row %s as template for new user", template_row)
             
             # Copy the entire row from template to new position
             # This preserves all formatting, dropdowns, formulas, etc.
@@ -179,51 +448,37 @@ class SheetsManager:
             template_data = self.worksheet.get(source_range)[0]
             
             # Update the new row with template data
-            self.worksheet.update(target_range, [template_data])
-            
-            # Now modify only the fields we want to change for the new user
-            # Username 
-            self.worksheet.update_cell(next_row, 2, username)
+            # Not journaled: the row was picked as the first empty one, and a replay later could land
+            # on someone created there since - a failed creation is retried by hand instead
+            self._write_values([{'range': target_range, 'values': [template_data]}], value_input='RAW', journal=False)
             
-            # Clear Codename/OC name 
-            self.worksheet.update_cell(next_row, 4, "")
-            
-            # Set Rank to E1 
-            self.worksheet.update_cell(next_row, 6, "E1")
-
-            # Set Status
+            # Now modify only the fields we want to change for the new user, all in one call
             status_formula = f'=IF(J{next_row}=TRUE;"Active";"Inactive")'
-            self.worksheet.update_cell(next_row, STATUS_COLUMN, status_formula)
-            
-            # Set Squadron 
-            self.worksheet.update_cell(next_row, 7, squadron)
-            
-            # Set Discord ID
-            self.worksheet.update_cell(next_row, DISCORD_ID_COLUMN + 1, discord_id)
-
-            # Set Notes
-            notes_formula = f'=IFS(P{next_row}>=200;"Can move up to E9, awaiting promo board"; P{next_row}>=150;"Can move up to E8, awaiting promo board"; P{next_row}>=120;"Can move up to E7, awaiting promo board"; P{next_row}>=90;"Can move up to E6, awaiting promo board"; P{next_row}>=70;"Eligible for E5"; P{next_row}>=50;"Eligible for E4"; P{next_row}>=30;"Eligible for E3"; P{next_row}>=10;"Eligible for E2"; TRUE;"None")'
-            self.worksheet.update_cell(next_row, NOTES_COLUMN, notes_formula)
-            
-            # Set initial points to 0
-            self.worksheet.update_cell(next_row, POINTS_COLUMN + 1, 0)
-            
-            # Set Activity checkbox to False (unchecked)
-            self.worksheet.update_cell(next_row, ACTIVITY_COLUMN + 1, False)
-            
-            # Set LoA status to N/A
-            self.worksheet.update_cell(next_row, LOA_NOTICE_COLUMN + 1, "N/A")
-            
-            return True
+            notes_formula = promotion_table.notes_formula(next_row)
+            self._write_values([
+                self._cell(next_row, 2, username),                          # Username
+                self._cell(next_row, 4, ""),                                # Clear Codename/OC name
+                self._cell(next_row, 6, "E1"),                              # Set Rank to E1
+                self._cell(next_row, STATUS_COLUMN, status_formula),        # Set Status
+                self._cell(next_row, 7, squadron),                          # Set Squadron
+                self._cell(next_row, DISCORD_ID_COLUMN + 1, discord_id),    # Set Discord ID
+                self._cell(next_row, NOTES_COLUMN, notes_formula),          # Set Notes
+                self._cell(next_row, POINTS_COLUMN + 1, 0),                 # Set initial points to 0
+                self._cell(next_row, ACTIVITY_COLUMN + 1, False),           # Activity checkbox unchecked
+                self._cell(next_row, LOA_NOTICE_COLUMN + 1, "N/A")          # Set LoA status to N/A
+            ], journal=False)
+            
+            # Row number doubles as a truthy success value
+            return next_row
             
         except Exception as e:
-            print(f"Error creating new user entry: {e}")
+            log.error(f"Error creating new user entry: {e}")
             return False
 
     def find_next_empty_row(self):
         # Find the first empty row in the worksheet
         try:
-            all_values = self.worksheet.get_all_values()
+            all_values = self._fetch_all_values()
             
             # Start from row 4
             for i in range(3, len(all_values)):
@@ -237,13 +492,14 @@ class SheetsManager:
             return len(all_values) + 1
             
         except Exception as e:
-            print(f"Error finding next empty row: {e}")
+            log.error(f"Error finding next empty row: {e}")
             return 4  # Default starting row
     
-    def load_points_from_spreadsheet(self, user_points):
+    def load_points_from_spreadsheet(self, user_points, all_values=None):
         # Load all points into the user_points dictionary
         try:
-            all_values = self.worksheet.get_all_values()
+            if all_values is None:
+                all_values = self._fetch_all_values()
             
             for row in all_values[3:]:  # Skip header rows
                 if len(row) > POINTS_COLUMN:
@@ -256,24 +512,85 @@ class SheetsManager:
                         except ValueError:
                             user_points[username] = 0
             
-            print(f"Loaded points for {len(user_points)} users")
+            log.info(f"Loaded points for {len(user_points)} users")
         except Exception as e:
-            print(f"Error loading points from spreadsheet: {e}")
+            log.error(f"Error loading points from spreadsheet: {e}")
     
+    def load_loa_state(self):
+        # Usernames, LOA values + notes and Discord IDs for the whole roster in one spreadsheets.get
+        try:
+            columns = [chr(65 + column) for column in (1, LOA_NOTICE_COLUMN, DISCORD_ID_COLUMN)]
+            metadata = self.spreadsheet.fetch_sheet_metadata(params={
+                'ranges': [f"'{SHEET_NAME}'!{column}4:{column}" for column in columns],
+                'fields': 'sheets(data(rowData(values(formattedValue,note))))'
+            })
+            usernames, loa_cells, discord_ids = (
+                self._grid_column(data) for data in metadata['sheets'][0]['data']
+            )
+
+            state = {}
+            for offset, (username, _) in enumerate(usernames):
+                username = username.strip()
+                if not username:
+                    continue
+
+                value, note = loa_cells[offset] if offset < len(loa_cells) else ("", "")
+                discord_id = discord_ids[offset][0].strip() if offset < len(discord_ids) else ""
+                state[username.lower()] = {
+                    'username': username,
+                    'row': offset + 4,
+                    'discord_id': discord_id,
+                    'on_loa': value == "LoA",
+                    'note': note,
+                    'end_date': parse_message(note).loa_end_date if note else None
+                }
+
+            self.loa_state = state
+            self.loa_state_loaded_at = datetime.now()
+            log.info(f"Loaded LOA state for {len(state)} users ({sum(entry['on_loa'] for entry in state.values())} on LOA)")
+            return state
+        except Exception as e:
+            log.error(f"Error loading LOA state: {e}")
+            return None
+
+    @staticmethod
+    def _grid_column(data):
+        # One-column GridData -> [(formatted value, note)] per row, blanks included
+        cells = []
+        for row in data.get('rowData', []):
+            values = row.get('values') or [{}]
+            cells.append((values[0].get('formattedValue', ""), values[0].get('note', "")))
+        return cells
+
+    def _update_loa_state(self, username=None, row=None, **changes):
+        # Keep the in-memory LOA table in step with our own writes
+        if self.loa_state is None:
+            return
+
+        if username:
+            entry = self.loa_state.get(username.lower())
+        else:
+            entry = next((entry for entry in self.loa_state.values() if entry['row'] == row), None)
+        if entry:
+            entry.update(changes)
+
     def update_points(self, username, points):
-        # Update user's points in the spreadsheet
+        # Update user's points in the spreadsheet, "written", "journaled" or "failed" like write_cells
         try:
             cell = self.worksheet.find(username)
             row_index = cell.row
-            self.worksheet.update_cell(row_index, POINTS_COLUMN + 1, points)
-            
-            # Invalidate cache
-            self.invalidate_user_cache(username)
-            
-            return True
+            self._write_values([self._cell(row_index, POINTS_COLUMN + 1, points)])
+            outcome = "written"
+        except JournaledWriteError as e:
+            log.error(f"Error updating points for {username}: {e}")
+            outcome = "journaled"
         except Exception as e:
-            print(f"Error updating points for {username}: {e}")
-            return False
+            log.error(f"Error updating points for {username}: {e}")
+            return "failed"
+
+        # Invalidate cache
+        self.invalidate_user_cache(username)
+        return outcome
     
     def format_cell_black(self, row, col):
         # Make a cell have black background
@@ -297,11 +614,11 @@ class SheetsManager:
                 }
             }
             
-            self.worksheet.format(cell_range, format_request)
-            print(f"Formatted cell {cell_range} with black background")
+            self._mutate("format", range=cell_range, format=format_request)
+            log.debug("Formatted cell %s with black background", cell_range)
             
         except Exception as e:
-            print(f"Error formatting cell black: {e}")
+            log.error(f"Error formatting cell black: {e}")
     
     def format_cell_red(self, row, col):
         # Turn status back to red
@@ -318,69 +635,204 @@ class SheetsManager:
                 },
             }
             
-            self.worksheet.format(cell_range, format_request)
-            print(f"Applied red background to cell {cell_range}")
+            self._mutate("format", range=cell_range, format=format_request)
+            log.debug("Applied red background to cell %s", cell_range)
             
         except Exception as e:
-            print(f"Error formatting cell red at row {row}, col {col}: {e}")
+            log.error(f"Error formatting cell red at row {row}, col {col}: {e}")
 
     def remove_loa_status(self, username):
         # Remove LOA status and restore red background
         try:
             cell = self.worksheet.find(username)
             row_index = cell.row
-            print(f"Found {username} at row {row_index}")
+            log.debug("Found %s at row %s", username, row_index)
             
             # Update LoA NOTICE column back to N/A
-            self.worksheet.update_cell(row_index, LOA_NOTICE_COLUMN + 1, "N/A")
-            print(f"Updated LoA NOTICE to N/A")
+            self._write_values([self._cell(row_index, LOA_NOTICE_COLUMN + 1, "N/A")])
+            log.debug("Updated LoA NOTICE to N/A")
 
             # Remove the note from the LOA cell
             self.remove_loa_note(username)
+            self._update_loa_state(username, on_loa=False, note="", end_date=None)
             
             # The STATUS column should use a formula that checks the activity checkbox
             original_formula = f'=IF(J{row_index}=TRUE;"Active";"Inactive")'
-            self.worksheet.update_cell(row_index, STATUS_COLUMN + 1, original_formula)
-            self.worksheet.format(f"{gspread.utils.rowcol_to_a1(row_index, STATUS_COLUMN + 1)}", {"textFormat": {"bold": True}})
+            self._write_values([self._cell(row_index, STATUS_COLUMN + 1, original_formula)])
+            self._mutate("format", range=f"{gspread.utils.rowcol_to_a1(row_index, STATUS_COLUMN + 1)}", format={"textFormat": {"bold": True}})
             
             # Then apply the red background formatting
             self.format_cell_red(row_index, STATUS_COLUMN + 1)
-            print(f"Updated STATUS to original formula with red background")
+            log.debug("Updated STATUS to original formula with red background")
             
             return True
             
         except Exception as e:
-            print(f"Error removing LOA status for {username}: {e}")
+            log.error(f"Error removing LOA status for {username}: {e}")
             return False
 
+    def apply_loa_approvals(self, approvals):
+        # Same sheet changes as update_loa_status + add_loa_note for many members, as a single batch_update call
+        # approvals: list of dicts with 'row' and 'note' (None when no end date was given)
+        # Returns "written", "journaled" or "failed" like write_cells
+        outcome = "written"
+        try:
+            requests = []
+            for approval in approvals:
+                row_index = approval['row']
+
+                loa_cell = {'userEnteredValue': {'stringValue': "LoA"}}
+                loa_fields = 'userEnteredValue'
+                if approval['note']:
+                    loa_cell['note'] = approval['note']
+                    loa_fields += ',note'
+                requests.append(self._cell_request(row_index, LOA_NOTICE_COLUMN, loa_cell, loa_fields))
+
+                # Uncheck the activity checkbox
+                requests.append(self._cell_request(
+                    row_index, ACTIVITY_COLUMN, {'userEnteredValue': {'boolValue': False}}, 'userEnteredValue'
+                ))
+
+                # Black STATUS cell, same as format_cell_black
+                requests.append(self._cell_request(
+                    row_index, STATUS_COLUMN,
+                    {'userEnteredFormat': {
+                        'backgroundColor': {'red': 0.0, 'green': 0.0, 'blue': 0.0, 'alpha': 1.0},
+                        'textFormat': {'foregroundColor': {'red': 0.0, 'green': 0.0, 'blue': 0.0, 'alpha': 0.0}}
+                    }},
+                    'userEnteredFormat.backgroundColor,userEnteredFormat.textFormat.foregroundColor'
+                ))
+
+            if requests:
+                try:
+                    self._write_requests(requests)
+                except JournaledWriteError as e:
+                    log.error(f"Error approving LOA for {len(approvals)} rows: {e}")
+                    outcome = "journaled"
+
+                # A journaled write still lands, so the table follows it either way
+                for approval in approvals:
+                    changes = {'on_loa': True}
+                    if approval['note']:
+                        changes.update(note=approval['note'], end_date=parse_message(approval['note']).loa_end_date)
+                    self._update_loa_state(row=approval['row'], **changes)
+                log.info(f"Approved LOA for {len(approvals)} rows in one request ({outcome})")
+            return outcome
+
+        except Exception as e:
+            log.error(f"Error approving LOA for {len(approvals)} rows: {e}")
+            return "failed"
+
+    def _cell_request(self, row_index, column, cell, fields):
+        # updateCells request for a single cell (0-based column, 1-based row)
+        return {
+            'updateCells': {
+                'range': {
+                    'sheetId': self.worksheet.id,
+                    'startRowIndex': row_index - 1,
+                    'endRowIndex': row_index,
+                    'startColumnIndex': column,
+                    'endColumnIndex': column + 1
+                },
+                'rows': [{'values': [cell]}],
+                'fields': fields
+            }
+        }
+
+    def remove_loa_statuses(self, row_indices):
+        # Same as remove_loa_status for many rows at once, as a single batch_update call
+        # Returns "written", "journaled" or "failed" like write_cells
+        outcome = "written"
+        try:
+            requests = []
+            for row_index in row_indices:
+                requests.append({
+                    'updateCells': {
+                        'range': {
+                            'sheetId': self.worksheet.id,
+                            'startRowIndex': row_index - 1,
+                            'endRowIndex': row_index,
+                            'startColumnIndex': LOA_NOTICE_COLUMN,
+                            'endColumnIndex': LOA_NOTICE_COLUMN + 1
+                        },
+                        'rows': [{'values': [{'userEnteredValue': {'stringValue': "N/A"}, 'note': None}]}],
+                        'fields': 'userEnteredValue,note'
+                    }
+                })
+                requests.append({
+                    'updateCells': {
+                        'range': {
+                            'sheetId': self.worksheet.id,
+                            'startRowIndex': row_index - 1,
+                            'endRowIndex': row_index,
+                            'startColumnIndex': STATUS_COLUMN,
+                            'endColumnIndex': STATUS_COLUMN + 1
+                        },
+                        'rows': [{'values': [{
+                            'userEnteredValue': {'formulaValue': f'=IF(J{row_index}=TRUE;"Active";"Inactive")'},
+                            'userEnteredFormat': {
+                                'textFormat': {'bold': True},
+                                'backgroundColor': {'red': 0.6, 'green': 0.0, 'blue': 0.0}
+                            }
+                        }]}],
+                        'fields': 'userEnteredValue,userEnteredFormat.textFormat.bold,userEnteredFormat.backgroundColor'
+                    }
+                })
+
+            if requests:
+                try:
+                    self._write_requests(requests)
+                except JournaledWriteError as e:
+                    log.error(f"Error removing LOA status for rows {row_indices}: {e}")
+                    outcome = "journaled"
+
+                for row_index in row_indices:
+                    self._update_loa_state(row=row_index, on_loa=False, note="", end_date=None)
+                log.info(f"Removed LOA status for {len(row_indices)} rows in one request ({outcome})")
+            return outcome
+
+        except Exception as e:
+            log.error(f"Error removing LOA status for rows {row_indices}: {e}")
+            return "failed"
+
     def update_loa_status(self, username, status, make_black=False):
-        # Update LOA status
+        # Update LOA status, "written", "journaled" or "failed" like write_cells
         try:
             # Find the user's row
             cell = self.worksheet.find(username)
             row_index = cell.row
-            
-            # Update LoA NOTICE column - use exact dropdown value
-            self.worksheet.update_cell(row_index, LOA_NOTICE_COLUMN + 1, "LoA")
-            
-            # Uncheck the activity checkbox (set to False)
-            self.worksheet.update_cell(row_index, ACTIVITY_COLUMN + 1, False)
-            print(f"Unchecked activity checkbox for {username}")
-            
-            if make_black:
-                # Update STATUS column and make it black
-                self.format_cell_black(row_index, STATUS_COLUMN + 1)
-            
-            return True
-            
         except Exception as e:
-            print(f"Error updating LOA status for {username}: {e}")
-            return False
+            log.error(f"Error updating LOA status for {username}: {e}")
+            return "failed"
+
+        try:
+            # LoA NOTICE column (exact dropdown value) and the unchecked activity checkbox in one write,
+            # so a journaled write can't leave one without the other
+            self._write_values([
+                self._cell(row_index, LOA_NOTICE_COLUMN + 1, "LoA"),
+                self._cell(row_index, ACTIVITY_COLUMN + 1, False)
+            ])
+            outcome = "written"
+        except JournaledWriteError as e:
+            log.error(f"Error updating LOA status for {username}: {e}")
+            outcome = "journaled"
+        except Exception as e:
+            log.error(f"Error updating LOA status for {username}: {e}")
+            return "failed"
+
+        self._update_loa_state(username, on_loa=True)
+        log.info(f"Unchecked activity checkbox for {username}")
+        
+        if make_black:
+            # Update STATUS column and make it black
+            self.format_cell_black(row_index, STATUS_COLUMN + 1)
+        
+        return outcome
     
     def get_username_by_discord_id(self, discord_user_id):
         # Get Roblox username by Discord ID from spreadsheet - B+C merged cell
         try:
-            all_values = self.worksheet.get_all_values()
+            all_values = self._fetch_all_values()
             
             for row in all_values[3:]:
                 if len(row) > DISCORD_ID_COLUMN and row[DISCORD_ID_COLUMN] == discord_user_id:
@@ -391,15 +843,15 @@ class SheetsManager:
             
             return None
         except Exception as e:
-            print(f"Error getting username by Discord ID: {e}")
+            log.error(f"Error getting username by Discord ID: {e}")
             return None
     
-    async def reset_weekly_activity(self):
-        # Reset all activity checkboxes to False
+    def reset_weekly_activity(self):
+        # Reset all activity checkboxes to False (blocking, call through asyncio.to_thread)
         try:
-            print("Resetting weekly activity checkboxes...")
+            log.info("Resetting weekly activity checkboxes...")
             
-            all_values = self.worksheet.get_all_values()
+            all_values = self._fetch_all_values()
             
             # Find the last row with actual user data
             last_user_row = 3 
@@ -414,43 +866,37 @@ class SheetsManager:
                 false_values = [[False] for _ in range(4, last_user_row + 1)]
                 
                 range_name = f'J4:J{last_user_row}'
-                self.worksheet.update(range_name, false_values)
+                self._write_values([{'range': range_name, 'values': false_values}], value_input='RAW')
                 
-                print(f"Reset activity checkboxes for {last_user_row - 3} users (rows 4-{last_user_row})")
+                log.info(f"Reset activity checkboxes for {last_user_row - 3} users (rows 4-{last_user_row})")
             else:
-                print("No user data found to reset")
+                log.info("No user data found to reset")
             
         except Exception as e:
-            print(f"Error resetting weekly activity: {e}")
+            log.error(f"Error resetting weekly activity: {e}")
     
     def update_activity_checkbox(self, username):
         # Update activity checkbox to True for a specific person
         try:
             cell = self.worksheet.find(username)
             row_index = cell.row
-            self.worksheet.update_cell(row_index, ACTIVITY_COLUMN + 1, True)
+            self._write_values([self._cell(row_index, ACTIVITY_COLUMN + 1, True)])
             return True
         except Exception as e:
-            print(f"Error updating activity checkbox for {username}: {e}")
+            log.error(f"Error updating activity checkbox for {username}: {e}")
             return False
     
     def check_promotion_eligibility_from_data(self, points, current_rank):
         # Check promotion without additional API calls
-        promotions = {
-            "E1": {"next_rank": "E2", "points_needed": 10, "needs_app": False},
-            "E2": {"next_rank": "E3", "points_needed": 30, "needs_app": False},
-            "E3": {"next_rank": "E4", "points_needed": 50, "needs_app": False},
-            "E4": {"next_rank": "E5", "points_needed": 70, "needs_app": True},
-        }
-        
-        if current_rank in promotions:
-            promo_info = promotions[current_rank]
-            if points >= promo_info["points_needed"]:
-                return {
-                    "eligible": True,
-                    "next_rank": promo_info["next_rank"],
-                    "needs_application": promo_info["needs_app"]
-                }
+        # Promo board ranks are left to staff, so only automatic or application steps count here
+        rule = promotion_table.next_step(points, current_rank)
+        if rule and (rule["auto"] or rule["needs_app"]):
+            return {
+                "eligible": True,
+                "next_rank": rule["to"],
+                "needs_application": rule["needs_app"],
+                "automatic": rule["auto"]
+            }
         
         return {"eligible": False}
     
@@ -461,16 +907,17 @@ class SheetsManager:
             row_index = cell.row
             
             # Update the rank column
-            self.worksheet.update_cell(row_index, RANK_COLUMN, new_rank)
+            self._write_values([self._cell(row_index, RANK_COLUMN, new_rank)])
             
             # Invalidate cache for this user
             self.invalidate_user_cache(username)
+            self._update_roster_entry(username, rank=new_rank)
             
-            print(f"Updated {username}'s rank to {new_rank} in spreadsheet")
+            log.info(f"Updated {username}'s rank to {new_rank} in spreadsheet")
             return True
             
         except Exception as e:
-            print(f"Error updating rank for {username}: {e}")
+            log.error(f"Error updating rank for {username}: {e}")
             return False
 
     def get_user_rank(self, username):
@@ -482,7 +929,7 @@ class SheetsManager:
             rank_cell = self.worksheet.cell(row_index, RANK_COLUMN)
             return rank_cell.value if rank_cell.value else None
         except Exception as e:
-            print(f"Error getting rank for {username}: {e}")
+            log.error(f"Error getting rank for {username}: {e}")
             return None
         
     def add_loa_note(self, username, note_text):
@@ -500,15 +947,16 @@ class SheetsManager:
             # Use the gspread API to add a note
             try:
                 # Get the cell and update its note
-                self.worksheet.update_note(cell_address, note_text)
-                print(f"Added note to {cell_address}: {note_text}")
+                self._mutate("note", cell=cell_address, note=note_text)
+                self._update_loa_state(username, note=note_text, end_date=parse_message(note_text).loa_end_date)
+                log.debug("Added note to %s: %s", cell_address, note_text)
                 return True
             except AttributeError:
-                print(f"Error adding note")
+                log.error("Error adding note")
                 return False
                 
         except Exception as e:
-            print(f"Error adding LOA note for {username}: {e}")
+            log.error(f"Error adding LOA note for {username}: {e}")
             import traceback
             traceback.print_exc()
             return False
@@ -543,15 +991,15 @@ class SheetsManager:
                     }
                 }]
                 
-                self.spreadsheet.batch_update({'requests': requests})
-                print(f"Removed note from {cell_address}")
+                self._write_requests(requests)
+                log.debug("Removed note from %s", cell_address)
                 return True
             except Exception as batch_error:
-                print(f"Error removing note via batch update: {batch_error}")
+                log.error(f"Error removing note via batch update: {batch_error}")
                 return False
                 
         except Exception as e:
-            print(f"Error removing LOA note for {username}: {e}")
+            log.error(f"Error removing LOA note for {username}: {e}")
             import traceback
             traceback.print_exc()
             return False
\ No newline at end of file
@@ -0,0 +1,25 @@
+# bench_message_parser.py - Throughput of parse_message against the old per-field regexes
+# Run by hand: python tests/bench_message_parser.py
+
+import time
+import conftest  # noqa: F401 - puts the bot's modules on sys.path
+from message_parser import parse_message
+from legacy_parser import legacy_all_fields
+
+SAMPLE = (
+    "**New Activity Log Detected!**\n\n"
+    "**Start time:** 18:02 (BST)\n"
+    "**End time:** 19:47 (BST)\n"
+    "**Total time:** 1 hours 45 mins\n"
+    "**Note:** Patrolled with the medical squadron\n\n"
+    "**Proof of Activity:**"
+)
+
+if __name__ == "__main__":
+    for name, parse in (("parse_message", parse_message), ("legacy, all fields", legacy_all_fields)):
+        count = 100000
+        started = time.perf_counter()
+        for _ in range(count):
+            parse(SAMPLE)
+        elapsed = time.perf_counter() - started
+        print(f"{name}: {count / elapsed:,.0f} parses/sec")
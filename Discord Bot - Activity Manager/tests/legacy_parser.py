@@ -0,0 +1,28 @@
+# legacy_parser.py - The per-field regexes message_parser replaced, kept as the reference behaviour
+
+import re
+
+def legacy_extract_time_data(content):
+    match = re.search(r'\*\*Total time:\*\*\s*(?P<hours>\d+)\s*hours?\s*(?P<mins>\d{1,2})\s*mins?', content, re.IGNORECASE)
+    if match:
+        return (int(match.group('hours')), int(match.group('mins')))
+    match = re.search(r'\*\*Total time:\*\*\s*(?P<hours>\d+)\s*hours?', content, re.IGNORECASE)
+    if match:
+        return (int(match.group('hours')), 0)
+    match = re.search(r'\*\*Total time:\*\*\s*(?P<mins>\d{1,2})\s*mins?', content, re.IGNORECASE)
+    if match:
+        return (0, int(match.group('mins')))
+    return None
+
+def legacy_extract_end_date(content):
+    match = re.search(r'Ends?:\s*(\d{1,2})/(\d{1,2})/(\d{2,4})', content, re.IGNORECASE)
+    return "/".join(match.groups()) if match else None
+
+def legacy_all_fields(content):
+    # What the old code needed for the same fields: substring scans plus one search per field
+    "Total time:" in content
+    legacy_extract_time_data(content)
+    legacy_extract_end_date(content)
+    for label in ("Start time", "End time", "Note"):
+        re.search(rf"\*\*{label}:\*\*[ \t]*([^\r\n]*)", content, re.IGNORECASE)
+    "**Commander**" in content and "**Operatives**" in content
@@ -0,0 +1,68 @@
+# test_message_parser.py - The single-pass parser must agree with the old per-field regexes
+
+import pytest
+from message_parser import parse_message, find_board_lines
+from legacy_parser import legacy_extract_time_data, legacy_extract_end_date
+
+hypothesis = pytest.importorskip("hypothesis")
+from hypothesis import given, settings, strategies as st
+
+filler = st.text(max_size=40)
+clock = st.builds(lambda h, m: f"{h:02d}:{m:02d} (BST)", st.integers(0, 23), st.integers(0, 59))
+
+@st.composite
+def activity_logs(draw):
+    # Activity logs as members write them, including the sloppy variants the old regexes had to cope with
+    pieces = ["**New Activity Log Detected!**\n\n", draw(filler)]
+    if draw(st.booleans()):
+        pieces.append(f"**Start time:** {draw(clock)}\n**End time:** {draw(clock)}\n")
+    label = draw(st.sampled_from(["**Total time:**", "**total time:**", "**TOTAL TIME:**", "Total time:", "**Total time: **"]))
+    gap = draw(st.sampled_from(["", " ", "  ", "\n", "\t"]))
+    hours = draw(st.sampled_from(["", "0", "1", "9", "12", "150"]))
+    unit_h = draw(st.sampled_from([" hours", " hour", "hours", " HOURS", " hrs", ""]))
+    mins = draw(st.sampled_from(["", " 5", "45", " 59", " 199"]))
+    unit_m = draw(st.sampled_from([" mins", " min", "mins", " MINS", " minutes", ""]))
+    pieces.append(f"{label}{gap}{hours}{unit_h}{mins}{unit_m}\n")
+    if draw(st.booleans()):
+        pieces.append(f"**Note:** {draw(st.sampled_from(['with alpha', 'Ends: 3/4/2025', '']))}{draw(filler)}\n\n")
+    if draw(st.booleans()):
+        end = draw(st.sampled_from(["Ends:", "ends:", "END:", "Ends: ", "Ends:\n"]))
+        date = f"{draw(st.integers(1, 31))}/{draw(st.integers(1, 12))}/{draw(st.sampled_from([25, 2025, 202]))}"
+        pieces.append(f"{end}{date}\n")
+    pieces.append(draw(filler))
+    pieces.append("**Proof of Activity:**")
+    return "".join(pieces)
+
+@settings(max_examples=2000)
+@given(activity_logs())
+def test_matches_legacy_on_activity_logs(text):
+    parsed = parse_message(text)
+    assert parsed.total_time == legacy_extract_time_data(text)
+    assert parsed.loa_end_date == legacy_extract_end_date(text)
+    assert parsed.mentions_total_time == ("Total time:" in text)
+
+@settings(max_examples=1000)
+@given(st.text())
+def test_matches_legacy_on_arbitrary_text(text):
+    parsed = parse_message(text)
+    assert parsed.total_time == legacy_extract_time_data(text)
+    assert parsed.loa_end_date == legacy_extract_end_date(text)
+    assert parsed.mentions_total_time == ("Total time:" in text)
+
+def test_reads_every_field_of_a_log():
+    parsed = parse_message(
+        "**Start time:** 18:02 (BST)\n"
+        "**End time:** 19:47 (BST)\n"
+        "**Total time:** 1 hours 45 mins\n"
+        "**Note:** Patrolled with the medical squadron\n"
+    )
+    assert parsed.start_time == "18:02 (BST)"
+    assert parsed.end_time == "19:47 (BST)"
+    assert parsed.total_time == (1, 45)
+    assert parsed.note == "Patrolled with the medical squadron"
+    assert not parsed.is_deployment_board
+
+def test_deployment_board():
+    lines = ["**Commander**", "someone", "**Operatives**", "", "React to join"]
+    assert parse_message("\n".join(lines)).is_deployment_board
+    assert find_board_lines(lines) == (2, 4)
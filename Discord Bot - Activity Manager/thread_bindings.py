@@ -0,0 +1,51 @@
+# thread_bindings.py - Persistent forum thread ID -> Discord ID and roster row map
+
+from config import *
+from local_store import load_json, save_json
+from bot_logging import get_logger
+
+log = get_logger("forum")
+
+class ThreadBindings:
+    def __init__(self, filename=THREAD_BINDINGS_FILE):
+        self.filename = filename
+        # str(thread ID) -> {'discord_id': str, 'row': int}
+        self.bindings = load_json(filename, {})
+        log.info(f"Loaded {len(self.bindings)} thread bindings")
+
+    def get(self, thread_id):
+        return self.bindings.get(str(thread_id))
+
+    def bind(self, thread_id, discord_id, row, save=True):
+        binding = {'discord_id': str(discord_id), 'row': int(row)}
+        if self.bindings.get(str(thread_id)) == binding:
+            return
+        self.bindings[str(thread_id)] = binding
+        if save:
+            self.save()
+
+    def unbind(self, thread_id):
+        if self.bindings.pop(str(thread_id), None) is not None:
+            self.save()
+
+    def backfill(self, threads, discord_row_index):
+        # Bind every (thread ID, owner ID) we can place on the roster, returns how many changed
+        changed = 0
+        for thread_id, owner_id in threads:
+            if not owner_id:
+                continue
+            row = discord_row_index.get(str(owner_id))
+            if row is None:
+                continue
+            binding = self.get(thread_id)
+            if binding and binding['discord_id'] == str(owner_id) and binding['row'] == row:
+                continue
+            self.bind(thread_id, owner_id, row, save=False)
+            changed += 1
+
+        if changed:
+            self.save()
+        return changed
+
+    def save(self):
+        save_json(self.filename, self.bindings)
@@ -0,0 +1,89 @@
+# timezone_index.py - Immutable prefix index of Timezones.txt for parse_timezone and /clockin autocomplete
+
+import re
+from bisect import bisect_left
+from collections.abc import Mapping
+from types import MappingProxyType
+
+CUSTOM_OFFSET_PATTERN = re.compile(r'(GMT|UTC)([+-])(\d+(?:\.\d+)?)')
+
+# Shown before the user has typed anything
+DEFAULT_SUGGESTIONS = ("GMT", "BST", "UTC", "CET", "CEST", "EST", "EDT", "CST", "CDT", "MST", "PST", "PDT", "AEST", "IST", "JST")
+
+# Offsets offered as GMT±/UTC± forms, fractional ones included for India, Nepal etc.
+CUSTOM_OFFSETS = tuple(range(-12, 15)) + (-9.5, -3.5, 3.5, 4.5, 5.5, 5.75, 6.5, 9.5, 10.5, 12.75)
+
+def format_offset(offset):
+    # 5.5 -> "+5:30", -3 -> "-3"
+    sign = "-" if offset < 0 else "+"
+    hours = int(abs(offset))
+    minutes = round((abs(offset) - hours) * 60)
+    return f"{sign}{hours}:{minutes:02d}" if minutes else f"{sign}{hours}"
+
+def format_custom_name(prefix, offset):
+    # Same spelling parse_timezone accepts, e.g. GMT+5.5
+    sign = "-" if offset < 0 else "+"
+    value = abs(offset)
+    number = f"{value:g}"
+    return f"{prefix}{sign}{number}"
+
+class TimezoneIndex(Mapping):
+    def __init__(self, offsets):
+        # Read-only view so every caller shares one parsed copy
+        self._offsets = MappingProxyType(dict(offsets))
+
+        custom = {}
+        for prefix in ("GMT", "UTC"):
+            for offset in CUSTOM_OFFSETS:
+                custom[format_custom_name(prefix, offset)] = float(offset)
+
+        # Sorted names for bisect prefix search; file entries win over custom forms
+        merged = dict(custom)
+        merged.update(self._offsets)
+        self._names = tuple(sorted(merged))
+        self._labels = MappingProxyType({
+            name: f"{name} (UTC{format_offset(offset)})" for name, offset in merged.items()
+        })
+        self._defaults = tuple(name for name in DEFAULT_SUGGESTIONS if name in self._labels)
+
+    def __getitem__(self, key):
+        return self._offsets[key]
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def offset_for(self, timezone_str):
+        # Offset in hours for an abbreviation or GMT±X / UTC±X, None if unknown
+        if not timezone_str:
+            return None
+
+        timezone_str = timezone_str.replace(" ", "").upper().strip()
+
+        offset = self._offsets.get(timezone_str)
+        if offset is not None:
+            return offset
+
+        match = CUSTOM_OFFSET_PATTERN.match(timezone_str)
+        if match:
+            sign = 1 if match.group(2) == '+' else -1
+            return sign * float(match.group(3))
+
+        return None
+
+    def complete(self, prefix, limit=25):
+        # Up to limit names starting with prefix, as (name, label) pairs
+        prefix = prefix.replace(" ", "").upper() if prefix else ""
+        if not prefix:
+            names = self._defaults[:limit]
+            return [(name, self._labels[name]) for name in names]
+
+        results = []
+        start = bisect_left(self._names, prefix)
+        for name in self._names[start:start + limit]:
+            if not name.startswith(prefix):
+                break
+            results.append((name, self._labels[name]))
+        return results
@@ -0,0 +1,97 @@
+# work_queue.py - Worker pool that runs member jobs in order per member and concurrently across members
+
+import asyncio
+import time
+from collections import deque
+from metrics import metrics
+from bot_logging import get_logger
+
+log = get_logger("work_queue")
+
+class MemberWorkQueue:
+    def __init__(self, workers=4, name="member_queue"):
+        self.worker_count = workers
+        self.name = name
+
+        # member key -> deque of (job, future, enqueued_at, description)
+        # A key sits in ready_keys at most once, so one member never runs on two workers
+        self.pending = {}
+        self.ready_keys = asyncio.Queue()
+        self.workers = []
+        self.depth = 0
+
+    def start(self):
+        # Safe to call on every on_ready
+        if self.workers:
+            return
+
+        for i in range(self.worker_count):
+            self.workers.append(asyncio.create_task(self._worker(i)))
+        log.info(f"Started {self.worker_count} {self.name} workers")
+
+    def submit(self, key, job, description=""):
+        # Queue a job (a callable returning an awaitable) and return a future for its result
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(self._consume_exception)
+        entry = (job, future, time.perf_counter(), description)
+
+        member_jobs = self.pending.get(key)
+        if member_jobs is None:
+            self.pending[key] = deque([entry])
+            self.ready_keys.put_nowait(key)
+        else:
+            member_jobs.append(entry)
+
+        self.depth += 1
+        metrics.increment(f"{self.name}.submitted")
+        metrics.set_gauge(f"{self.name}.depth", self.depth)
+        return future
+
+    async def run(self, key, job, description=""):
+        # Queue a job and wait for it to finish
+        return await self.submit(key, job, description)
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "members_waiting": len(self.pending),
+            "workers": len(self.workers),
+            "wait": metrics.timing_summary(f"{self.name}.wait"),
+            "run": metrics.timing_summary(f"{self.name}.run")
+        }
+
+    async def _worker(self, worker_id):
+        while True:
+            key = await self.ready_keys.get()
+            member_jobs = self.pending[key]
+            job, future, enqueued_at, description = member_jobs.popleft()
+
+            self.depth -= 1
+            metrics.set_gauge(f"{self.name}.depth", self.depth)
+
+            started = time.perf_counter()
+            metrics.observe(f"{self.name}.wait", started - enqueued_at)
+
+            try:
+                result = await job()
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                log.error(f"Error in {self.name} job {description or key}: {e}")
+                metrics.increment(f"{self.name}.failed")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                metrics.observe(f"{self.name}.run", time.perf_counter() - started)
+
+                # Hand the member back to the pool only after this job is done
+                if member_jobs:
+                    self.ready_keys.put_nowait(key)
+                else:
+                    del self.pending[key]
+
+    @staticmethod
+    def _consume_exception(future):
+        # Fire-and-forget jobs already log their errors
+        if not future.cancelled():
+            future.exception()